@@ -0,0 +1,179 @@
+"""Streaming per-pixel statistics over many granules.
+
+Granules are consumed one at a time into float64 accumulators of counts,
+sums, extrema and Welford's running mean and sum of squared deviations, so
+memory stays proportional to the grid however many granules there are.
+Fill values and out-of-range values are skipped.  The granule list is split
+into time ranges that worker processes accumulate independently, and the
+partial accumulators are then merged exactly (Chan et al.).
+"""
+import multiprocessing
+
+import numpy as np
+
+from .lib import sd as SD
+from .stack import granule_time
+
+
+def calendar_month(time):
+    """Group key for monthly climatologies: the month, 1 to 12."""
+    return int(np.datetime64(time, 'M').astype(int) % 12 + 1)
+
+
+class Accumulator(object):
+    """Running per-pixel count, sum, minimum, maximum, mean and variance.
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape of the fields to be accumulated.
+    """
+    def __init__(self, shape):
+        self.shape = tuple(shape)
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.sum = np.zeros(shape, dtype=np.float64)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+        self._mean = np.zeros(shape, dtype=np.float64)
+        self._m2 = np.zeros(shape, dtype=np.float64)
+
+    def add(self, field, fill_value=None):
+        """Accumulate one field.  NaNs and fill_value are skipped."""
+        x = np.asarray(field, dtype=np.float64)
+        valid = ~np.isnan(x)
+        if fill_value is not None:
+            valid &= x != fill_value
+        self.count += valid
+        np.add(self.sum, x, out=self.sum, where=valid)
+        np.minimum(self.min, x, out=self.min, where=valid)
+        np.maximum(self.max, x, out=self.max, where=valid)
+
+        # Welford's update, only where the field is valid.
+        delta = np.subtract(x, self._mean, out=np.zeros(self.shape),
+                            where=valid)
+        np.add(self._mean, delta / np.maximum(self.count, 1), out=self._mean,
+               where=valid)
+        delta *= np.subtract(x, self._mean, out=np.zeros(self.shape),
+                             where=valid)
+        self._m2 += delta
+
+    def merge(self, other):
+        """Fold another accumulator of the same shape into this one."""
+        count = self.count + other.count
+        n = np.maximum(count, 1)
+        delta = other._mean - self._mean
+        self._mean += delta * (other.count / n)
+        self._m2 += other._m2 + delta ** 2 * (self.count * other.count / n)
+        self.count = count
+        self.sum += other.sum
+        np.minimum(self.min, other.min, out=self.min)
+        np.maximum(self.max, other.max, out=self.max)
+        return self
+
+    def _where_counted(self, values, minimum=1):
+        return np.where(self.count >= minimum, values, np.nan)
+
+    @property
+    def mean(self):
+        """Mean, NaN where nothing was accumulated."""
+        return self._where_counted(self._mean)
+
+    def variance(self, ddof=0):
+        """Variance, NaN where fewer than ddof + 1 values were accumulated."""
+        n = np.maximum(self.count - ddof, 1)
+        return self._where_counted(self._m2 / n, ddof + 1)
+
+    def std(self, ddof=0):
+        return np.sqrt(self.variance(ddof))
+
+    @property
+    def minimum(self):
+        return self._where_counted(self.min)
+
+    @property
+    def maximum(self):
+        return self._where_counted(self.max)
+
+
+def _accumulate(task):
+    """Accumulate a run of granules; runs in a worker."""
+    filenames, keys, dataset, start, stride, edge = task
+    accumulators = {}
+    buffer = None
+    for filename, key in zip(filenames, keys):
+        with SD.start(filename) as sdid:
+            with SD.select(sdid, SD.nametoindex(sdid, dataset)) as sds_id:
+                field = SD.readdata(sds_id, start=start, stride=stride,
+                                    edge=edge, out=buffer, decode=True)
+        if buffer is None:
+            # Reused as out, which must be writeable; a field cache may
+            # serve read-only memory maps.
+            buffer = field if field.flags.writeable else field.copy()
+        if key not in accumulators:
+            accumulators[key] = Accumulator(field.shape)
+        accumulators[key].add(field)
+    return accumulators
+
+
+def aggregate(filenames, dataset, by=None, start=None, stride=None,
+              edge=None, times=None, processes=None):
+    """Accumulate per-pixel statistics of a dataset over many granules.
+
+    Parameters
+    ----------
+    filenames : list
+        HDF files, all with the dataset at the same shape.
+    dataset : str
+        SD dataset name, e.g. 'Ozone'.  Values are decoded as by
+        sd.readdata(decode=True), so fill and out-of-range values are
+        skipped.
+    by : callable, optional
+        Maps a granule's time onto a group key, e.g. calendar_month for a
+        monthly climatology.  By default all granules form one group.
+    start, stride, edge : array_like, optional
+        Hyperslab to read from each granule, see sd.readdata.
+    times : array_like, optional
+        Time of each granule.  Parsed from the file names by default; only
+        needed to group or split by time.
+    processes : int, optional
+        Number of worker processes, defaults to the number of CPUs.
+
+    Returns
+    -------
+    Accumulator or dict
+        The accumulator, or a dictionary of them by group key.
+
+    Raises
+    ------
+    IOError
+        If a granule cannot be read.
+    """
+    filenames = list(filenames)
+    if len(filenames) == 0:
+        raise ValueError("No granules to aggregate.")
+    if times is None:
+        times = [granule_time(filename) for filename in filenames]
+    times = np.asarray(times)
+    order = np.argsort(times, kind='stable')
+    filenames = [filenames[j] for j in order]
+    keys = [None if by is None else by(times[j]) for j in order]
+
+    processes = processes or multiprocessing.cpu_count()
+    chunks = [chunk for chunk in np.array_split(np.arange(len(filenames)),
+                                                processes) if len(chunk)]
+    tasks = [([filenames[j] for j in chunk], [keys[j] for j in chunk],
+              dataset, start, stride, edge) for chunk in chunks]
+
+    accumulators = {}
+    pool = multiprocessing.Pool(len(tasks))
+    try:
+        for partial in pool.imap(_accumulate, tasks):
+            for key, accumulator in partial.items():
+                if key in accumulators:
+                    accumulators[key].merge(accumulator)
+                else:
+                    accumulators[key] = accumulator
+    finally:
+        pool.close()
+        pool.join()
+    return accumulators[None] if by is None else accumulators
@@ -0,0 +1,239 @@
+"""On-disk cache of dataset reads.
+
+A read is identified by the file (path, modification time and size), the
+dataset name, the hyperslab and a variant telling raw values from decoded
+ones.  Once installed, the cache sits under sd.readdata, which stores its
+decoded (fill-masked and scaled) reads, and gd.readfield, which stores raw
+field values as GDreadfield returns them.  Values are stored under
+<cache_dir>/<key>/ with a small JSON header, either as one .npy file that
+repeated reads load, or memory-map, without going through the HDF library,
+or as a directory of compressed chunks, much like a Zarr array.  The cache
+is bounded in size, evicting the least recently used entries first, and may
+be shared between processes.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from .grid import CACHE_DIR
+from .lib import gd as GD
+from .lib import sd as SD
+
+
+def _chunk_slices(shape, chunks):
+    """Yield (name, index) of each chunk, chunking the leading dimensions."""
+    ranges = [range(0, n, c) for n, c in zip(shape, chunks)]
+    for corner in np.ndindex(*[len(r) for r in ranges]):
+        starts = [r[j] for r, j in zip(ranges, corner)]
+        index = tuple(slice(s, s + c) for s, c in zip(starts, chunks))
+        yield '.'.join(str(j) for j in corner), index
+
+
+class FieldCache(object):
+    """Size-bounded LRU cache of dataset reads.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        Directory holding the cache, by default the fields subdirectory of
+        HOTDOG_CACHE_DIR.
+    maxbytes : int, optional
+        Size the cache is trimmed to after each new entry.
+    chunks : tuple, optional
+        Chunk shape of compressed entries along the leading dimensions.
+    compress : bool, optional
+        Store zlib compressed chunks.  They take less space but are read
+        into memory rather than memory-mapped.
+    mmap : bool, optional
+        Serve uncompressed hits as read-only memory maps instead of
+        writeable arrays read into memory.
+
+    Raises
+    ------
+    ValueError
+        If no cache directory is given and HOTDOG_CACHE_DIR is not set.
+
+    Examples
+    --------
+    >>> cache = FieldCache('/scratch/hotdog', maxbytes=2 ** 30)
+    >>> ozone = cache.read(filename, 'Ozone', start=[40, 44], edge=[26, 47])
+    >>> install(cache)  # Cache decoded SD.readdata and all GD.readfield.
+    """
+    def __init__(self, cache_dir=None, maxbytes=2 ** 30, chunks=(256, 256),
+                 compress=False, mmap=False):
+        if cache_dir is None and CACHE_DIR is None:
+            raise ValueError("No cache directory given and HOTDOG_CACHE_DIR "
+                             "is not set.")
+        if cache_dir is None:
+            cache_dir = os.path.join(CACHE_DIR, 'fields')
+        self.cache_dir = cache_dir
+        self.maxbytes = maxbytes
+        self.chunks = tuple(chunks)
+        self.compress = compress
+        self.mmap = mmap
+
+    def key(self, filename, dataset, start=None, stride=None, edge=None,
+            variant=None):
+        """Cache key of a read.
+
+        variant distinguishes different reads of the same hyperslab, e.g.
+        raw and decoded values.
+        """
+        filename = os.path.realpath(filename)
+        st = os.stat(filename)
+        hyperslab = [None if v is None else [int(x) for x in v]
+                     for v in (start, stride, edge)]
+        identity = [filename, st.st_mtime, st.st_size, dataset, hyperslab]
+        if variant is not None:
+            identity.append(variant)
+        return hashlib.sha1(json.dumps(identity).encode()).hexdigest()
+
+    def read(self, filename, dataset, start=None, stride=None, edge=None):
+        """Read a decoded hyperslab, from the cache if possible.
+
+        Parameters
+        ----------
+        filename : str
+            HDF file.
+        dataset : str
+            SD dataset name.  HDF-EOS grid fields are SD datasets too.
+        start, stride, edge : array_like, optional
+            Hyperslab, see sd.readdata.
+
+        Returns
+        -------
+        ndarray
+            Values decoded as by sd.readdata(decode=True); read-only if
+            served memory-mapped.
+
+        Raises
+        ------
+        IOError
+            If the library fails to read the dataset.
+        """
+        with SD.start(filename) as sdid:
+            with SD.select(sdid, SD.nametoindex(sdid, dataset)) as sds_id:
+                return SD.readdata(sds_id, start=start, stride=stride,
+                                   edge=edge, decode=True, cache=self)
+
+    def get(self, key, mmap=None):
+        """Cached array, or None if there is no entry for key.
+
+        Uncompressed entries are memory-mapped read-only if mmap, which
+        defaults to self.mmap, is true.  Otherwise the array is writeable.
+        """
+        mmap = self.mmap if mmap is None else mmap
+        entry = os.path.join(self.cache_dir, key)
+        header_path = os.path.join(entry, 'header.json')
+        try:
+            with open(header_path) as f:
+                header = json.load(f)
+            if header['compress']:
+                data = np.empty(header['shape'], dtype=header['dtype'])
+                for name, index in _chunk_slices(data.shape,
+                                                 header['chunks']):
+                    path = os.path.join(entry, name + '.npz')
+                    with np.load(path) as chunk:
+                        data[index] = chunk['data']
+            else:
+                data = np.load(os.path.join(entry, 'data.npy'),
+                               mmap_mode='r' if mmap else None)
+            # The header's modification time orders the entries for eviction.
+            os.utime(header_path, None)
+        except (IOError, OSError, KeyError, ValueError):
+            # Missing, or evicted by another process while being read.
+            return None
+        return data
+
+    def put(self, key, data):
+        """Store an array under key, then trim the cache.
+
+        Raises
+        ------
+        OSError
+            If the entry cannot be written, e.g. the disk is full.
+        """
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        entry = os.path.join(self.cache_dir, key)
+        tmp = tempfile.mkdtemp(dir=self.cache_dir, prefix='.')
+        try:
+            header = {'shape': data.shape, 'dtype': data.dtype.str,
+                      'compress': self.compress}
+            if self.compress:
+                chunks = (self.chunks[:data.ndim] +
+                          data.shape[len(self.chunks):])
+                for name, index in _chunk_slices(data.shape, chunks):
+                    np.savez_compressed(os.path.join(tmp, name + '.npz'),
+                                        data=data[index])
+                header['chunks'] = chunks
+            else:
+                np.save(os.path.join(tmp, 'data.npy'), data)
+            with open(os.path.join(tmp, 'header.json'), 'w') as f:
+                json.dump(header, f)
+            try:
+                os.rename(tmp, entry)
+            except OSError:
+                if not os.path.isdir(entry):
+                    raise
+                # Another process stored the same entry first.
+                shutil.rmtree(tmp, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.trim()
+
+    def entries(self):
+        """List (last used, size in bytes, path) of the cached entries,
+        least recently used first."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry = os.path.join(self.cache_dir, name)
+            if name.startswith('.') or not os.path.isdir(entry):
+                continue
+            try:
+                used = os.stat(os.path.join(entry, 'header.json')).st_mtime
+                size = sum(os.path.getsize(os.path.join(entry, f))
+                           for f in os.listdir(entry))
+            except OSError:
+                continue
+            entries.append((used, size, entry))
+        return sorted(entries)
+
+    @property
+    def nbytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def trim(self, maxbytes=None):
+        """Evict least recently used entries until the cache fits."""
+        maxbytes = self.maxbytes if maxbytes is None else maxbytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= maxbytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        self.trim(0)
+
+
+def install(cache):
+    """Route decoded sd.readdata reads and gd.readfield reads through a
+    cache by default.
+
+    Parameters
+    ----------
+    cache : FieldCache or None
+        The cache, or None to stop caching.
+    """
+    SD.field_cache = cache
+    GD.field_cache = cache
@@ -0,0 +1,206 @@
+"""Cloud-optimized GeoTIFF output.
+
+A COG is a tiled GeoTIFF carrying reduced-resolution overviews, with every
+image file directory (IFD) at the start of the file so that a reader can
+find any tile of any zoom level from the first few kilobytes.  The
+overviews are built by 2 x 2 block reduction of the level above and stored
+as chained IFDs, full resolution first, as GDAL writes them.  The tile data
+follows the directories, smallest overview first.
+
+libtiff normally writes a directory after its data.  Here all directories
+are written up front with their tile offsets deferred, then the file is
+reopened and the tiles of each level written, after which the offsets are
+patched in place.  This needs libtiff 4.1 or later.
+"""
+import numpy as np
+
+from .lib import tiff as TIFF
+
+
+def reduce(array, method='mean', fill_value=None):
+    """Halve the resolution of an image by 2 x 2 block reduction.
+
+    Odd sized images are reduced as though padded with missing values, so
+    the result is ceil(rows / 2) x ceil(cols / 2).
+
+    Parameters
+    ----------
+    array : ndarray
+        Image, (rows, cols) or (rows, cols, samples).
+    method : str, optional
+        'mean', 'nearest' (the upper left pixel of each block), or 'nanmean'
+        (mean of the pixels that are neither NaN nor fill_value).
+    fill_value : scalar, optional
+        Missing value for 'nanmean', e.g. the field's _FillValue.  Blocks
+        with no valid pixels are set to it, or to NaN if not given.
+
+    Returns
+    -------
+    ndarray
+        Reduced image with the dtype of the input.
+    """
+    array = np.asarray(array)
+    if method == 'nearest':
+        return array[::2, ::2].copy()
+    elif method not in ('mean', 'nanmean'):
+        raise ValueError("Unknown reduction method {0}.".format(method))
+
+    nrow, ncol = array.shape[:2]
+    shape = (-(-nrow // 2), -(-ncol // 2))
+    padded = (2 * shape[0], 2 * shape[1]) + array.shape[2:]
+    values = np.zeros(padded, dtype=np.float64)
+    values[:nrow, :ncol] = array
+    valid = np.zeros(padded, dtype=bool)
+    valid[:nrow, :ncol] = True
+    if method == 'nanmean':
+        if array.dtype.kind == 'f':
+            valid[:nrow, :ncol] &= ~np.isnan(array)
+        if fill_value is not None:
+            valid[:nrow, :ncol] &= array != fill_value
+        values[~valid] = 0
+
+    blocks = (shape[0], 2, shape[1], 2) + array.shape[2:]
+    sums = values.reshape(blocks).sum(axis=(1, 3))
+    counts = valid.reshape(blocks).sum(axis=(1, 3))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sums / counts
+    if method == 'nanmean':
+        mean[counts == 0] = np.nan if fill_value is None else fill_value
+    if array.dtype.kind in 'iu':
+        mean = np.rint(mean)
+    return mean.astype(array.dtype)
+
+
+def pyramid(array, tile=(512, 512), levels=None, method='mean',
+            fill_value=None):
+    """Build the overview levels of an image.
+
+    Parameters
+    ----------
+    array : ndarray
+        Full resolution image.
+    tile : tuple, optional
+        Tile length and width.  By default levels are added until the
+        smallest fits in a single tile.
+    levels : int, optional
+        Number of overviews to build.
+    method, fill_value
+        See reduce.
+
+    Returns
+    -------
+    list
+        The full resolution image followed by each overview.
+    """
+    images = [np.asarray(array)]
+    while True:
+        nrow, ncol = images[-1].shape[:2]
+        if levels is None:
+            if nrow <= tile[0] and ncol <= tile[1]:
+                break
+        elif len(images) > levels:
+            break
+        if nrow == 1 and ncol == 1:
+            break
+        images.append(reduce(images[-1], method=method,
+                             fill_value=fill_value))
+    return images
+
+
+def _itertiles(image, tile, fill):
+    """Yield (x, y, tile) in tile order, padding the edge tiles."""
+    nrow, ncol = image.shape[:2]
+    for y in range(0, nrow, tile[0]):
+        for x in range(0, ncol, tile[1]):
+            block = np.full(tile + image.shape[2:], fill, dtype=image.dtype)
+            view = image[y:y + tile[0], x:x + tile[1]]
+            block[:view.shape[0], :view.shape[1]] = view
+            yield x, y, block
+
+
+def write_cog(filename, array, tile=(512, 512), method='mean',
+              fill_value=None, levels=None, tags=(),
+              compression=TIFF.COMPRESSION_ADOBE_DEFLATE,
+              predictor=TIFF.PREDICTOR_NONE, threads=None, bigtiff=None,
+              photometric=TIFF.PHOTOMETRIC_MINISBLACK):
+    """Write an image and its overviews as a cloud-optimized GeoTIFF.
+
+    Parameters
+    ----------
+    filename : str
+        Output TIFF file.
+    array : ndarray
+        Image, (rows, cols) or pixel interleaved (rows, cols, samples).
+    tile : tuple, optional
+        Tile length and width; both must be multiples of 16.
+    method : str, optional
+        Overview reduction, 'mean', 'nearest' or 'nanmean'.
+    fill_value : scalar, optional
+        Missing value, e.g. the field's _FillValue.  The 'nanmean' reduction
+        leaves it out of the block means and fills blocks with no valid
+        pixels with it.  It also pads the edge tiles.
+    levels : int, optional
+        Number of overviews.  By default, until the smallest fits one tile.
+    tags : list, optional
+        (tagname, value) pairs for the full resolution image, e.g. from
+        GridDefinition.geotiff_tags.
+    compression, predictor, threads
+        See tiff.ParallelTileWriter.
+    bigtiff : bool, optional
+        Write BigTIFF.  By default it is used when the uncompressed output
+        could exceed classic TIFF's 4 GB limit.
+    photometric : int, optional
+        PhotometricInterpretation tag value.
+
+    Raises
+    ------
+    IOError
+        If a library routine fails.
+    """
+    if tile[0] % 16 or tile[1] % 16:
+        raise ValueError("Tile dimensions must be multiples of 16.")
+    images = pyramid(array, tile=tile, levels=levels, method=method,
+                     fill_value=fill_value)
+    dtype = images[0].dtype
+    samples = images[0].shape[2] if images[0].ndim == 3 else 1
+    nbytes = sum(TIFF.estimate_nbytes(image.shape, dtype, tile)
+                 for image in images)
+
+    # All the directories first, with room for but not yet the offsets.
+    with TIFF.open(filename, 'w', bigtiff=bigtiff, nbytes=nbytes) as tifp:
+        for j, image in enumerate(images):
+            if j > 0:
+                TIFF.setfield(tifp, 'NewSubfileType',
+                              TIFF.FILETYPE_REDUCEDIMAGE)
+            TIFF.setfield(tifp, 'ImageWidth', image.shape[1])
+            TIFF.setfield(tifp, 'ImageLength', image.shape[0])
+            TIFF.setfield(tifp, 'SamplesPerPixel', samples)
+            TIFF.setfield(tifp, 'BitsPerSample', dtype.itemsize * 8)
+            TIFF.setfield(tifp, 'SampleFormat', TIFF.sampleformat(dtype))
+            TIFF.setfield(tifp, 'PlanarConfiguration',
+                          TIFF.PLANARCONFIG_CONTIG)
+            TIFF.setfield(tifp, 'PhotometricInterpretation', photometric)
+            TIFF.setfield(tifp, 'TileWidth', tile[1])
+            TIFF.setfield(tifp, 'TileLength', tile[0])
+            TIFF.setfield(tifp, 'Compression', compression)
+            if predictor != TIFF.PREDICTOR_NONE:
+                TIFF.setfield(tifp, 'Predictor', predictor)
+            if j == 0:
+                for tagname, value in tags:
+                    TIFF.setfield(tifp, tagname, value)
+            TIFF.deferstrilearraywriting(tifp)
+            TIFF.writecheck(tifp, tiled=True)
+            TIFF.writedirectory(tifp)
+
+    # Then the tiles, smallest overview first.
+    fill = 0 if fill_value is None else fill_value
+    with TIFF.open(filename, 'r+') as tifp:
+        for j in reversed(range(len(images))):
+            TIFF.setdirectory(tifp, j)
+            with TIFF.ParallelTileWriter(tifp, compression=compression,
+                                         predictor=predictor,
+                                         threads=threads,
+                                         settags=False) as writer:
+                for x, y, block in _itertiles(images[j], tile, fill):
+                    writer.write(block, x, y)
+            TIFF.forcestrilearraywriting(tifp)
@@ -0,0 +1,158 @@
+"""Streaming HDF-EOS grid field to GeoTIFF conversion.
+
+The field is read one tile-sized hyperslab at a time and written with
+TIFFWriteRawTile, so peak memory is a handful of tiles no matter how large
+the grid is.  Reading, compression and writing overlap: a producer thread
+issues the HDF reads, a thread pool compresses tiles and the calling thread
+writes them in order.  All HDF calls stay on the producer thread, as the HDF
+library is not thread-safe.
+"""
+import queue
+import threading
+
+import numpy as np
+
+from .core import DFACC_READ
+from .grid import GridDefinition
+from .lib import gd as GD
+from .lib import tiff as TIFF
+
+
+def _put(tiles, item, stop):
+    """Queue an item unless the consumer has stopped.  Returns False if it
+    has."""
+    while not stop.is_set():
+        try:
+            tiles.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _produce(gridid, fieldname, dims, dtype, tileshape, fill, tiles, stop):
+    """Read the field tile by tile onto the queue, padding edge tiles."""
+    nrow, ncol = dims
+    tile_length, tile_width = tileshape
+    try:
+        for y in range(0, nrow, tile_length):
+            for x in range(0, ncol, tile_width):
+                edge = [min(tile_length, nrow - y), min(tile_width, ncol - x)]
+                if edge == [tile_length, tile_width]:
+                    tile = GD.readfield(gridid, fieldname, start=[y, x],
+                                        edge=edge)
+                else:
+                    tile = np.full(tileshape, fill, dtype=dtype)
+                    tile[:edge[0], :edge[1]] = GD.readfield(gridid, fieldname,
+                                                            start=[y, x],
+                                                            edge=edge)
+                if not _put(tiles, (x, y, tile), stop):
+                    return
+        _put(tiles, None, stop)
+    except BaseException as err:
+        _put(tiles, err, stop)
+
+
+def grid2tiff(filename, gridname, fieldname, tiffname, tileshape=(256, 256),
+              fill=0, queuesize=4, georeference=True, nodata=None,
+              compression=TIFF.COMPRESSION_NONE,
+              predictor=TIFF.PREDICTOR_NONE, threads=None, bigtiff=None):
+    """Convert a 2-D grid field into a tiled GeoTIFF, streaming tile by tile.
+
+    Parameters
+    ----------
+    filename : str
+        HDF-EOS file.
+    gridname : str
+        Name of grid.
+    fieldname : str
+        Name of field.
+    tiffname : str
+        Output TIFF file.
+    tileshape : tuple, optional
+        TIFF tile length and width; both must be multiples of 16.
+    fill : scalar, optional
+        Value used to pad the tiles along the right and bottom edges.
+    queuesize : int, optional
+        Number of tiles buffered between the reader and the writer.
+    georeference : bool, optional
+        Write GeoTIFF tags derived from the grid definition.
+    nodata : scalar, optional
+        Value recorded in the GDAL_NODATA tag, e.g. the field's _FillValue.
+    compression : int, optional
+        TIFF.COMPRESSION_NONE, TIFF.COMPRESSION_ADOBE_DEFLATE or
+        TIFF.COMPRESSION_ZSTD.
+    predictor : int, optional
+        TIFF.PREDICTOR_NONE, TIFF.PREDICTOR_HORIZONTAL (integer fields) or
+        TIFF.PREDICTOR_FLOATINGPOINT (float fields).
+    threads : int, optional
+        Number of compression threads, defaults to the number of CPUs.
+    bigtiff : bool, optional
+        Write BigTIFF.  By default it is used when the uncompressed output
+        could exceed classic TIFF's 4 GB limit.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    NotImplementedError
+        If georeference is requested for an unsupported projection.
+    """
+    tile_length, tile_width = tileshape
+    if tile_length % 16 or tile_width % 16:
+        raise ValueError("Tile dimensions must be multiples of 16.")
+
+    with GD.open(filename, DFACC_READ) as gdfid:
+        with GD.attach(gdfid, gridname) as gridid:
+            rank, dims, numbertype, _ = GD.fieldinfo(gridid, fieldname)
+            if rank != 2:
+                raise NotImplementedError("Only 2-D fields for now.")
+            dtype = GD.numpy_dtype(numbertype)
+            nrow, ncol = [int(x) for x in dims]
+            geotags = []
+            if georeference:
+                gdef = GridDefinition.from_gridid(gridid, name=gridname)
+                geotags = gdef.geotiff_tags(nodata=nodata)
+            elif nodata is not None:
+                geotags = [('GDAL_NODATA', repr(float(nodata)))]
+
+            tiles = queue.Queue(maxsize=queuesize)
+            stop = threading.Event()
+            producer = threading.Thread(target=_produce,
+                                        args=(gridid, fieldname, (nrow, ncol),
+                                              dtype, tileshape, fill, tiles,
+                                              stop))
+            producer.daemon = True
+            producer.start()
+            try:
+                nbytes = TIFF.estimate_nbytes((nrow, ncol), dtype, tileshape)
+                with TIFF.open(tiffname, 'w', bigtiff=bigtiff,
+                               nbytes=nbytes) as tifp:
+                    TIFF.setfield(tifp, 'ImageWidth', ncol)
+                    TIFF.setfield(tifp, 'ImageLength', nrow)
+                    TIFF.setfield(tifp, 'SamplesPerPixel', 1)
+                    TIFF.setfield(tifp, 'BitsPerSample', dtype.itemsize * 8)
+                    TIFF.setfield(tifp, 'SampleFormat', TIFF.sampleformat(dtype))
+                    TIFF.setfield(tifp, 'PlanarConfiguration',
+                                  TIFF.PLANARCONFIG_CONTIG)
+                    TIFF.setfield(tifp, 'PhotometricInterpretation',
+                                  TIFF.PHOTOMETRIC_MINISBLACK)
+                    TIFF.setfield(tifp, 'TileWidth', tile_width)
+                    TIFF.setfield(tifp, 'TileLength', tile_length)
+                    for tagname, value in geotags:
+                        TIFF.setfield(tifp, tagname, value)
+                    with TIFF.ParallelTileWriter(tifp,
+                                                 compression=compression,
+                                                 predictor=predictor,
+                                                 threads=threads) as writer:
+                        while True:
+                            item = tiles.get()
+                            if item is None:
+                                break
+                            if isinstance(item, BaseException):
+                                raise item
+                            x, y, tile = item
+                            writer.write(tile, x, y)
+            finally:
+                stop.set()
+                producer.join()
@@ -2,9 +2,29 @@ DFACC_READ = 1
 HDFE_CENTER = 0
 HDFE_CORNER = 1
 HDFE_NENTDIM = 0
+HDFE_NENTMAP = 1
+HDFE_NENTIMAP = 2
+HDFE_NENTGFLD = 3
 HDFE_NENTFLD = 4
 HDFE_GD_UL = 0
 HDFE_GD_UR = 1
 HDFE_GD_LL = 2
 HDFE_GD_LR = 3
 DFNT_FLOAT = 5
+DFNT_UCHAR8 = 3
+DFNT_CHAR8 = 4
+DFNT_FLOAT32 = 5
+DFNT_FLOAT64 = 6
+DFNT_INT8 = 20
+DFNT_UINT8 = 21
+DFNT_INT16 = 22
+DFNT_UINT16 = 23
+DFNT_INT32 = 24
+DFNT_UINT32 = 25
+MAX_VAR_DIMS = 32
+H4_MAX_NC_NAME = 256
+DFNT_LITEND = 0x4000
+COMP_CODE_NONE = 0
+GCTP_GEO = 0
+HDFE_NOTILE = 0
+HDFE_TILE = 1
@@ -0,0 +1,644 @@
+"""Grid definitions with cached geolocation.
+
+Describing a grid takes gridinfo, projinfo, pixreginfo and origininfo, and
+geolocating it takes ij2ll over every pixel.  A GridDefinition gathers the
+former in one go and computes the latter at most once per distinct grid,
+sharing the lon/lat arrays in memory between all granules that use the same
+grid.  If a cache directory is given, or HOTDOG_CACHE_DIR is set, they are
+shared on disk as well.
+"""
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from .core import DFACC_READ, HDFE_CENTER, HDFE_GD_UL, GCTP_GEO
+from .lib import gd as GD
+
+# Default on-disk cache, none unless configured.
+CACHE_DIR = os.environ.get('HOTDOG_CACHE_DIR')
+
+# GeoTIFF keys and codes, see the GeoTIFF specification.
+_GTModelTypeGeoKey = 1024
+_GTRasterTypeGeoKey = 1025
+_GTCitationGeoKey = 1026
+_GeographicTypeGeoKey = 2048
+_GeogGeodeticDatumGeoKey = 2050
+_GeogAngularUnitsGeoKey = 2054
+_GeogEllipsoidGeoKey = 2056
+_GeogSemiMajorAxisGeoKey = 2057
+_GeogSemiMinorAxisGeoKey = 2058
+_ProjectedCSTypeGeoKey = 3072
+_ModelTypeProjected = 1
+_ModelTypeGeographic = 2
+_RasterPixelIsArea = 1
+_Angular_Degree = 9102
+_UserDefined = 32767
+
+# GCTP spheroid codes with an EPSG geographic coordinate system.
+_gctp_sphere_epsg = {0: 4008,    # Clarke 1866
+                     8: 4019,    # GRS 1980
+                     12: 4326}   # WGS 84
+_GCTP_UTM = 1
+_GCTP_WGS84 = 12
+
+# Geolocation arrays shared by all grid definitions with the same key.
+_geolocation = {}
+
+# Resampling indexes keyed by source key, target key and method.
+_resample_indexes = {}
+
+
+def _cache_tempfile(cache_dir, suffix):
+    """Create a temporary file in cache_dir to be renamed into place, or
+    return None if the cache cannot be written."""
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        fd, tmp = tempfile.mkstemp(suffix=suffix, dir=cache_dir)
+    except OSError:
+        return None
+    os.close(fd)
+    return tmp
+
+
+class GridDefinition(object):
+    """Geometry of an HDF-EOS grid.
+
+    Parameters
+    ----------
+    shape : tuple
+        Number of rows, columns in grid.
+    upleft, lowright : array_like
+        Upper left, lower right corner of the grid in meters (all projections
+        except Geographic) or packed DMS degrees (Geographic).
+    projcode, zonecode, spherecode : int
+        GCTP projection, zone and spheroid codes.
+    projparm : array_like
+        GCTP projection parameters.
+    pixcen : int, optional
+        Pixel registration code.
+    pixcnr : int, optional
+        Pixel origin code.
+    name : str, optional
+        Grid name.
+    """
+    def __init__(self, shape, upleft, lowright, projcode, zonecode,
+                 spherecode, projparm, pixcen=HDFE_CENTER, pixcnr=HDFE_GD_UL,
+                 name=None):
+        self.shape = tuple(int(x) for x in shape)
+        self.upleft = np.array(upleft, dtype=np.float64)
+        self.lowright = np.array(lowright, dtype=np.float64)
+        self.projcode = int(projcode)
+        self.zonecode = int(zonecode)
+        self.spherecode = int(spherecode)
+        self.projparm = np.zeros(13, dtype=np.float64)
+        self.projparm[:len(projparm)] = projparm
+        self.pixcen = int(pixcen)
+        self.pixcnr = int(pixcnr)
+        self.name = name
+
+    @classmethod
+    def from_gridid(cls, gridid, name=None):
+        """Gather the definition of an attached grid.
+
+        Parameters
+        ----------
+        gridid : int
+            Grid identifier.
+        name : str, optional
+            Grid name.
+
+        Raises
+        ------
+        IOError
+            If associated library routine fails.
+        """
+        shape, upleft, lowright = GD.gridinfo(gridid)
+        projcode, zonecode, spherecode, projparm = GD.projinfo(gridid)
+        return cls(shape, upleft, lowright, projcode, zonecode, spherecode,
+                   projparm, pixcen=GD.pixreginfo(gridid),
+                   pixcnr=GD.origininfo(gridid), name=name)
+
+    @classmethod
+    def from_file(cls, filename, gridname):
+        """Read the definition of a grid in an HDF-EOS file.
+
+        Parameters
+        ----------
+        filename : str
+            HDF-EOS file.
+        gridname : str
+            Name of grid.
+
+        Raises
+        ------
+        IOError
+            If associated library routine fails.
+        """
+        with GD.open(filename, DFACC_READ) as gdfid:
+            with GD.attach(gdfid, gridname) as gridid:
+                return cls.from_gridid(gridid, name=gridname)
+
+    def __repr__(self):
+        return ("GridDefinition(name={0!r}, shape={1}, projcode={2}, "
+                "key={3!r})".format(self.name, self.shape, self.projcode,
+                                    self.key))
+
+    def __eq__(self, other):
+        return isinstance(other, GridDefinition) and self.key == other.key
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.key)
+
+    @property
+    def key(self):
+        """Digest of everything that determines the grid's geolocation."""
+        h = hashlib.sha1()
+        h.update(np.array(self.shape + (self.projcode, self.zonecode,
+                                        self.spherecode, self.pixcen,
+                                        self.pixcnr), dtype=np.int64).tobytes())
+        h.update(self.upleft.tobytes())
+        h.update(self.lowright.tobytes())
+        h.update(self.projparm.tobytes())
+        return h.hexdigest()
+
+    def ij2ll(self, row, col):
+        """Convert row, column pixel coordinates to longitude, latitude.
+
+        Parameters
+        ----------
+        row, col : array_like
+            Zero-based row and column numbers of the pixels.
+
+        Returns
+        -------
+        longitude, latitude : ndarray
+            Longitude and latitude in decimal degrees.
+        """
+        row, col = np.broadcast_arrays(np.asarray(row, dtype=np.int32),
+                                       np.asarray(col, dtype=np.int32))
+        row = np.ascontiguousarray(row)
+        col = np.ascontiguousarray(col)
+        nrow, ncol = self.shape
+        return GD.ij2ll(self.projcode, self.zonecode, self.projparm,
+                        self.spherecode, ncol, nrow, self.upleft,
+                        self.lowright, row, col, self.pixcen, self.pixcnr)
+
+    def ll2ij(self, longitude, latitude):
+        """Convert longitude, latitude to fractional array indices.
+
+        Unlike gd.ll2ij, the result accounts for pixel registration and
+        origin, so that integer values fall exactly on the locations returned
+        by ij2ll.
+
+        Parameters
+        ----------
+        longitude, latitude : array_like
+            Longitude and latitude in decimal degrees.
+
+        Returns
+        -------
+        row, col : ndarray
+            Fractional row and column indices into the grid's data arrays.
+        """
+        nrow, ncol = self.shape
+        _, _, xval, yval = GD.ll2ij(self.projcode, self.zonecode,
+                                    self.projparm, self.spherecode, ncol, nrow,
+                                    self.upleft, self.lowright, longitude,
+                                    latitude)
+        xadj, yadj = GD.pixel_adjustment(self.pixcen, self.pixcnr)
+        return yval - yadj, xval - xadj
+
+    def window(self, lon_min, lon_max, lat_min, lat_max, nsamples=65):
+        """Smallest row/column window holding every pixel inside a box.
+
+        Geographic grids are affine, so the box corners map exactly.  For
+        other projections the box boundary is sampled and inverse mapped,
+        which is exact for the sampled points only.
+
+        Parameters
+        ----------
+        lon_min, lon_max, lat_min, lat_max : float
+            Bounding box in decimal degrees.
+        nsamples : int, optional
+            Points per box edge used for non-Geographic projections.
+
+        Returns
+        -------
+        rows, cols : slice
+            Window into the grid's data arrays, empty if the box misses the
+            grid.
+        """
+        if lon_min > lon_max or lat_min > lat_max:
+            raise ValueError("Bounding box must have lon_min <= lon_max and "
+                             "lat_min <= lat_max.")
+        if self.projcode == GCTP_GEO:
+            lon = np.array([lon_min, lon_max, lon_min, lon_max])
+            lat = np.array([lat_min, lat_min, lat_max, lat_max])
+        else:
+            t = np.linspace(0.0, 1.0, nsamples)
+            x = lon_min + t * (lon_max - lon_min)
+            y = lat_min + t * (lat_max - lat_min)
+            lon = np.concatenate([x, x, np.full_like(y, lon_min),
+                                  np.full_like(y, lon_max)])
+            lat = np.concatenate([np.full_like(x, lat_min),
+                                  np.full_like(x, lat_max), y, y])
+        row, col = self.ll2ij(lon, lat)
+        ok = np.isfinite(row) & np.isfinite(col)
+        nrow, ncol = self.shape
+        if not ok.any():
+            return slice(0, 0), slice(0, 0)
+
+        r0 = min(max(int(np.ceil(row[ok].min())), 0), nrow)
+        r1 = min(int(np.floor(row[ok].max())) + 1, nrow)
+        c0 = min(max(int(np.ceil(col[ok].min())), 0), ncol)
+        c1 = min(int(np.floor(col[ok].max())) + 1, ncol)
+        return slice(r0, max(r0, r1)), slice(c0, max(c0, c1))
+
+    def geotiff_tags(self, nodata=None):
+        """GeoTIFF tags georeferencing the grid.
+
+        Geographic grids are supported on any GCTP spheroid, projected grids
+        only in UTM on WGS 84.
+
+        Parameters
+        ----------
+        nodata : scalar, optional
+            If given, also emit a GDAL_NODATA tag.
+
+        Returns
+        -------
+        tags : list
+            (tagname, value) pairs suitable for tiff.setfield.
+
+        Raises
+        ------
+        NotImplementedError
+            If the projection or spheroid cannot be expressed.
+        """
+        nrow, ncol = self.shape
+        # Each key maps to (TIFFTagLocation, Count, Value_Offset).
+        keys = {_GTRasterTypeGeoKey: (0, 1, _RasterPixelIsArea)}
+        doubles = []
+        ascii = ''
+        if self.projcode == GCTP_GEO:
+            ulx, uly = GD.dms2deg(self.upleft)
+            lrx, lry = GD.dms2deg(self.lowright)
+            keys[_GTModelTypeGeoKey] = (0, 1, _ModelTypeGeographic)
+            keys[_GeogAngularUnitsGeoKey] = (0, 1, _Angular_Degree)
+            if self.spherecode in _gctp_sphere_epsg:
+                epsg = _gctp_sphere_epsg[self.spherecode]
+                keys[_GeographicTypeGeoKey] = (0, 1, epsg)
+            elif self.projparm[0] > 0:
+                semimajor = self.projparm[0]
+                semiminor = self.projparm[1] or semimajor
+                if semiminor < 1:
+                    # GCTP allows the eccentricity squared instead.
+                    semiminor = semimajor * np.sqrt(1 - semiminor)
+                for key in (_GeographicTypeGeoKey, _GeogGeodeticDatumGeoKey,
+                            _GeogEllipsoidGeoKey):
+                    keys[key] = (0, 1, _UserDefined)
+                keys[_GeogSemiMajorAxisGeoKey] = (34736, 1, 0)
+                keys[_GeogSemiMinorAxisGeoKey] = (34736, 1, 1)
+                doubles = [semimajor, semiminor]
+            else:
+                msg = "Unsupported GCTP spheroid {0}.".format(self.spherecode)
+                raise NotImplementedError(msg)
+        elif self.projcode == _GCTP_UTM and self.spherecode == _GCTP_WGS84:
+            (ulx, uly), (lrx, lry) = self.upleft, self.lowright
+            epsg = (32600 if self.zonecode > 0 else 32700) + abs(self.zonecode)
+            keys[_GTModelTypeGeoKey] = (0, 1, _ModelTypeProjected)
+            keys[_ProjectedCSTypeGeoKey] = (0, 1, epsg)
+        else:
+            msg = "Unsupported GCTP projection {0}.".format(self.projcode)
+            raise NotImplementedError(msg)
+
+        if self.name is not None:
+            ascii = self.name + '|'
+            keys[_GTCitationGeoKey] = (34737, len(ascii), 0)
+
+        directory = [1, 1, 0, len(keys)]
+        for key in sorted(keys):
+            directory.append(key)
+            directory.extend(keys[key])
+
+        # Rows and columns run from the upper left corner whatever the
+        # origin code.  Raster (0, 0) is the corner of the first pixel, half
+        # a pixel before its location, which GDij2ll adjusts from upleft.
+        xscale = (lrx - ulx) / ncol
+        yscale = (lry - uly) / nrow
+        xadj, yadj = GD.pixel_adjustment(self.pixcen, self.pixcnr)
+        x0 = ulx + (xadj - 0.5) * xscale
+        y0 = uly + (yadj - 0.5) * yscale
+        tags = [('ModelPixelScale', [xscale, -yscale, 0.0]),
+                ('ModelTiepoint', [0.0, 0.0, 0.0, x0, y0, 0.0])]
+        tags.append(('GeoKeyDirectory', directory))
+        if doubles:
+            tags.append(('GeoDoubleParams', doubles))
+        if ascii:
+            tags.append(('GeoAsciiParams', ascii))
+        if nodata is not None:
+            tags.append(('GDAL_NODATA', repr(float(nodata))))
+        return tags
+
+    def _fill_lonlat(self, out, blocksize=1024):
+        """Geolocate the grid into out[0] (longitude) and out[1] (latitude)
+        a block of rows at a time."""
+        nrow, ncol = self.shape
+        col = np.arange(ncol, dtype=np.int32)
+        for r0 in range(0, nrow, blocksize):
+            r1 = min(r0 + blocksize, nrow)
+            rows = np.arange(r0, r1, dtype=np.int32)[:, np.newaxis]
+            lon, lat = self.ij2ll(rows, col)
+            out[0, r0:r1] = lon
+            out[1, r0:r1] = lat
+
+    def lonlat(self, cache_dir=CACHE_DIR):
+        """Longitude and latitude of every pixel in the grid.
+
+        The arrays are computed once per distinct grid and shared between all
+        definitions with the same key.  Unless cache_dir is None they are also
+        stored there as <key>.npy and memory-mapped read-only, so other
+        processes can share them as well.  If the cache cannot be written
+        they are only kept in memory.
+
+        Parameters
+        ----------
+        cache_dir : str or None, optional
+            Directory holding the geolocation cache, HOTDOG_CACHE_DIR by
+            default.
+
+        Returns
+        -------
+        longitude, latitude : ndarray
+            Arrays of shape self.shape, in decimal degrees.
+        """
+        key = self.key
+        if key in _geolocation:
+            return _geolocation[key]
+
+        shape = (2,) + self.shape
+        lonlat = None
+        if cache_dir is not None:
+            path = os.path.join(cache_dir, key + '.npy')
+            if not os.path.exists(path):
+                tmp = _cache_tempfile(cache_dir, '.npy')
+                if tmp is not None:
+                    try:
+                        out = np.lib.format.open_memmap(tmp, mode='w+',
+                                                        dtype=np.float64,
+                                                        shape=shape)
+                        self._fill_lonlat(out)
+                        out.flush()
+                        del out
+                        os.rename(tmp, path)
+                    except BaseException:
+                        os.remove(tmp)
+                        raise
+            if os.path.exists(path):
+                lonlat = np.load(path, mmap_mode='r')
+        if lonlat is None:
+            lonlat = np.empty(shape, dtype=np.float64)
+            self._fill_lonlat(lonlat)
+
+        _geolocation[key] = lonlat[0], lonlat[1]
+        return _geolocation[key]
+
+
+class ResampleIndex(object):
+    """Precomputed gather from a source grid onto target points.
+
+    Each target point takes a weighted sum of up to four source pixels.
+    Applying the index to a field is therefore a single fancy-indexing
+    gather followed, for bilinear weights, by one reduction.
+
+    Parameters
+    ----------
+    source_shape : tuple
+        Shape of the source grid.
+    target_shape : tuple
+        Shape of the output.
+    indices : ndarray
+        Flat source indices of shape (npoints, k).
+    weights : ndarray or None
+        Weights of shape (npoints, k), None for nearest neighbour (k == 1).
+    valid : ndarray
+        Boolean mask of target points that fall inside the source grid.
+    """
+    def __init__(self, source_shape, target_shape, indices, weights, valid):
+        self.source_shape = tuple(source_shape)
+        self.target_shape = tuple(target_shape)
+        self.indices = indices
+        self.weights = weights
+        self.valid = valid
+
+    def apply(self, field, fill_value=np.nan):
+        """Resample a field defined on the source grid.
+
+        Parameters
+        ----------
+        field : ndarray
+            Array of shape source_shape.
+        fill_value : scalar, optional
+            Value assigned to target points outside the source grid.
+
+        Returns
+        -------
+        resampled : ndarray
+            Array of shape target_shape.
+        """
+        if field.shape != self.source_shape:
+            msg = "Field has shape {0}, expected {1}."
+            raise ValueError(msg.format(field.shape, self.source_shape))
+        values = field.reshape(-1)[self.indices]
+        if self.weights is None:
+            out = values[:, 0]
+        else:
+            out = np.einsum('ij,ij->i', values, self.weights)
+        if not self.valid.all():
+            if out.dtype.kind in 'iu' and np.isnan(fill_value):
+                out = out.astype(np.float64)
+            out[~self.valid] = fill_value
+        return out.reshape(self.target_shape)
+
+    def save(self, path):
+        """Store the index as an .npz file."""
+        weights = np.zeros((0, 0)) if self.weights is None else self.weights
+        np.savez(path, source_shape=self.source_shape,
+                 target_shape=self.target_shape, indices=self.indices,
+                 weights=weights, valid=self.valid)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index stored by save."""
+        with np.load(path) as f:
+            weights = f['weights'] if f['weights'].size > 0 else None
+            return cls(tuple(f['source_shape']), tuple(f['target_shape']),
+                       f['indices'], weights, f['valid'])
+
+
+def _build_resample_index(source, longitude, latitude, method):
+    nrow, ncol = source.shape
+    row, col = source.ll2ij(longitude, latitude)
+    row = row.reshape(-1)
+    col = col.reshape(-1)
+    valid = ((row > -0.5) & (row < nrow - 0.5) &
+             (col > -0.5) & (col < ncol - 0.5))
+
+    if method == 'nearest':
+        r = np.clip(np.rint(row), 0, nrow - 1).astype(np.intp)
+        c = np.clip(np.rint(col), 0, ncol - 1).astype(np.intp)
+        indices = (r * ncol + c)[:, np.newaxis]
+        return indices, None, valid
+
+    if method == 'bilinear':
+        r0 = np.clip(np.floor(row), 0, nrow - 1)
+        c0 = np.clip(np.floor(col), 0, ncol - 1)
+        wr = np.clip(row - r0, 0, 1)
+        wc = np.clip(col - c0, 0, 1)
+        r0 = r0.astype(np.intp)
+        c0 = c0.astype(np.intp)
+        r1 = np.minimum(r0 + 1, nrow - 1)
+        c1 = np.minimum(c0 + 1, ncol - 1)
+        indices = np.stack([r0 * ncol + c0, r0 * ncol + c1,
+                            r1 * ncol + c0, r1 * ncol + c1], axis=1)
+        weights = np.stack([(1 - wr) * (1 - wc), (1 - wr) * wc,
+                            wr * (1 - wc), wr * wc], axis=1)
+        return indices, weights, valid
+
+    raise ValueError("Unknown resampling method {0!r}.".format(method))
+
+
+def resample_index(source, target, method='nearest', cache_dir=CACHE_DIR):
+    """Build, or fetch from cache, the index resampling source onto target.
+
+    Parameters
+    ----------
+    source : GridDefinition
+        Grid the fields are defined on.
+    target : GridDefinition or tuple
+        Either another grid, or (longitude, latitude) arrays of arbitrary but
+        matching shape, e.g. station locations.
+    method : str, optional
+        'nearest' or 'bilinear'.
+    cache_dir : str or None, optional
+        Directory holding grid-to-grid indexes as .npz files,
+        HOTDOG_CACHE_DIR by default.  Indexes onto arbitrary points, and
+        indexes that cannot be written, are only cached in memory.
+
+    Returns
+    -------
+    index : ResampleIndex
+
+    Examples
+    --------
+    >>> index = resample_index(toms, mygrid, method='bilinear')
+    >>> ozone_on_mygrid = index.apply(ozone)
+    """
+    if isinstance(target, GridDefinition):
+        key = (source.key, target.key, method)
+    else:
+        longitude, latitude = np.broadcast_arrays(*target)
+        h = hashlib.sha1()
+        h.update(np.ascontiguousarray(longitude, dtype=np.float64).tobytes())
+        h.update(np.ascontiguousarray(latitude, dtype=np.float64).tobytes())
+        key = (source.key, h.hexdigest(), method)
+        cache_dir = None
+    if key in _resample_indexes:
+        return _resample_indexes[key]
+
+    path = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, '-'.join(key) + '.npz')
+        if os.path.exists(path):
+            index = ResampleIndex.load(path)
+            _resample_indexes[key] = index
+            return index
+
+    if isinstance(target, GridDefinition):
+        longitude, latitude = target.lonlat(cache_dir=cache_dir)
+    indices, weights, valid = _build_resample_index(source, longitude,
+                                                    latitude, method)
+    index = ResampleIndex(source.shape, np.shape(longitude), indices, weights,
+                          valid)
+
+    tmp = None if path is None else _cache_tempfile(cache_dir, '.npz')
+    if tmp is not None:
+        try:
+            index.save(tmp)
+            os.rename(tmp, path)
+        except OSError:
+            # Out of space, say; the index is still good in memory.
+            os.remove(tmp)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    _resample_indexes[key] = index
+    return index
+
+
+def subset(filename, gridname, fieldname, lon_min, lon_max, lat_min, lat_max):
+    """Read the part of a grid field that falls inside a bounding box.
+
+    Only the minimal row/column window is read, with a single hyperslab
+    request, rather than the whole field.
+
+    Parameters
+    ----------
+    filename : str
+        HDF-EOS file.
+    gridname : str
+        Name of grid.
+    fieldname : str
+        Name of field.
+    lon_min, lon_max, lat_min, lat_max : float
+        Bounding box in decimal degrees.  Boxes crossing the antimeridian are
+        not supported.
+
+    Returns
+    -------
+    data : ndarray
+        Field values in the window.
+    longitude, latitude : ndarray
+        Coordinates of the window's pixels: 1-D vectors along the columns and
+        rows for Geographic grids, 2-D arrays matching data otherwise.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+
+    Examples
+    --------
+    >>> ozone, lon, lat = subset(filename, 'TOMS Level 3', 'Ozone',
+    ...                          -125.0, -66.0, 24.0, 50.0)
+    """
+    with GD.open(filename, DFACC_READ) as gdfid:
+        with GD.attach(gdfid, gridname) as gridid:
+            gdef = GridDefinition.from_gridid(gridid, name=gridname)
+            rows, cols = gdef.window(lon_min, lon_max, lat_min, lat_max)
+            rank, dims, numbertype, _ = GD.fieldinfo(gridid, fieldname)
+            # Any leading dimensions (e.g. bands) are read in full; the grid
+            # dimensions are the last two.
+            start = [0] * (rank - 2) + [rows.start, cols.start]
+            edge = (list(dims[:-2]) + [rows.stop - rows.start,
+                                        cols.stop - cols.start])
+            if 0 in edge:
+                data = np.zeros(edge, dtype=GD.numpy_dtype(numbertype))
+            else:
+                data = GD.readfield(gridid, fieldname, start=start, edge=edge)
+
+    r = np.arange(rows.start, rows.stop)
+    c = np.arange(cols.start, cols.stop)
+    if gdef.projcode == GCTP_GEO:
+        longitude, _ = gdef.ij2ll(np.zeros_like(c), c)
+        _, latitude = gdef.ij2ll(r, np.zeros_like(r))
+    else:
+        longitude, latitude = gdef.ij2ll(r[:, np.newaxis], c[np.newaxis, :])
+    return data, longitude, latitude
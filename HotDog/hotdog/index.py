@@ -0,0 +1,327 @@
+"""Archive-wide SQLite metadata index of HDF and HDF-EOS granules.
+
+Crawling tens of thousands of granules with GDinqgrid, GDinqfields and
+SDfileinfo is slow, so the results are stored once in a SQLite database and
+refreshed incrementally, only rescanning files whose modification time or
+size has changed.
+"""
+import fnmatch
+import json
+import multiprocessing
+import os
+import sqlite3
+
+import numpy as np
+
+from .core import DFACC_READ
+from .lib import gd as GD
+from .lib import sd as SD
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (
+        id INTEGER PRIMARY KEY,
+        path TEXT UNIQUE NOT NULL,
+        mtime REAL NOT NULL,
+        size INTEGER NOT NULL,
+        error TEXT
+    );
+    CREATE TABLE IF NOT EXISTS grids (
+        id INTEGER PRIMARY KEY,
+        file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+        name TEXT NOT NULL,
+        nrow INTEGER,
+        ncol INTEGER,
+        upleft_x REAL,
+        upleft_y REAL,
+        lowright_x REAL,
+        lowright_y REAL,
+        projcode INTEGER,
+        zonecode INTEGER,
+        spherecode INTEGER,
+        projparm TEXT,
+        lon_min REAL,
+        lon_max REAL,
+        lat_min REAL,
+        lat_max REAL
+    );
+    CREATE TABLE IF NOT EXISTS fields (
+        grid_id INTEGER NOT NULL REFERENCES grids(id) ON DELETE CASCADE,
+        name TEXT NOT NULL,
+        rank INTEGER,
+        numbertype INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS datasets (
+        file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+        name TEXT NOT NULL,
+        shape TEXT,
+        datatype INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS grids_file ON grids(file_id);
+    CREATE INDEX IF NOT EXISTS grids_bbox ON grids(lon_min, lon_max,
+                                                   lat_min, lat_max);
+    CREATE INDEX IF NOT EXISTS fields_name ON fields(name);
+    CREATE INDEX IF NOT EXISTS fields_grid ON fields(grid_id);
+    CREATE INDEX IF NOT EXISTS datasets_name ON datasets(name);
+    CREATE INDEX IF NOT EXISTS datasets_file ON datasets(file_id);
+"""
+
+
+def _grid_bounds(gridid, nsamples=65):
+    """Longitude/latitude bounding box of the pixel centers along the grid
+    boundary, or None if GCTP cannot map the grid."""
+    projcode, zonecode, spherecode, projparm = GD.projinfo(gridid)
+    (nrow, ncol), upleft, lowright = GD.gridinfo(gridid)
+    pixcen = GD.pixreginfo(gridid)
+    pixcnr = GD.origininfo(gridid)
+
+    rows = np.unique(np.linspace(0, nrow - 1, min(nrow, nsamples)))
+    cols = np.unique(np.linspace(0, ncol - 1, min(ncol, nsamples)))
+    row = np.concatenate([np.zeros_like(cols), np.full_like(cols, nrow - 1),
+                          rows, rows]).astype(np.int32)
+    col = np.concatenate([cols, cols, np.zeros_like(rows),
+                          np.full_like(rows, ncol - 1)]).astype(np.int32)
+    lon, lat = GD.ij2ll(projcode, zonecode, projparm, spherecode, ncol, nrow,
+                        upleft, lowright, row, col, pixcen, pixcnr)
+    ok = np.isfinite(lon) & np.isfinite(lat) & (np.abs(lat) <= 90)
+    if not ok.any():
+        return None
+    return lon[ok].min(), lon[ok].max(), lat[ok].min(), lat[ok].max()
+
+
+def scan(path):
+    """Collect the grid, field and dataset metadata of a single file.
+
+    This is the unit of work of the parallel crawl and only returns plain,
+    picklable python objects.
+
+    Parameters
+    ----------
+    path : str
+        HDF or HDF-EOS file.
+
+    Returns
+    -------
+    metadata : dict
+        Keys 'path', 'mtime', 'size', 'grids', 'datasets' and 'error'.  If
+        the file cannot be stat'ed or read, 'error' describes why and 'grids'
+        and 'datasets' are empty, otherwise it is None.
+    """
+    # A file that vanishes before it is scanned is recorded as failed too.
+    metadata = {'path': path, 'mtime': 0.0, 'size': -1,
+                'grids': [], 'datasets': [], 'error': None}
+    try:
+        st = os.stat(path)
+        metadata.update(mtime=st.st_mtime, size=st.st_size)
+        try:
+            gridlist = [g for g in GD.inqgrid(path) if g]
+        except IOError:
+            gridlist = []
+
+        with GD.open(path, DFACC_READ) as gdfid:
+            for gridname in gridlist:
+                with GD.attach(gdfid, gridname) as gridid:
+                    (nrow, ncol), upleft, lowright = GD.gridinfo(gridid)
+                    projcode, zonecode, spherecode, projparm = GD.projinfo(gridid)
+                    fields, ranks, numbertypes = GD.inqfields(gridid)
+                    metadata['grids'].append({
+                        'name': gridname,
+                        'nrow': nrow,
+                        'ncol': ncol,
+                        'upleft': [float(x) for x in upleft],
+                        'lowright': [float(x) for x in lowright],
+                        'projcode': projcode,
+                        'zonecode': zonecode,
+                        'spherecode': spherecode,
+                        'projparm': [float(x) for x in projparm],
+                        'bounds': _grid_bounds(gridid),
+                        'fields': [f for f in zip(fields, ranks, numbertypes)
+                                   if f[0]]})
+
+        for name, info in SD.catalog(path)['datasets'].items():
+            metadata['datasets'].append((name, list(info['shape']),
+                                         info['datatype']))
+    except Exception as e:
+        # Recorded so that the file is not rescanned until it changes, and
+        # so that one bad file does not abort the whole update.
+        metadata.update(grids=[], datasets=[],
+                        error=str(e) or e.__class__.__name__)
+
+    return metadata
+
+
+class Index(object):
+    """SQLite index of the grids, fields and datasets in an archive.
+
+    Parameters
+    ----------
+    dbfile : str
+        SQLite database, created if it does not exist.
+
+    Examples
+    --------
+    >>> idx = Index('toms.sqlite')
+    >>> idx.update('/data/toms')
+    >>> idx.query(field='Ozone', bbox=(-125, -66, 24, 50))
+    """
+    def __init__(self, dbfile):
+        self.conn = sqlite3.connect(dbfile)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(_SCHEMA)
+        columns = [row[1] for row in
+                   self.conn.execute("PRAGMA table_info(files)")]
+        if 'error' not in columns:
+            # Databases created before unreadable files were recorded.
+            self.conn.execute("ALTER TABLE files ADD COLUMN error TEXT")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _stale(self, root, patterns):
+        """Files under root that are new or changed since they were indexed,
+        and indexed files under root that no longer exist."""
+        known = {}
+        prefix = os.path.join(os.path.abspath(root), '')
+        query = ("SELECT path, mtime, size FROM files "
+                 "WHERE substr(path, 1, length(?)) = ?")
+        for path, mtime, size in self.conn.execute(query, (prefix, prefix)):
+            known[path] = (mtime, size)
+
+        stale = []
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                if not any(fnmatch.fnmatch(filename, p) for p in patterns):
+                    continue
+                path = os.path.abspath(os.path.join(dirpath, filename))
+                st = os.stat(path)
+                if known.pop(path, None) != (st.st_mtime, st.st_size):
+                    stale.append(path)
+        return stale, list(known)
+
+    def _store(self, metadata):
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM files WHERE path = ?",
+                       (metadata['path'],))
+        cursor.execute("INSERT INTO files (path, mtime, size, error) "
+                       "VALUES (?, ?, ?, ?)",
+                       (metadata['path'], metadata['mtime'], metadata['size'],
+                        metadata['error']))
+        file_id = cursor.lastrowid
+        for grid in metadata['grids']:
+            bounds = grid['bounds'] or (None, None, None, None)
+            cursor.execute("INSERT INTO grids (file_id, name, nrow, ncol, "
+                           "upleft_x, upleft_y, lowright_x, lowright_y, "
+                           "projcode, zonecode, spherecode, projparm, "
+                           "lon_min, lon_max, lat_min, lat_max) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, "
+                           "?, ?, ?, ?)",
+                           (file_id, grid['name'], grid['nrow'], grid['ncol'],
+                            grid['upleft'][0], grid['upleft'][1],
+                            grid['lowright'][0], grid['lowright'][1],
+                            grid['projcode'], grid['zonecode'],
+                            grid['spherecode'], json.dumps(grid['projparm']))
+                           + tuple(bounds))
+            grid_id = cursor.lastrowid
+            cursor.executemany("INSERT INTO fields (grid_id, name, rank, "
+                               "numbertype) VALUES (?, ?, ?, ?)",
+                               [(grid_id,) + tuple(f) for f in grid['fields']])
+        cursor.executemany("INSERT INTO datasets (file_id, name, shape, "
+                           "datatype) VALUES (?, ?, ?, ?)",
+                           [(file_id, name, json.dumps(shape), datatype)
+                            for name, shape, datatype in metadata['datasets']])
+
+    def update(self, root, patterns=('*.hdf', '*.HDF'), processes=None):
+        """Bring the index up to date with a directory tree.
+
+        Only files whose modification time or size differ from the index are
+        scanned, in parallel worker processes since the HDF library is not
+        thread-safe.  Indexed files under root that have been removed are
+        dropped.  Files that cannot be read are recorded as failed, see
+        failures, and are only retried once they change.
+
+        Parameters
+        ----------
+        root : str
+            Top of the directory tree.
+        patterns : sequence of str, optional
+            Shell-style patterns selecting the files to index.
+        processes : int, optional
+            Number of worker processes, defaults to the number of CPUs.
+
+        Returns
+        -------
+        nscanned : int
+            Number of files (re)scanned.
+        """
+        stale, removed = self._stale(root, patterns)
+        with self.conn:
+            self.conn.executemany("DELETE FROM files WHERE path = ?",
+                                  [(path,) for path in removed])
+
+        if len(stale) == 0:
+            return 0
+
+        pool = multiprocessing.Pool(processes)
+        try:
+            with self.conn:
+                for metadata in pool.imap_unordered(scan, stale, chunksize=16):
+                    self._store(metadata)
+        finally:
+            pool.close()
+            pool.join()
+        return len(stale)
+
+    def failures(self):
+        """List (path, error) of the indexed files that could not be read."""
+        sql = ("SELECT path, error FROM files WHERE error IS NOT NULL "
+               "ORDER BY path")
+        return list(self.conn.execute(sql))
+
+    def query(self, field=None, bbox=None, grid=None):
+        """Find the files containing a field, optionally covering a region.
+
+        Parameters
+        ----------
+        field : str, optional
+            Grid field or SD dataset name.
+        bbox : tuple, optional
+            (lon_min, lon_max, lat_min, lat_max) in decimal degrees; only grids
+            whose extent intersects it are returned.
+        grid : str, optional
+            Grid name.
+
+        Returns
+        -------
+        paths : list
+            Sorted list of matching files.
+        """
+        clauses, params = ["f.error IS NULL"], []
+        if field is not None and bbox is None:
+            clauses.append("(g.id IN (SELECT grid_id FROM fields "
+                           "WHERE name = ?) OR f.id IN (SELECT file_id "
+                           "FROM datasets WHERE name = ?))")
+            params.extend([field, field])
+        elif field is not None:
+            # Only grid fields have a geographic extent.
+            clauses.append("g.id IN (SELECT grid_id FROM fields "
+                           "WHERE name = ?)")
+            params.append(field)
+        if grid is not None:
+            clauses.append("g.name = ?")
+            params.append(grid)
+        if bbox is not None:
+            lon_min, lon_max, lat_min, lat_max = bbox
+            clauses.append("g.lon_min <= ? AND g.lon_max >= ? AND "
+                           "g.lat_min <= ? AND g.lat_max >= ?")
+            params.extend([lon_max, lon_min, lat_max, lat_min])
+
+        sql = ("SELECT DISTINCT f.path FROM files f "
+               "LEFT JOIN grids g ON g.file_id = f.id")
+        sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY f.path"
+        return [row[0] for row in self.conn.execute(sql, params)]
@@ -0,0 +1,60 @@
+"""Lazy access to the ahead-of-time compiled cffi extension modules.
+
+The extensions (hotdog.lib._sd, hotdog.lib._gd, hotdog.lib._sw and
+hotdog.lib._tiff) are built by setup.py from the *_build.py scripts in this
+package.  They are imported on first use rather than at import time, so
+importing hotdog never touches the C libraries until a routine is actually
+called.
+"""
+import importlib
+
+
+class LazyExtension(object):
+    """Proxy for the ``ffi`` or ``lib`` object of a compiled cffi module.
+
+    Parameters
+    ----------
+    modname : str
+        Fully qualified name of the compiled extension module.
+    attr : str
+        Either 'ffi' or 'lib'.
+    """
+    def __init__(self, modname, attr):
+        self.__dict__['_modname'] = modname
+        self.__dict__['_attr'] = attr
+        self.__dict__['_target'] = None
+
+    def _load(self):
+        target = self.__dict__['_target']
+        if target is None:
+            try:
+                module = importlib.import_module(self._modname)
+            except ImportError as err:
+                msg = ("The compiled extension {0} is not available; "
+                       "build it with 'python setup.py build_ext'.  ({1})")
+                raise ImportError(msg.format(self._modname, err))
+            target = getattr(module, self._attr)
+            self.__dict__['_target'] = target
+        return target
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+
+def load(modname):
+    """Return lazy (ffi, lib) proxies for a compiled cffi extension module.
+
+    Parameters
+    ----------
+    modname : str
+        Fully qualified name of the compiled extension module.
+
+    Returns
+    -------
+    ffi, lib : LazyExtension
+        Proxies that import the module on first attribute access.
+    """
+    return LazyExtension(modname, 'ffi'), LazyExtension(modname, 'lib')
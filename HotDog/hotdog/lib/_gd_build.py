@@ -0,0 +1,57 @@
+"""cffi out-of-line build script for the HDF-EOS grid interface.
+
+Run by setup.py (see cffi_modules) to produce the hotdog.lib._gd extension.
+"""
+from cffi import FFI
+
+ffibuilder = FFI()
+ffibuilder.cdef("""
+        typedef int int32;
+        typedef int intn;
+        typedef double float64;
+
+        int32 GDattach(int32 gdfid, char *grid);
+        intn  GDdetach(int32 gid);
+        intn  GDclose(int32 fid);
+        int32 GDij2ll(int32 projcode, int32 zonecode,
+                      float64 projparm[], int32 spherecode, int32 xdimsize,
+                      int32 ydimsize, float64 upleft[], float64 lowright[],
+                      int32 npts, int32 row[], int32 col[], float64
+                      longititude[], float64 latitude[], int32 pixcen,
+                      int32 pixcnr);
+        intn  GDll2ij(int32 projcode, int32 zonecode, float64 projparm[],
+                      int32 spherecode, int32 xdimsize, int32 ydimsize,
+                      float64 upleft[], float64 lowright[], int32 npts,
+                      float64 longitude[], float64 latitude[], int32 row[],
+                      int32 col[], float64 xval[], float64 yval[]);
+        intn  GDfieldinfo(int32 gridid, char *fieldname, int32 *rank,
+                          int32 dims[], int32 *numbertype, char *dimlist);
+        intn  GDreadfield(int32 gridid, char *fieldname, int32 start[],
+                          int32 stride[], int32 edge[], void *buffer);
+        intn  GDreadtile(int32 gridid, char *fieldname, int32 tilecoords[],
+                         void *tileData);
+        intn  GDtileinfo(int32 gridid, char *fieldname, int32 *tilecode,
+                         int32 *tilerank, int32 tiledims[]);
+        int32 GDinqfields(int32 gridid, char *fieldlist, int32 rank[],
+                          int32 numbertype[]);
+        int32 GDinqgrid(char *filename, char *gridlist, int32 *strbufsize);
+        int32 GDnentries(int32 gridid, int32 entrycode, int32 *strbufsize);
+        intn  GDgridinfo(int32 gridid, int32 *xdimsize, int32 *ydimsize,
+                         float64 upleft[2], float64 lowright[2]);
+        int32 GDopen(char *name, intn access);
+        intn  GDorigininfo(int32 gridid, int32 *origincode);
+        intn  GDpixreginfo(int32 gridid, int32 *pixregcode);
+        intn  GDprojinfo(int32 gridid, int32 *projcode, int32 *zonecode,
+                         int32 *spherecode, float64 projparm[]);
+        """)
+ffibuilder.set_source("hotdog.lib._gd", """
+        #include "mfhdf.h"
+        #include "HE2_config.h"
+        #include "HdfEosDef.h"
+        """,
+        libraries=['hdfeos', 'Gctp', 'mfhdf', 'df', 'jpeg', 'z'],
+        include_dirs=['/opt/hdfeos2/include', '/usr/include/hdf', '/opt/local/include'],
+        library_dirs=['/opt/hdfeos2/lib', '/usr/lib/hdf', '/opt/local/lib'])
+
+if __name__ == "__main__":
+    ffibuilder.compile(verbose=True)
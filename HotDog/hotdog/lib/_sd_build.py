@@ -0,0 +1,48 @@
+"""cffi out-of-line build script for the HDF4 SD interface.
+
+Run by setup.py (see cffi_modules) to produce the hotdog.lib._sd extension.
+"""
+from cffi import FFI
+
+ffibuilder = FFI()
+ffibuilder.cdef("""
+        typedef int int32;
+        typedef int intn;
+        typedef unsigned int uintn;
+        typedef int... comp_coder_t;
+        typedef union { ...; } comp_info;
+
+        intn  SDend(int32 id);
+        intn  SDendaccess(int32 sds_id);
+        intn  SDgetinfo(int32 sds_id, char *sds_name, int32 *rank,
+                        int32 dimsizes[], int32 *datatype, int32 *nattrs);
+        intn  SDgetcompinfo(int32 sds_id, comp_coder_t *comp_type,
+                            comp_info *c_info);
+        intn  SDgetdatainfo(int32 sds_id, int32 *chk_coord,
+                            uintn start_block, uintn info_count,
+                            int32 *offsetarray, int32 *lengtharray);
+        intn  SDgetexternalinfo(int32 sds_id, uintn buf_size,
+                                char *ext_filename, int32 *offset,
+                                int32 *length);
+        int32 SDisrecord(int32 sds_id);
+        intn  SDfileinfo(int32 sd_id, int32 *n_datasets, int32 *n_file_attrs);
+        intn  SDattrinfo(int32 obj_id, int32 attr_index, 
+                         char *attr_name, int32 *data_type, int32 *count);
+        int32 SDfindattr(int32 obj_id, char *attr_name);
+        intn  SDgetrange(int32 sds_id, void *max, void *min);
+        int32 SDnametoindex(int32 sd_id, char *name);
+        intn  SDreadattr(int32 obj_id, int32 attr_index, void *buffer);
+        intn  SDreaddata(int32 sds_id, int32 *start, int32 *stride,
+                         int32 *edge, void *buffer);
+        int32 SDselect(int32 sd_id, int32 sds_index);
+        int32 SDstart(char *name, int32 accs);
+        """)
+ffibuilder.set_source("hotdog.lib._sd", """
+        #include "mfhdf.h"
+        """,
+        libraries=['mfhdf', 'df', 'jpeg', 'z'],
+        include_dirs=['/usr/include/hdf', '/opt/local/include'],
+        library_dirs=['/usr/lib/hdf', '/opt/local/lib'])
+
+if __name__ == "__main__":
+    ffibuilder.compile(verbose=True)
@@ -0,0 +1,42 @@
+"""cffi out-of-line build script for the HDF-EOS swath interface.
+
+Run by setup.py (see cffi_modules) to produce the hotdog.lib._sw extension.
+"""
+from cffi import FFI
+
+ffibuilder = FFI()
+ffibuilder.cdef("""
+        typedef int int32;
+        typedef int intn;
+
+        int32 SWopen(char *filename, intn access);
+        intn  SWclose(int32 fid);
+        int32 SWattach(int32 fid, char *swathname);
+        intn  SWdetach(int32 swathid);
+        int32 SWinqswath(char *filename, char *swathlist, int32 *strbufsize);
+        int32 SWnentries(int32 swathid, int32 entrycode, int32 *strbufsize);
+        int32 SWinqdatafields(int32 swathid, char *fieldlist, int32 rank[],
+                              int32 numbertype[]);
+        int32 SWinqgeofields(int32 swathid, char *fieldlist, int32 rank[],
+                             int32 numbertype[]);
+        int32 SWinqmaps(int32 swathid, char *dimmaps, int32 offset[],
+                        int32 increment[]);
+        intn  SWfieldinfo(int32 swathid, char *fieldname, int32 *rank,
+                          int32 dims[], int32 *numbertype, char *dimlist);
+        intn  SWreadfield(int32 swathid, char *fieldname, int32 start[],
+                          int32 stride[], int32 edge[], void *buffer);
+        int32 SWdiminfo(int32 swathid, char *dimname);
+        intn  SWmapinfo(int32 swathid, char *geodim, char *datadim,
+                        int32 *offset, int32 *increment);
+        """)
+ffibuilder.set_source("hotdog.lib._sw", """
+        #include "mfhdf.h"
+        #include "HE2_config.h"
+        #include "HdfEosDef.h"
+        """,
+        libraries=['hdfeos', 'Gctp', 'mfhdf', 'df', 'jpeg', 'z'],
+        include_dirs=['/opt/hdfeos2/include', '/usr/include/hdf', '/opt/local/include'],
+        library_dirs=['/opt/hdfeos2/lib', '/usr/lib/hdf', '/opt/local/lib'])
+
+if __name__ == "__main__":
+    ffibuilder.compile(verbose=True)
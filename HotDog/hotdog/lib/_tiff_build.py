@@ -0,0 +1,81 @@
+"""cffi out-of-line build script for libtiff.
+
+Run by setup.py (see cffi_modules) to produce the hotdog.lib._tiff extension.
+"""
+from cffi import FFI
+
+ffibuilder = FFI()
+ffibuilder.cdef("""
+    typedef ... uint32;
+    typedef int... tmsize_t;
+    typedef ... toff_t;          /* file offset */
+    typedef uint32_t ttag_t;     /* directory tag */
+    typedef int... tdir_t;       /* directory index */
+    typedef uint16_t tsample_t;  /* sample number */
+    typedef ... tstrile_t;       /* strip or tile number */
+    typedef uint32_t tstrip_t;   /* strip number */
+    typedef uint32_t ttile_t;    /* tile number */
+    typedef int... tsize_t;      /* i/o size in bytes */
+    typedef void * tdata_t;      /* image data ref */ 
+
+    typedef enum {
+        TIFF_NOTYPE, TIFF_BYTE, TIFF_ASCII, TIFF_SHORT, TIFF_LONG,
+        TIFF_RATIONAL, TIFF_SBYTE, TIFF_UNDEFINED, TIFF_SSHORT, TIFF_SLONG,
+        TIFF_SRATIONAL, TIFF_FLOAT, TIFF_DOUBLE, ...
+    } TIFFDataType;
+
+    typedef struct {
+        ttag_t field_tag;
+        short field_readcount;
+        short field_writecount;
+        TIFFDataType field_type;
+        unsigned short field_bit;
+        unsigned char field_oktochange;
+        unsigned char field_passcount;
+        char *field_name;
+    } TIFFFieldInfo;
+
+    typedef ... TIFF;
+    int TIFFMergeFieldInfo(TIFF *tif, const TIFFFieldInfo info[], uint32_t n);
+    void TIFFClose(TIFF *tif);
+    extern TIFF* TIFFOpen(const char*, const char*);
+    extern int TIFFSetField(TIFF*, uint32_t, ...);
+    extern int TIFFGetField(TIFF*, uint32_t, ...);
+    extern int TIFFGetFieldDefaulted(TIFF*, uint32_t, ...);
+    int TIFFWriteCheck(TIFF *tif, int tiles, const char *module);
+    int TIFFWriteDirectory(TIFF *tif);
+    int TIFFSetDirectory(TIFF *tif, tdir_t dirnum);
+    int TIFFDeferStrileArrayWriting(TIFF *tif);
+    int TIFFForceStrileArrayWriting(TIFF *tif);
+    int TIFFIsTiled(TIFF *tif);
+    int TIFFIsBigTIFF(TIFF *tif);
+    tsize_t TIFFTileSize(TIFF *tif);
+    tsize_t TIFFStripSize(TIFF *tif);
+    ttile_t TIFFNumberOfTiles(TIFF *tif);
+    tstrip_t TIFFNumberOfStrips(TIFF *tif);
+    tstrip_t TIFFComputeStrip(TIFF *tif, uint32_t row, tsample_t sample);
+    tsize_t TIFFReadEncodedTile(TIFF *tif, ttile_t tile, tdata_t buf,
+                                tsize_t size);
+    tsize_t TIFFReadEncodedStrip(TIFF *tif, tstrip_t strip, tdata_t buf,
+                                 tsize_t size);
+    tsize_t TIFFWriteEncodedTile(TIFF *tif, ttile_t tile, tdata_t buf,
+                                 tsize_t size);
+    tsize_t TIFFWriteEncodedStrip(TIFF *tif, tstrip_t strip, tdata_t buf,
+                                  tsize_t size);
+    ttile_t TIFFComputeTile(TIFF *tif, uint32_t x, uint32_t y, uint32_t z,
+                            tsample_t sample);
+    int TIFFIsByteSwapped(TIFF *tif);
+    tsize_t TIFFWriteRawTile(TIFF *tif, ttile_t tile, tdata_t data,
+                             tsize_t cc);
+    tsize_t TIFFWriteTile(TIFF *tif, tdata_t buf, uint32_t x, uint32_t y,
+                          uint32_t z, tsample_t sample);
+        """)
+ffibuilder.set_source("hotdog.lib._tiff", """
+                      #include "tiffio.h"
+                      """,
+                      libraries=['tiff', 'jpeg', 'z'],
+                      include_dirs=['/opt/local/include'],
+                      library_dirs=['/opt/local/lib'])
+
+if __name__ == "__main__":
+    ffibuilder.compile(verbose=True)
@@ -0,0 +1,81 @@
+"""Helpers shared by the library bindings."""
+import numpy as np
+
+
+def int32_pointer(ffi, values):
+    """Return an int32 array and a pointer to it, or (None, NULL)."""
+    if values is None:
+        return None, ffi.NULL
+    values = np.ascontiguousarray(values, dtype=np.int32)
+    return values, ffi.cast("int32 *", values.ctypes.data)
+
+
+def check_out(out, shape, dtype):
+    """Check that out can receive a read of the given shape and dtype.
+
+    Returns
+    -------
+    out : ndarray
+
+    Raises
+    ------
+    ValueError
+        If out has the wrong dtype or size, or is not C-contiguous and
+        writeable.
+    """
+    if out.dtype != dtype:
+        msg = "out has dtype {0}, expected {1}."
+        raise ValueError(msg.format(out.dtype, np.dtype(dtype)))
+    if out.size != np.prod(shape):
+        msg = "out has shape {0}, hyperslab is {1}."
+        raise ValueError(msg.format(out.shape, tuple(shape)))
+    if not (out.flags.c_contiguous and out.flags.writeable):
+        raise ValueError("out must be C-contiguous and writeable.")
+    return out
+
+
+def hyperslab(key, shape):
+    """Translate a numpy-style index into a single hyperslab request.
+
+    Returns
+    -------
+    start, stride, edge : list
+        Hyperslab parameters with positive strides.
+    squeeze : tuple
+        Axes indexed by an integer, to be dropped from the result.
+    flip : tuple
+        Axes indexed with a negative step, to be reversed in the result.
+    """
+    if not isinstance(key, tuple):
+        key = (key,)
+    if any(k is Ellipsis for k in key):
+        idx = [j for j, k in enumerate(key) if k is Ellipsis]
+        if len(idx) > 1:
+            raise IndexError("Only one ellipsis allowed.")
+        nfill = len(shape) - (len(key) - 1)
+        key = key[:idx[0]] + (slice(None),) * nfill + key[idx[0] + 1:]
+    if len(key) > len(shape):
+        raise IndexError("Too many indices.")
+    key = key + (slice(None),) * (len(shape) - len(key))
+
+    start, stride, edge, squeeze, flip = [], [], [], [], []
+    for axis, (k, n) in enumerate(zip(key, shape)):
+        if isinstance(k, slice):
+            first, stop, step = k.indices(n)
+            count = len(range(first, stop, step))
+            if step < 0:
+                first = first + (count - 1) * step if count > 0 else 0
+                step = -step
+                flip.append(axis)
+        else:
+            first = int(k)
+            if first < 0:
+                first += n
+            if first < 0 or first >= n:
+                raise IndexError("Index {0} out of range.".format(k))
+            step, count = 1, 1
+            squeeze.append(axis)
+        start.append(first)
+        stride.append(step)
+        edge.append(count)
+    return start, stride, edge, tuple(squeeze), tuple(flip)
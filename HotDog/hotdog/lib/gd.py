@@ -1,45 +1,23 @@
 from contextlib import contextmanager
 import pkg_resources
 import numpy as np
-from cffi import FFI
-
-from ..core import DFACC_READ, HDFE_NENTFLD
-
-ffi = FFI()
-ffi.cdef("""
-        typedef int int32;
-        typedef int intn;
-        typedef double float64;
-
-        int32 GDattach(int32 gdfid, char *grid);
-        intn  GDdetach(int32 gid);
-        intn  GDclose(int32 fid);
-        int32 GDij2ll(int32 projcode, int32 zonecode,
-                      float64 projparm[], int32 spherecode, int32 xdimsize,
-                      int32 ydimsize, float64 upleft[], float64 lowright[],
-                      int32 npts, int32 row[], int32 col[], float64
-                      longititude[], float64 latitude[], int32 pixcen,
-                      int32 pixcnr);
-        int32 GDinqfields(int32 gridid, char *fieldlist, int32 rank[],
-                          int32 numbertype[]);
-        int32 GDinqgrid(char *filename, char *gridlist, int32 *strbufsize);
-        int32 GDnentries(int32 gridid, int32 entrycode, int32 *strbufsize);
-        intn  GDgridinfo(int32 gridid, int32 *xdimsize, int32 *ydimsize,
-                         float64 upleft[2], float64 lowright[2]);
-        int32 GDopen(char *name, intn access);
-        intn  GDorigininfo(int32 gridid, int32 *origincode);
-        intn  GDpixreginfo(int32 gridid, int32 *pixregcode);
-        intn  GDprojinfo(int32 gridid, int32 *projcode, int32 *zonecode,
-                         int32 *spherecode, float64 projparm[]);
-        """)
-_lib = ffi.verify("""
-        #include "mfhdf.h"
-        #include "HE2_config.h"
-        #include "HdfEosDef.h"
-        """,
-        libraries=['hdfeos', 'Gctp', 'mfhdf', 'df', 'jpeg', 'z'],
-        include_dirs=['/opt/hdfeos2/include', '/usr/include/hdf', '/opt/local/include'],
-        library_dirs=['/opt/hdfeos2/lib', '/usr/lib/hdf', '/opt/local/lib'])
+
+from . import _cffi
+from ._util import check_out, int32_pointer
+
+from .sd import numpy_dtype
+from ..core import (DFACC_READ, HDFE_NENTDIM, HDFE_NENTFLD, HDFE_TILE, HDFE_CENTER, HDFE_GD_UL,
+                    HDFE_GD_UR, HDFE_GD_LL, HDFE_GD_LR, GCTP_GEO)
+
+ffi, _lib = _cffi.load('hotdog.lib._gd')
+
+# Cache of raw reads used by readfield by default, see hotdog.cache.
+field_cache = None
+
+# File name of each open grid file, and the file and name of each attached
+# grid, so that reads can be cached by file.
+_filenames = {}
+_grids = {}
 
 def _handle_error(status):
     if status < 0:
@@ -49,6 +27,34 @@ def _handle_error(status):
 def attach(gdfid, gridname):
     """Attach to an existing grid structure.
 
+    Parameters
+    ----------
+    gdfid : int
+        Grid file id.
+    gridname : str
+        Name of grid to be attached.
+
+    Returns
+    -------
+    grid_id : int
+        Grid identifier.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    gdid = attachgrid(gdfid, gridname)
+    try:
+        yield gdid
+    finally:
+        detach(gdid)
+
+def attachgrid(gdfid, gridname):
+    """Attach to an existing grid structure, to be detached with detach.
+
+    Use attach instead unless the identifier must outlive a with-block.
+
     Parameters
     ----------
     gdfid : int
@@ -67,8 +73,9 @@ def attach(gdfid, gridname):
         If associated library routine fails.
     """
     gdid = _lib.GDattach(gdfid, gridname.encode())
-    yield gdid
-    detach(gdid)
+    _handle_error(gdid)
+    _grids[gdid] = (gdfid, gridname)
+    return gdid
 
 def close(gdfid):
     """Close an HDF-EOS file.
@@ -83,6 +90,7 @@ def close(gdfid):
     IOError
         If associated library routine fails.
     """
+    _filenames.pop(gdfid, None)
     status = _lib.GDclose(gdfid)
     _handle_error(status)
 
@@ -99,9 +107,49 @@ def detach(grid_id):
     IOError
         If associated library routine fails.
     """
+    _grids.pop(grid_id, None)
     status = _lib.GDdetach(grid_id)
     _handle_error(status)
 
+def fieldinfo(grid_id, fieldname):
+    """Return information about a data field in a grid.
+
+    Parameters
+    ----------
+    grid_id : int
+        Grid identifier.
+    fieldname : str
+        Name of the field.
+
+    Returns
+    -------
+    rank : int
+        Rank of the field.
+    dims : ndarray
+        Dimension sizes of the field.
+    numbertype : int
+        HDF number type of the field.
+    dimlist : list
+        Names of the field's dimensions.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    _, strbufsize = nentries(grid_id, HDFE_NENTDIM)
+    rank = ffi.new("int32 *")
+    dims_buffer = ffi.new("int32[]", 32)
+    numbertype = ffi.new("int32 *")
+    dimlist = ffi.new("char[]", b'\0' * (strbufsize + 1))
+    status = _lib.GDfieldinfo(grid_id, fieldname.encode(), rank, dims_buffer,
+                              numbertype, dimlist)
+    _handle_error(status)
+
+    dims = np.array(dims_buffer[0:rank[0]], dtype=np.int32)
+    return (rank[0], dims, numbertype[0],
+            ffi.string(dimlist).decode('ascii').split(','))
+
 def gridinfo(grid_id):
     """Return information about a grid structure.
 
@@ -142,8 +190,67 @@ def gridinfo(grid_id):
 
     return gridsize, upleft, lowright
 
+def dms2deg(dms):
+    """Convert GCTP packed DMS angles (DDDMMMSSS.SS) to decimal degrees.
+
+    Parameters
+    ----------
+    dms : array_like
+        Packed degrees, minutes and seconds.
+
+    Returns
+    -------
+    degrees : ndarray
+        Decimal degrees.
+    """
+    dms = np.asarray(dms, dtype=np.float64)
+    value = np.abs(dms)
+    degrees = np.floor(value / 1e6)
+    minutes = np.floor((value - degrees * 1e6) / 1e3)
+    seconds = value - degrees * 1e6 - minutes * 1e3
+    return np.copysign(degrees + minutes / 60.0 + seconds / 3600.0, dms)
+
+def pixel_adjustment(pixcen, pixcnr):
+    """Offset of a pixel's location from its upper left corner, in pixels.
+
+    This is the adjustment GDij2ll applies.  Rows and columns always run from
+    the upper left corner of the grid; the origin code only says which
+    corner of a pixel is its location when the registration is HDFE_CORNER.
+
+    Parameters
+    ----------
+    pixcen, pixcnr : int
+        Pixel registration and origin codes.
+
+    Returns
+    -------
+    xadj, yadj : float
+        Column and row adjustments.
+    """
+    if pixcen == HDFE_CENTER:
+        return 0.5, 0.5
+    xadj = 1.0 if pixcnr in (HDFE_GD_UR, HDFE_GD_LR) else 0.0
+    yadj = 1.0 if pixcnr in (HDFE_GD_LL, HDFE_GD_LR) else 0.0
+    return xadj, yadj
+
+def _geographic_ij2ll(xdimsize, ydimsize, upleft, lowright, row, col, pixcen,
+                      pixcnr):
+    """Analytic ij2ll for the Geographic projection, an affine transform of
+    the row and column numbers."""
+    ulx, uly = dms2deg(upleft)
+    lrx, lry = dms2deg(lowright)
+    xscale = (lrx - ulx) / xdimsize
+    yscale = (lry - uly) / ydimsize
+    xadj, yadj = pixel_adjustment(pixcen, pixcnr)
+
+    col = np.asarray(col, dtype=np.float64)
+    row = np.asarray(row, dtype=np.float64)
+    longitude = ulx + (col + xadj) * xscale
+    latitude = uly + (row + yadj) * yscale
+    return np.broadcast_arrays(longitude, latitude)
+
 def ij2ll(projcode, zonecode, projparm, spherecode, xdimsize, ydimsize, upleft,
-          lowright, row, col, pixcen, pixcnr):
+          lowright, row, col, pixcen, pixcnr, analytic=True):
     """Convert coordinates (i, j) to (longitude, latitude).
 
     Parameters
@@ -163,6 +270,12 @@ def ij2ll(projcode, zonecode, projparm, spherecode, xdimsize, ydimsize, upleft,
         except Geographic) or DMS degree (Geographic).
     row, col : ndarray
         row, column numbers of the pixels (zero based)
+    pixcen, pixcnr : int
+        Pixel registration and origin codes.
+    analytic : bool, optional
+        If true, Geographic grids are mapped with a vectorized affine
+        transform instead of calling GDij2ll for every pixel.  In that case
+        row and col need only be broadcastable against each other.
 
     Returns
     -------
@@ -174,6 +287,12 @@ def ij2ll(projcode, zonecode, projparm, spherecode, xdimsize, ydimsize, upleft,
     IOError
         If associated library routine fails.
     """
+    if analytic and projcode == GCTP_GEO:
+        longitude, latitude = _geographic_ij2ll(xdimsize, ydimsize, upleft,
+                                                lowright, row, col, pixcen,
+                                                pixcnr)
+        return np.array(longitude), np.array(latitude)
+
     longitude = np.zeros(col.shape, dtype=np.float64)
     latitude = np.zeros(col.shape, dtype=np.float64)
     upleftp = ffi.cast("float64 *", upleft.ctypes.data)
@@ -247,6 +366,134 @@ def inqgrid(filename):
     gridlist = ffi.string(gridbuffer).decode('ascii').split(',')
     return gridlist
 
+def itertiles(grid_id, fieldname, tileshape=None):
+    """Iterate over a field in rectangular windows.
+
+    Windows follow the field's native tiles when it is tiled, otherwise
+    tileshape, so that large fields can be processed with bounded memory.
+    Each window is read with a single GDreadfield call.
+
+    Parameters
+    ----------
+    grid_id : int
+        Grid identifier.
+    fieldname : str
+        Name of the field.
+    tileshape : tuple, optional
+        Window shape to use for untiled fields.  Defaults to blocks of rows
+        totalling roughly 16 MB.
+
+    Yields
+    ------
+    window : tuple of slices
+        Location of the window within the field.
+    data : ndarray
+        Field values in the window.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    _, dims, numbertype, _ = fieldinfo(grid_id, fieldname)
+    tilecode, tiledims = tileinfo(grid_id, fieldname)
+    if tilecode == HDFE_TILE:
+        tileshape = tuple(tiledims)
+    elif tileshape is None:
+        itemsize = numpy_dtype(numbertype).itemsize
+        rowbytes = int(np.prod(dims[1:])) * itemsize
+        nrows = max(1, min(int(dims[0]), (16 << 20) // max(rowbytes, 1)))
+        tileshape = (nrows,) + tuple(dims[1:])
+    tileshape = tuple(int(x) for x in tileshape)
+
+    for corner in np.ndindex(*[(int(n) + t - 1) // t
+                               for n, t in zip(dims, tileshape)]):
+        start = [c * t for c, t in zip(corner, tileshape)]
+        edge = [min(t, int(n) - s0) for s0, t, n in zip(start, tileshape, dims)]
+        window = tuple(slice(s0, s0 + e) for s0, e in zip(start, edge))
+        yield window, readfield(grid_id, fieldname, start=start, edge=edge)
+
+def _geographic_ll2ij(xdimsize, ydimsize, upleft, lowright, longitude,
+                      latitude):
+    """Analytic ll2ij for the Geographic projection."""
+    ulx, uly = dms2deg(upleft)
+    lrx, lry = dms2deg(lowright)
+    xval = (np.asarray(longitude, dtype=np.float64) - ulx) * (xdimsize /
+                                                              (lrx - ulx))
+    yval = (np.asarray(latitude, dtype=np.float64) - uly) * (ydimsize /
+                                                             (lry - uly))
+    xval, yval = np.broadcast_arrays(xval, yval)
+    return np.array(xval), np.array(yval)
+
+def ll2ij(projcode, zonecode, projparm, spherecode, xdimsize, ydimsize, upleft,
+          lowright, longitude, latitude, analytic=True):
+    """Convert coordinates (longitude, latitude) to (i, j).
+
+    Parameters
+    ----------
+    projcode : int
+        GCTP projection code
+    zonecode : int
+        GCTP zone code used by UTM projection
+    projparm : ndarray
+        Projection parameters.
+    spherecode : int
+        GCTP spherecode
+    xdimsize, ydimsize : int
+        Size of grid.
+    upleft, lowright : ndarray
+        Upper left, lower right corner of the grid in meter (all projections
+        except Geographic) or DMS degree (Geographic).
+    longitude, latitude : ndarray
+        Longitude and latitude in decimal degrees.
+    analytic : bool, optional
+        If true, Geographic grids are mapped with a vectorized affine
+        transform instead of calling GDll2ij for every point.
+
+    Returns
+    -------
+    row, col : ndarray
+        Zero based row and column numbers of the pixels containing the points.
+    xval, yval : ndarray
+        Fractional column and row positions measured from the upper left
+        corner of the grid, in pixels.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    if analytic and projcode == GCTP_GEO:
+        xval, yval = _geographic_ll2ij(xdimsize, ydimsize, upleft, lowright,
+                                       longitude, latitude)
+        row = np.floor(yval).astype(np.int32)
+        col = np.floor(xval).astype(np.int32)
+        return row, col, xval, yval
+
+    longitude, latitude = np.broadcast_arrays(
+        np.asarray(longitude, dtype=np.float64),
+        np.asarray(latitude, dtype=np.float64))
+    longitude = np.ascontiguousarray(longitude)
+    latitude = np.ascontiguousarray(latitude)
+    row = np.zeros(longitude.shape, dtype=np.int32)
+    col = np.zeros(longitude.shape, dtype=np.int32)
+    xval = np.zeros(longitude.shape, dtype=np.float64)
+    yval = np.zeros(longitude.shape, dtype=np.float64)
+    upleftp = ffi.cast("float64 *", upleft.ctypes.data)
+    lowrightp = ffi.cast("float64 *", lowright.ctypes.data)
+    projparmp = ffi.cast("float64 *", projparm.ctypes.data)
+    status = _lib.GDll2ij(projcode, zonecode, projparmp, spherecode,
+                          xdimsize, ydimsize, upleftp, lowrightp,
+                          longitude.size,
+                          ffi.cast("float64 *", longitude.ctypes.data),
+                          ffi.cast("float64 *", latitude.ctypes.data),
+                          ffi.cast("int32 *", row.ctypes.data),
+                          ffi.cast("int32 *", col.ctypes.data),
+                          ffi.cast("float64 *", xval.ctypes.data),
+                          ffi.cast("float64 *", yval.ctypes.data))
+    _handle_error(status)
+    return row, col, xval, yval
+
 def nentries(gridid, entry_code):
     """Return number of specified objects in a grid.
 
@@ -271,11 +518,40 @@ def nentries(gridid, entry_code):
     nentries = _lib.GDnentries(gridid, entry_code, strbufsize)
     return nentries, strbufsize[0]
 
+def openfile(filename, access=DFACC_READ):
+    """Open an HDF-EOS file, to be closed with close.
+
+    Use open instead unless the identifier must outlive a with-block.
+
+    Parameters
+    ----------
+    filename : str
+        HDF-EOS file.
+    access : int, optional
+        Access mode.
+
+    Returns
+    -------
+    gdfid : int
+        Grid file id.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    gdfid = _lib.GDopen(filename.encode(), access)
+    _handle_error(gdfid)
+    _filenames[gdfid] = filename
+    return gdfid
+
 @contextmanager
 def open(filename, access=DFACC_READ):
-    gdfid = _lib.GDopen(filename.encode(), access)
-    yield gdfid
-    close(gdfid)
+    gdfid = openfile(filename, access)
+    try:
+        yield gdfid
+    finally:
+        close(gdfid)
 
 def origininfo(grid_id):
     """Return grid pixel origin information.
@@ -325,6 +601,131 @@ def pixreginfo(grid_id):
 
     return pixregcode[0]
 
+def _cache_key(cache, grid_id, fieldname, start, stride, edge):
+    """Key of a read in cache, or None if it is not to be cached."""
+    if cache is None or _grids.get(grid_id, (None,))[0] not in _filenames:
+        return None
+    gdfid, gridname = _grids[grid_id]
+    return cache.key(_filenames[gdfid], fieldname, start, stride, edge,
+                     variant=repr(['GDreadfield', gridname]))
+
+def readfield(grid_id, fieldname, start=None, stride=None, edge=None,
+              out=None, cache=None):
+    """Read a hyperslab of a grid data field.
+
+    Parameters
+    ----------
+    grid_id : int
+        Grid identifier.
+    fieldname : str
+        Name of the field.
+    start : array_like, optional
+        Zero-based starting location of the hyperslab in each dimension.
+        Defaults to the origin.
+    stride : array_like, optional
+        Number of values to step along each dimension.  Defaults to 1.
+    edge : array_like, optional
+        Number of values to read along each dimension.  Defaults to the shape
+        of out if given, otherwise to the rest of the field past start.
+    out : ndarray, optional
+        C-contiguous, writeable array of the field's dtype to read into.
+    cache : hotdog.cache.FieldCache, optional
+        Serve the read from, and store it in, this cache.  The raw values
+        are cached, under a different key than decoded sd.readdata values.
+        Defaults to field_cache, which hotdog.cache.install sets.  Only
+        grids attached in a file opened with open or a HandlePool are
+        cached.  Hits are writeable arrays unless the cache serves memory
+        maps, see FieldCache's mmap.
+
+    Returns
+    -------
+    data : ndarray
+        Hyperslab of shape edge; out if it was given.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    ValueError
+        If out has the wrong dtype or shape, or is not contiguous.
+    """
+    rank, dims, numbertype, _ = fieldinfo(grid_id, fieldname)
+    dtype = numpy_dtype(numbertype)
+
+    if start is None:
+        start = np.zeros(rank)
+    start, startp = int32_pointer(ffi, start)
+    stride, stridep = int32_pointer(ffi, stride)
+    if edge is None and out is not None:
+        edge = out.shape
+    elif edge is None:
+        step = np.ones(rank, dtype=np.int32) if stride is None else stride
+        edge = (dims - start + step - 1) // step
+    edge, edgep = int32_pointer(ffi, edge)
+
+    if cache is None:
+        cache = field_cache
+    key = _cache_key(cache, grid_id, fieldname, start, stride, edge)
+    cached = None
+    if key is not None:
+        # With out given, copy straight from the mapping into it.
+        cached = cache.get(key, mmap=True if out is not None else None)
+
+    if out is None:
+        data = np.empty(edge, dtype=dtype) if cached is None else cached
+    else:
+        data = check_out(out, edge, dtype)
+    if cached is not None:
+        if data is not cached:
+            np.copyto(data, cached.reshape(data.shape))
+        return data
+
+    status = _lib.GDreadfield(grid_id, fieldname.encode(), startp, stridep,
+                              edgep, ffi.cast("void *", data.ctypes.data))
+    _handle_error(status)
+    if key is not None:
+        try:
+            cache.put(key, data)
+        except OSError:
+            # Out of space, say; the read itself succeeded.
+            pass
+    return data
+
+def readtile(grid_id, fieldname, tilecoords):
+    """Read a single native tile of a tiled field.
+
+    Parameters
+    ----------
+    grid_id : int
+        Grid identifier.
+    fieldname : str
+        Name of the field.
+    tilecoords : array_like
+        Zero-based tile coordinates along each dimension.
+
+    Returns
+    -------
+    data : ndarray
+        Tile of shape tiledims.  Tiles on the far edges of the field are
+        padded out to the full tile size.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails or the field is not tiled.
+    """
+    _, _, numbertype, _ = fieldinfo(grid_id, fieldname)
+    tilecode, tiledims = tileinfo(grid_id, fieldname)
+    if tilecode != HDFE_TILE:
+        raise IOError("Field {0} is not tiled.".format(fieldname))
+
+    tilecoords, tilecoordsp = int32_pointer(ffi, tilecoords)
+    data = np.empty(tiledims, dtype=numpy_dtype(numbertype))
+    status = _lib.GDreadtile(grid_id, fieldname.encode(), tilecoordsp,
+                             ffi.cast("void *", data.ctypes.data))
+    _handle_error(status)
+    return data
+
 def projinfo(grid_id):
     """Return grid projection information.
 
@@ -360,3 +761,37 @@ def projinfo(grid_id):
 
     return projcode[0], zonecode[0], spherecode[0], projparm
 
+
+def tileinfo(grid_id, fieldname):
+    """Return tiling information of a grid data field.
+
+    Parameters
+    ----------
+    grid_id : int
+        Grid identifier.
+    fieldname : str
+        Name of the field.
+
+    Returns
+    -------
+    tilecode : int
+        HDFE_TILE or HDFE_NOTILE.
+    tiledims : ndarray
+        Tile dimensions, empty if the field is not tiled.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    tilecode = ffi.new("int32 *")
+    tilerank = ffi.new("int32 *")
+    tiledims_buffer = ffi.new("int32[]", 32)
+    status = _lib.GDtileinfo(grid_id, fieldname.encode(), tilecode, tilerank,
+                             tiledims_buffer)
+    _handle_error(status)
+
+    if tilecode[0] != HDFE_TILE:
+        return tilecode[0], np.zeros(0, dtype=np.int32)
+    return tilecode[0], np.array(tiledims_buffer[0:tilerank[0]],
+                                 dtype=np.int32)
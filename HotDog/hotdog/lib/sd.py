@@ -1,41 +1,42 @@
 from contextlib import contextmanager
+import functools
+import os
 import pkg_resources
 import numpy as np
-from cffi import FFI
 
-from ..core import DFNT_FLOAT
+from . import _cffi
+from ._util import check_out, hyperslab, int32_pointer
+
+from ..core import (DFNT_FLOAT, DFNT_CHAR8, DFNT_UCHAR8, DFNT_FLOAT32,
+                    DFNT_FLOAT64, DFNT_INT8, DFNT_UINT8, DFNT_INT16,
+                    DFNT_UINT16, DFNT_INT32, DFNT_UINT32, DFNT_LITEND,
+                    MAX_VAR_DIMS, H4_MAX_NC_NAME, COMP_CODE_NONE)
 
 DFE_NONE = 0
 DFACC_READ = 1
 DFNT_CHAR = 4
 
-ffi = FFI()
-ffi.cdef("""
-        typedef int int32;
-        typedef int intn;
-
-        intn  SDend(int32 id);
-        intn  SDendaccess(int32 sds_id);
-        intn  SDgetinfo(int32 sds_id, char *sds_name, int32 *rank,
-                        int32 dimsizes[], int32 *datatype, int32 *nattrs);
-        intn  SDfileinfo(int32 sd_id, int32 *n_datasets, int32 *n_file_attrs);
-        intn  SDattrinfo(int32 obj_id, int32 attr_index, 
-                         char *attr_name, int32 *data_type, int32 *count);
-        int32 SDfindattr(int32 obj_id, char *attr_name);
-        intn  SDgetrange(int32 sds_id, void *max, void *min);
-        int32 SDnametoindex(int32 sd_id, char *name);
-        intn  SDreadattr(int32 obj_id, int32 attr_index, void *buffer);
-        intn  SDreaddata(int32 sds_id, int32 *start, int32 *stride,
-                         int32 *edge, void *buffer);
-        int32 SDselect(int32 sd_id, int32 sds_index);
-        int32 SDstart(char *name, int32 accs);
-        """)
-_lib = ffi.verify("""
-        #include "mfhdf.h"
-        """,
-        libraries=['mfhdf', 'df', 'jpeg', 'z'],
-        include_dirs=['/usr/include/hdf', '/opt/local/include'],
-        library_dirs=['/usr/lib/hdf', '/opt/local/lib'])
+ffi, _lib = _cffi.load('hotdog.lib._sd')
+
+# Cache of decoded reads used by readdata by default, see hotdog.cache.
+field_cache = None
+
+# File name of each open SD interface, and the interface of each selected
+# dataset, so that reads can be cached by file.
+_filenames = {}
+_sdids = {}
+
+# HDF4 number types and their in-memory (native byte order) numpy equivalents.
+_dtypes = {DFNT_CHAR8: np.dtype('S1'),
+           DFNT_UCHAR8: np.dtype(np.uint8),
+           DFNT_FLOAT32: np.dtype(np.float32),
+           DFNT_FLOAT64: np.dtype(np.float64),
+           DFNT_INT8: np.dtype(np.int8),
+           DFNT_UINT8: np.dtype(np.uint8),
+           DFNT_INT16: np.dtype(np.int16),
+           DFNT_UINT16: np.dtype(np.uint16),
+           DFNT_INT32: np.dtype(np.int32),
+           DFNT_UINT32: np.dtype(np.uint32)}
 
 def _handle_error(status):
     if status < 0:
@@ -44,11 +45,16 @@ def _handle_error(status):
 @contextmanager 
 def select(sdid, sds_index):
     sds_id = _lib.SDselect(sdid, sds_index)
-    yield sds_id
-    _lib.SDendaccess(sds_id)
+    _handle_error(sds_id)
+    _sdids[sds_id] = sdid
+    try:
+        yield sds_id
+    finally:
+        _sdids.pop(sds_id, None)
+        _lib.SDendaccess(sds_id)
 
 def attrinfo(obj_id, attr_index):
-    attr_name = ffi.new("char[]", b'\0' * 64)
+    attr_name = ffi.new("char[]", H4_MAX_NC_NAME + 1)
     data_type = ffi.new("int32 *")
     count = ffi.new("int32 *")
     status = _lib.SDattrinfo(obj_id, attr_index, attr_name, data_type, count);
@@ -56,30 +62,72 @@ def attrinfo(obj_id, attr_index):
     return ffi.string(attr_name).decode('ascii'), data_type[0], count[0]
 
 def getinfo(sds_id):
-    name = ffi.new("char[]", b'\0' * 64)
-    rank = ffi.new("int32 *")
-    status = _lib.SDgetinfo(sds_id, name, rank, ffi.NULL, ffi.NULL, ffi.NULL)
-    _handle_error(status)
+    """Retrieve the name, rank, dimension sizes, data type and number of
+    attributes of a dataset with a single call to SDgetinfo.
+
+    Parameters
+    ----------
+    sds_id : int
+        Dataset identifier
 
-    dimsizes = np.zeros(rank[0], dtype=np.int32)
-    dimsizesp = ffi.cast("int *", dimsizes.ctypes.data)
+    Returns
+    -------
+    name, rank, dimsizes, datatype, nattrs : tuple
 
+    Raises
+    ------
+    IOError if associated library routine fails.
+    """
+    name = ffi.new("char[]", H4_MAX_NC_NAME + 1)
+    rank = ffi.new("int32 *")
+    dimsizes_buffer = ffi.new("int32[]", MAX_VAR_DIMS)
     datatype = ffi.new("int32 *")
     nattrs = ffi.new("int32 *")
-    status = _lib.SDgetinfo(sds_id, ffi.NULL, ffi.NULL, dimsizesp, datatype, nattrs)
+    status = _lib.SDgetinfo(sds_id, name, rank, dimsizes_buffer, datatype,
+                            nattrs)
     _handle_error(status)
 
+    dimsizes = np.array(dimsizes_buffer[0:rank[0]], dtype=np.int32)
+
     return (ffi.string(name).decode('ascii'),
             rank[0],
             dimsizes,
             datatype[0],
             nattrs[0])
 
+def startfile(filename, access=DFACC_READ):
+    """Initialize the SD interface on a file, to be ended with end.
+
+    Use start instead unless the identifier must outlive a with-block.
+
+    Parameters
+    ----------
+    filename : str
+        HDF file.
+    access : int, optional
+        Access mode.
+
+    Returns
+    -------
+    sdid : int
+        SD interface identifier.
+
+    Raises
+    ------
+    IOError if associated library routine fails.
+    """
+    sdid = _lib.SDstart(filename.encode(), access)
+    _handle_error(sdid)
+    _filenames[sdid] = filename
+    return sdid
+
 @contextmanager
 def start(filename, access=DFACC_READ):
-    sdid = _lib.SDstart(filename.encode(), access)
-    yield sdid
-    _lib.SDend(sdid)
+    sdid = startfile(filename, access)
+    try:
+        yield sdid
+    finally:
+        end(sdid)
 
 def fileinfo(sdid):
     """
@@ -100,10 +148,12 @@ def findattr(obj_id, name):
     return idx
 
 def end(sdid):
+    _filenames.pop(sdid, None)
     status = _lib.SDend(sdid)
     return status
 
 def endaccess(sds_id):
+    _sdids.pop(sds_id, None)
     status = _lib.SDendaccess(sds_id)
     _handle_error(status)
 
@@ -147,55 +197,533 @@ def getrange(sds_id):
     ------
     IOError if associated library routine fails.
     """
-    _, _, _, dtype, _ = getinfo(sds_id)
-    if dtype == DFNT_FLOAT:
-        maxp = ffi.new("float *")
-        minp = ffi.new("float *")
-    else:
-        raise NotImplementedError("Only char attributes for now.")
+    _, _, _, datatype, _ = getinfo(sds_id)
+    buffer = np.zeros(2, dtype=numpy_dtype(datatype))
+    maxp = ffi.cast("void *", buffer.ctypes.data)
+    minp = ffi.cast("void *", buffer.ctypes.data + buffer.itemsize)
 
     status = _lib.SDgetrange(sds_id, maxp, minp)
     _handle_error(status)
-    if dtype == DFNT_FLOAT:
-        return maxp[0], minp[0]
+    return buffer[0], buffer[1]
 
-def readattr(obj_id, attr_idx):
-    _, dtype, count = attrinfo(obj_id, attr_idx)
-    if dtype == DFNT_CHAR:
-        buffer = ffi.new("char[]", b'\0' * count)
-    elif dtype == DFNT_FLOAT:
-        buffer = ffi.new("float *")
-    else:
-        raise NotImplementedError("Only char attributes for now.")
+def getcompinfo(sds_id):
+    """Retrieve the compression method of a dataset.
+
+    Parameters
+    ----------
+    sds_id : int
+        Dataset identifier
+
+    Returns
+    -------
+    comp_type : int
+        Compression coder, COMP_CODE_NONE if the dataset is not compressed.
+
+    Raises
+    ------
+    IOError if associated library routine fails.
+    """
+    comp_type = ffi.new("comp_coder_t *")
+    c_info = ffi.new("comp_info *")
+    status = _lib.SDgetcompinfo(sds_id, comp_type, c_info)
+    _handle_error(status)
+    return int(comp_type[0])
+
+def getdatainfo(sds_id):
+    """Retrieve the file offsets and lengths of a dataset's data blocks.
+
+    Parameters
+    ----------
+    sds_id : int
+        Dataset identifier
+
+    Returns
+    -------
+    offsets, lengths : ndarray
+        Byte offset and length of each block of raw data in the file.  Both
+        are empty if no data has been written.
+
+    Raises
+    ------
+    IOError if associated library routine fails.
+    """
+    nblocks = _lib.SDgetdatainfo(sds_id, ffi.NULL, 0, 0, ffi.NULL, ffi.NULL)
+    _handle_error(nblocks)
+
+    offsets = np.zeros(nblocks, dtype=np.int32)
+    lengths = np.zeros(nblocks, dtype=np.int32)
+    if nblocks > 0:
+        offsetp = ffi.cast("int32 *", offsets.ctypes.data)
+        lengthp = ffi.cast("int32 *", lengths.ctypes.data)
+        status = _lib.SDgetdatainfo(sds_id, ffi.NULL, 0, nblocks,
+                                    offsetp, lengthp)
+        _handle_error(status)
+    return offsets, lengths
+
+def getexternalinfo(sds_id):
+    """Retrieve the external file holding a dataset's data, if any.
+
+    Parameters
+    ----------
+    sds_id : int
+        Dataset identifier
+
+    Returns
+    -------
+    filename : str or None
+        Name of the external file, or None if the data is stored in the HDF
+        file itself.
+
+    Raises
+    ------
+    IOError if associated library routine fails.
+    """
+    namelen = _lib.SDgetexternalinfo(sds_id, 0, ffi.NULL, ffi.NULL, ffi.NULL)
+    _handle_error(namelen)
+    if namelen == 0:
+        return None
+    name = ffi.new("char[]", namelen + 1)
+    status = _lib.SDgetexternalinfo(sds_id, namelen + 1, name, ffi.NULL,
+                                    ffi.NULL)
+    _handle_error(status)
+    return ffi.string(name).decode('latin-1')
+
+def isrecord(sds_id):
+    """Determine whether a dataset has an unlimited dimension.
+
+    Such datasets grow by appending linked blocks to the file.
+    """
+    return bool(_lib.SDisrecord(sds_id))
+
+def memmap(filename, sds_id):
+    """Map an uncompressed, contiguous dataset directly from the file.
+
+    The bytes of such a dataset sit at a fixed offset in the file, so they
+    can be paged in on demand without going through the HDF library.
+
+    Parameters
+    ----------
+    filename : str
+        File containing the dataset.
+    sds_id : int
+        Dataset identifier
+
+    Returns
+    -------
+    data : np.memmap or None
+        Read-only view of the dataset in its file byte order, or None if the
+        dataset is compressed, chunked, stored externally or in linked
+        blocks, split across blocks or empty, in which case readdata must be
+        used instead.
 
-    status = _lib.SDreadattr(obj_id, attr_idx, buffer)
+    Raises
+    ------
+    IOError if associated library routine fails.
+    """
+    _, _, dimsizes, datatype, _ = getinfo(sds_id)
+    if getcompinfo(sds_id) != COMP_CODE_NONE:
+        return None
+    # The offsets of external data refer to the external file, and linked
+    # blocks need not be laid out in order.
+    if getexternalinfo(sds_id) is not None or isrecord(sds_id):
+        return None
+
+    offsets, lengths = getdatainfo(sds_id)
+    dtype = numpy_dtype(datatype)
+    if dtype.itemsize > 1:
+        dtype = dtype.newbyteorder('<' if datatype & DFNT_LITEND else '>')
+    shape = tuple(int(x) for x in dimsizes)
+    if (len(offsets) != 1 or
+            lengths[0] != int(np.prod(shape)) * dtype.itemsize):
+        return None
+
+    return np.memmap(filename, dtype=dtype, mode='r', offset=int(offsets[0]),
+                     shape=shape)
+
+def _readattr(obj_id, attr_idx, datatype, count):
+    """Read an attribute whose number type and count are already known."""
+    # Only char8 is text; uchar8 attributes are as often small byte arrays.
+    if datatype & ~DFNT_LITEND == DFNT_CHAR8:
+        buffer = ffi.new("char[]", count + 1)
+        status = _lib.SDreadattr(obj_id, attr_idx, buffer)
+        _handle_error(status)
+        return ffi.string(buffer).decode('latin-1')
+
+    data = np.zeros(count, dtype=numpy_dtype(datatype))
+    status = _lib.SDreadattr(obj_id, attr_idx,
+                             ffi.cast("void *", data.ctypes.data))
     _handle_error(status)
-    if dtype == DFNT_CHAR:
-        return ffi.string(buffer).decode('ascii')
-    elif dtype == DFNT_FLOAT:
-        return buffer[0]
-
-#def readdata(sds_id, start=None, stride=None, edge=None):
-def readdata(sds_id, start=None, stride=None, edge=None):
-    _, rank, dimsizes, dtype, _ = getinfo(sds_id)
+    return data[0] if count == 1 else data
+
+def readattr(obj_id, attr_idx):
+    """Read the values of an attribute.
+
+    Parameters
+    ----------
+    obj_id : int
+        File or dataset identifier
+    attr_idx : int
+        Index of the attribute.
+
+    Returns
+    -------
+    value : str, scalar or ndarray
+        DFNT_CHAR8 attributes are returned as a string, single values as a
+        scalar, everything else, including DFNT_UCHAR8, as an array.
+
+    Raises
+    ------
+    IOError if associated library routine fails.
+    NotImplementedError if the attribute's number type is not supported.
+    """
+    _, datatype, count = attrinfo(obj_id, attr_idx)
+    return _readattr(obj_id, attr_idx, datatype, count)
+
+def _readattrs(obj_id, nattrs):
+    """Read all attributes of a file or dataset into a dictionary."""
+    attrs = {}
+    for attr_idx in range(nattrs):
+        name, datatype, count = attrinfo(obj_id, attr_idx)
+        try:
+            attrs[name] = _readattr(obj_id, attr_idx, datatype, count)
+        except NotImplementedError:
+            attrs[name] = None
+    return attrs
+
+@functools.lru_cache(maxsize=128)
+def _catalog(filename, mtime, size):
+    datasets = {}
+    with start(filename) as sdid:
+        ndatasets, nattrs = fileinfo(sdid)
+        attributes = _readattrs(sdid, nattrs)
+        for idx in range(ndatasets):
+            with select(sdid, idx) as sds_id:
+                name, _, dimsizes, datatype, nattrs = getinfo(sds_id)
+                try:
+                    dtype = numpy_dtype(datatype)
+                except NotImplementedError:
+                    dtype = None
+                datasets[name] = {'index': idx,
+                                  'shape': tuple(int(x) for x in dimsizes),
+                                  'datatype': datatype,
+                                  'dtype': dtype,
+                                  'attributes': _readattrs(sds_id, nattrs)}
+    return {'attributes': attributes, 'datasets': datasets}
+
+def catalog(filename):
+    """Describe every dataset in a file in one traversal.
+
+    Results are cached per file and invalidated when the file's modification
+    time or size changes.  The returned dictionary is shared between callers
+    and must not be modified.
+
+    Parameters
+    ----------
+    filename : str
+        HDF file.
+
+    Returns
+    -------
+    catalog : dict
+        'attributes' maps to the file attributes, 'datasets' maps each dataset
+        name to a dictionary with keys 'index', 'shape', 'datatype', 'dtype'
+        and 'attributes'.  Attributes of unsupported number types are None.
+
+    Raises
+    ------
+    IOError if associated library routine fails.
+    """
+    filename = os.path.realpath(filename)
+    st = os.stat(filename)
+    return _catalog(filename, st.st_mtime, st.st_size)
+
+def numpy_dtype(datatype):
+    """Map an HDF number type onto the equivalent numpy dtype.
+
+    Parameters
+    ----------
+    datatype : int
+        HDF number type, e.g. DFNT_FLOAT32.
+
+    Returns
+    -------
+    dtype : numpy.dtype
+        Native byte order dtype.
+
+    Raises
+    ------
+    NotImplementedError if the number type is not supported.
+    """
+    try:
+        return _dtypes[datatype & ~DFNT_LITEND]
+    except KeyError:
+        msg = "Unsupported HDF number type {0}.".format(datatype)
+        raise NotImplementedError(msg)
+
+def decoding(sds_id):
+    """Read the attributes needed to decode a dataset's values.
+
+    Parameters
+    ----------
+    sds_id : int
+        Dataset identifier
+
+    Returns
+    -------
+    params : dict
+        'dtype' (of the decoded values), 'fill_value', 'valid_min',
+        'valid_max', 'scale_factor' and 'add_offset'; None where the dataset
+        has no such attribute.  Pass it as readdata's decode argument to
+        avoid reading the attributes again.
+
+    Raises
+    ------
+    IOError if associated library routine fails.
+    """
+    _, _, _, datatype, nattrs = getinfo(sds_id)
+    attrs = _readattrs(sds_id, nattrs)
+    dtype = numpy_dtype(datatype)
+    params = {'dtype': np.dtype(np.float64 if dtype == np.float64
+                                else np.float32),
+              'fill_value': attrs.get('_FillValue'),
+              'valid_min': attrs.get('valid_min'),
+              'valid_max': attrs.get('valid_max'),
+              'scale_factor': attrs.get('scale_factor'),
+              'add_offset': attrs.get('add_offset')}
+    if attrs.get('valid_range') is not None:
+        # SDsetrange stores the minimum first, but not every writer does.
+        params['valid_min'] = np.min(attrs['valid_range'])
+        params['valid_max'] = np.max(attrs['valid_range'])
+    return params
+
+def _decode(raw, data, params, masked, scaling):
+    """Mask and scale raw values into data, in place where possible.
+
+    data may be raw itself.  The only temporaries are boolean masks.
+    """
+    mask = np.zeros(raw.shape, dtype=bool)
+    scratch = None
+    if params['fill_value'] is not None:
+        np.equal(raw, params['fill_value'], out=mask)
+    for bound, compare in [('valid_min', np.less), ('valid_max', np.greater)]:
+        if params[bound] is not None:
+            if scratch is None:
+                scratch = np.empty(raw.shape, dtype=bool)
+            compare(raw, params[bound], out=scratch)
+            mask |= scratch
+
+    if data is not raw:
+        np.copyto(data, raw, casting='unsafe')
+    scale = params['scale_factor']
+    offset = params['add_offset']
+    if scaling == 'hdf':
+        if offset is not None:
+            data -= offset
+        if scale is not None:
+            data *= scale
+    elif scaling == 'cf':
+        if scale is not None:
+            data *= scale
+        if offset is not None:
+            data += offset
+    elif scaling is not None:
+        raise ValueError("Unknown scaling convention {0}.".format(scaling))
+    np.copyto(data, np.nan, where=mask)
+
+    if masked:
+        scratch = np.isnan(data, out=scratch)
+        mask |= scratch
+        return np.ma.MaskedArray(data, mask=mask, copy=False)
+    return data
+
+def _cache_key(cache, sds_id, name, start, stride, edge, decode, scaling):
+    """Key of a decoded read in cache, or None if it is not to be cached."""
+    if cache is None or _sdids.get(sds_id) not in _filenames:
+        return None
+    variant = ['decode', scaling]
+    if isinstance(decode, dict):
+        variant.append(sorted((k, repr(v)) for k, v in decode.items()))
+    return cache.key(_filenames[_sdids[sds_id]], name, start, stride, edge,
+                     variant=repr(variant))
+
+def _from_cache(data, out, edge, masked):
+    if out is not None:
+        np.copyto(check_out(out, edge, data.dtype), data.reshape(out.shape))
+        data = out
+    if masked:
+        return np.ma.MaskedArray(data, mask=np.isnan(data))
+    return data
+
+def readdata(sds_id, start=None, stride=None, edge=None, out=None,
+             decode=False, masked=False, scaling='hdf', cache=None):
+    """Read a hyperslab of data from a dataset.
+
+    Parameters
+    ----------
+    sds_id : int
+        Dataset identifier
+    start : array_like, optional
+        Zero-based starting location of the hyperslab in each dimension.
+        Defaults to the origin.
+    stride : array_like, optional
+        Number of values to step along each dimension.  Defaults to 1.
+    edge : array_like, optional
+        Number of values to read along each dimension.  Defaults to the shape
+        of out if given, otherwise to the rest of the dataset past start.
+    out : ndarray, optional
+        C-contiguous, writeable array of the dataset's dtype (the decoded
+        dtype if decoding) into which the values are written directly, e.g.
+        a time slice of a larger memmap.
+    decode : bool or dict, optional
+        If true, set values equal to _FillValue or outside the valid range
+        to NaN and apply scale_factor and add_offset.  The result is float32,
+        or float64 for float64 datasets.  May be the dictionary returned by
+        decoding(sds_id) to save reading the attributes again.
+    masked : bool, optional
+        When decoding, return a masked array with the NaNs masked.
+    scaling : str, optional
+        When decoding, 'hdf' for the HDF4 calibration convention,
+        scale_factor * (value - add_offset), as written by SDsetcal, or 'cf'
+        for the netCDF one, scale_factor * value + add_offset.
+    cache : hotdog.cache.FieldCache, optional
+        Serve decoded reads from, and store them in, this cache.  Defaults
+        to field_cache, which hotdog.cache.install sets.  Only datasets
+        selected from a file opened with start or a HandlePool are cached.
+        Hits are writeable arrays unless the cache serves memory maps, see
+        FieldCache's mmap.
+
+    Returns
+    -------
+    data : ndarray
+        Hyperslab of shape edge; out if it was given.
+
+    Raises
+    ------
+    IOError if associated library routine fails.
+    ValueError if out has the wrong dtype or shape, or is not contiguous.
+    """
+    name, rank, dimsizes, datatype, _ = getinfo(sds_id)
+    dtype = numpy_dtype(datatype)
+
     if start is None:
-        start = np.zeros(dimsizes, dtype=np.int32)
-        startp = ffi.cast("int *", start.ctypes.data)
-    if edge is None:
-        edge = np.array(dimsizes, dtype=np.int32)
-        edgep = ffi.cast("int *", edge.ctypes.data)
-    if stride is None:
-        stridep = ffi.NULL
-    if dtype == DFNT_FLOAT:
-        data = np.zeros(dimsizes, dtype=np.float32)
-        datap = ffi.cast("void *", data.ctypes.data)
+        start = np.zeros(rank)
+    start, startp = int32_pointer(ffi, start)
+    stride, stridep = int32_pointer(ffi, stride)
+    if edge is None and out is not None:
+        edge = out.shape
+    elif edge is None:
+        step = np.ones(rank, dtype=np.int32) if stride is None else stride
+        edge = (dimsizes - start + step - 1) // step
+    edge, edgep = int32_pointer(ffi, edge)
+
+    key = None
+    if decode:
+        if cache is None:
+            cache = field_cache
+        key = _cache_key(cache, sds_id, name, start, stride, edge, decode,
+                         scaling)
+        cached = None
+        if key is not None:
+            # With out given, copy straight from the mapping into it.
+            cached = cache.get(key, mmap=True if out is not None else None)
+        if cached is not None:
+            return _from_cache(cached, out, edge, masked)
+        params = decode if isinstance(decode, dict) else decoding(sds_id)
+        if out is None:
+            out = np.empty(edge, dtype=params['dtype'])
+        decoded = check_out(out, edge, params['dtype'])
+        data = decoded if decoded.dtype == dtype else np.empty(edge, dtype)
+    elif out is None:
+        data = np.empty(edge, dtype=dtype)
     else:
-        raise NotImplementedError("Only float datasets for now.")
+        data = check_out(out, edge, dtype)
+    datap = ffi.cast("void *", data.ctypes.data)
 
     status = _lib.SDreaddata(sds_id, startp, stridep, edgep, datap)
     _handle_error(status)
+    if decode:
+        data = _decode(data, decoded, params, masked, scaling)
+        if key is not None:
+            try:
+                cache.put(key, decoded)
+            except OSError:
+                # Out of space, say; the read itself succeeded.
+                pass
     return data
 
+class SDSArray(object):
+    """Lazy, array-like view of a scientific dataset.
+
+    No data is read until the object is indexed, and then only the requested
+    hyperslab is transferred, using exactly one call to SDreaddata.  The
+    object is only valid while sds_id remains selected.
+
+    Parameters
+    ----------
+    sds_id : int
+        Dataset identifier
+    decode : bool, optional
+        Decode values as readdata does.  The attributes are read once, here.
+    masked : bool, optional
+        When decoding, return masked arrays.
+
+    Examples
+    --------
+    >>> with start(filename) as sdid:
+    ...     with select(sdid, nametoindex(sdid, 'Ozone')) as sds_id:
+    ...         window = SDSArray(sds_id)[40:50, 100:110]
+    """
+    def __init__(self, sds_id, decode=False, masked=False):
+        self.sds_id = sds_id
+        self.name, _, dimsizes, self.datatype, _ = getinfo(sds_id)
+        self.shape = tuple(int(x) for x in dimsizes)
+        self.dtype = numpy_dtype(self.datatype)
+        self.decode = decoding(sds_id) if decode else False
+        self.masked = masked
+        if self.decode:
+            self.dtype = self.decode['dtype']
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return "SDSArray({0!r}, shape={1}, dtype={2})".format(self.name,
+                                                              self.shape,
+                                                              self.dtype)
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[...]
+        return data if dtype is None else data.astype(dtype)
+
+    def __getitem__(self, key):
+        start, stride, edge, squeeze, flip = hyperslab(key, self.shape)
+        if 0 in edge:
+            data = np.zeros(edge, dtype=self.dtype)
+            if self.decode and self.masked:
+                data = np.ma.MaskedArray(data, mask=False)
+        else:
+            if all(s == 1 for s in stride):
+                stride = None
+            data = readdata(self.sds_id, start, stride, edge,
+                            decode=self.decode, masked=self.masked)
+        if flip:
+            index = [slice(None)] * len(edge)
+            for axis in flip:
+                index[axis] = slice(None, None, -1)
+            data = data[tuple(index)]
+        if squeeze:
+            data = data.reshape([n for j, n in enumerate(data.shape)
+                                 if j not in squeeze])
+        return data
+
 
 if __name__ == "__main__":
 
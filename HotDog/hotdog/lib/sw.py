@@ -0,0 +1,497 @@
+from contextlib import contextmanager
+import numpy as np
+
+from . import _cffi
+from ._util import check_out, int32_pointer
+
+from .sd import numpy_dtype
+from ..core import (DFACC_READ, HDFE_NENTDIM, HDFE_NENTMAP, HDFE_NENTGFLD,
+                    HDFE_NENTFLD)
+
+ffi, _lib = _cffi.load('hotdog.lib._sw')
+
+def _handle_error(status):
+    if status < 0:
+        raise IOError("Library routine failed.")
+
+@contextmanager
+def open(filename, access=DFACC_READ):
+    """Open an HDF-EOS file for swath access.
+
+    Parameters
+    ----------
+    filename : str
+        HDF-EOS file.
+    access : int, optional
+        Access code.
+
+    Returns
+    -------
+    swfid : int
+        Swath file id.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    swfid = _lib.SWopen(filename.encode(), access)
+    _handle_error(swfid)
+    try:
+        yield swfid
+    finally:
+        close(swfid)
+
+def close(swfid):
+    """Close an HDF-EOS file.
+
+    Parameters
+    ----------
+    swfid : int
+        Swath file id.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    status = _lib.SWclose(swfid)
+    _handle_error(status)
+
+@contextmanager
+def attach(swfid, swathname):
+    """Attach to an existing swath structure.
+
+    Parameters
+    ----------
+    swfid : int
+        Swath file id.
+    swathname : str
+        Name of swath to be attached.
+
+    Returns
+    -------
+    swath_id : int
+        Swath identifier.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    swath_id = _lib.SWattach(swfid, swathname.encode())
+    _handle_error(swath_id)
+    try:
+        yield swath_id
+    finally:
+        detach(swath_id)
+
+def detach(swath_id):
+    """Detach from swath structure.
+
+    Parameters
+    ----------
+    swath_id : int
+        Swath identifier.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    status = _lib.SWdetach(swath_id)
+    _handle_error(status)
+
+def inqswath(filename):
+    """Retrieve swath structures defined in HDF-EOS file.
+
+    Parameters
+    ----------
+    filename : str
+        HDF-EOS file.
+
+    Returns
+    -------
+    swathlist : list
+        List of swaths defined in HDF-EOS file.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    strbufsize = ffi.new("int32 *")
+    nswath = _lib.SWinqswath(filename.encode(), ffi.NULL, strbufsize)
+    _handle_error(nswath)
+    if nswath == 0:
+        return []
+    swathlist = ffi.new("char[]", b'\0' * (strbufsize[0] + 1))
+    nswath = _lib.SWinqswath(filename.encode(), swathlist, strbufsize)
+    _handle_error(nswath)
+    return ffi.string(swathlist).decode('ascii').split(',')
+
+def nentries(swath_id, entry_code):
+    """Return number of specified objects in a swath.
+
+    Parameters
+    ----------
+    swath_id : int
+        Swath identifier.
+    entry_code : int
+        Entry code, e.g. HDFE_NENTDIM, HDFE_NENTMAP, HDFE_NENTGFLD or
+        HDFE_NENTFLD (data fields).
+
+    Returns
+    -------
+    nentries, strbufsize : tuple of ints
+       Number of specified entries, number of bytes in descriptive strings.
+    """
+    strbufsize = ffi.new("int32 *")
+    nentries = _lib.SWnentries(swath_id, entry_code, strbufsize)
+    return nentries, strbufsize[0]
+
+def _inqfields(swath_id, entry_code, routine):
+    nfields, strbufsize = nentries(swath_id, entry_code)
+    if nfields <= 0:
+        return [], [], []
+    fieldlist_buffer = ffi.new("char[]", b'\0' * (strbufsize + 1))
+    rank_buffer = ffi.new("int32[]", nfields)
+    numbertype_buffer = ffi.new("int32[]", nfields)
+    status = routine(swath_id, fieldlist_buffer, rank_buffer,
+                     numbertype_buffer)
+    _handle_error(status)
+    fieldlist = ffi.string(fieldlist_buffer).decode('ascii').split(',')
+    return (fieldlist, list(rank_buffer[0:nfields]),
+            list(numbertype_buffer[0:nfields]))
+
+def inqdatafields(swath_id):
+    """Retrieve information about data fields defined in a swath.
+
+    Parameters
+    ----------
+    swath_id : int
+        Swath identifier.
+
+    Returns
+    -------
+    fields : list
+        List of data fields in the swath.
+    ranks : list
+        List of ranks corresponding to the fields
+    numbertypes : list
+        List of numbertypes corresponding to the fields
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    return _inqfields(swath_id, HDFE_NENTFLD, _lib.SWinqdatafields)
+
+def inqgeofields(swath_id):
+    """Retrieve information about geolocation fields defined in a swath.
+
+    Returns the same as inqdatafields.
+    """
+    return _inqfields(swath_id, HDFE_NENTGFLD, _lib.SWinqgeofields)
+
+def inqmaps(swath_id):
+    """Retrieve the dimension maps defined in a swath.
+
+    Parameters
+    ----------
+    swath_id : int
+        Swath identifier.
+
+    Returns
+    -------
+    maps : list
+        (geodim, datadim, offset, increment) of each map.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    nmaps, strbufsize = nentries(swath_id, HDFE_NENTMAP)
+    if nmaps <= 0:
+        return []
+    dimmaps = ffi.new("char[]", b'\0' * (strbufsize + 1))
+    offset = ffi.new("int32[]", nmaps)
+    increment = ffi.new("int32[]", nmaps)
+    status = _lib.SWinqmaps(swath_id, dimmaps, offset, increment)
+    _handle_error(status)
+    names = ffi.string(dimmaps).decode('ascii').split(',')
+    return [tuple(name.split('/')) + (offset[j], increment[j])
+            for j, name in enumerate(names)]
+
+def fieldinfo(swath_id, fieldname):
+    """Return information about a geolocation or data field in a swath.
+
+    Parameters
+    ----------
+    swath_id : int
+        Swath identifier.
+    fieldname : str
+        Name of the field.
+
+    Returns
+    -------
+    rank : int
+        Rank of the field.
+    dims : ndarray
+        Dimension sizes of the field.
+    numbertype : int
+        HDF number type of the field.
+    dimlist : list
+        Names of the field's dimensions.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    _, strbufsize = nentries(swath_id, HDFE_NENTDIM)
+    rank = ffi.new("int32 *")
+    dims_buffer = ffi.new("int32[]", 32)
+    numbertype = ffi.new("int32 *")
+    dimlist = ffi.new("char[]", b'\0' * (strbufsize + 1))
+    status = _lib.SWfieldinfo(swath_id, fieldname.encode(), rank, dims_buffer,
+                              numbertype, dimlist)
+    _handle_error(status)
+
+    dims = np.array(dims_buffer[0:rank[0]], dtype=np.int32)
+    return (rank[0], dims, numbertype[0],
+            ffi.string(dimlist).decode('ascii').split(','))
+
+def diminfo(swath_id, dimname):
+    """Return the size of a swath dimension.
+
+    Parameters
+    ----------
+    swath_id : int
+        Swath identifier.
+    dimname : str
+        Name of the dimension.
+
+    Returns
+    -------
+    size : int
+        Dimension size.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    """
+    size = _lib.SWdiminfo(swath_id, dimname.encode())
+    _handle_error(size)
+    return size
+
+def mapinfo(swath_id, geodim, datadim):
+    """Return the offset and increment of a dimension map.
+
+    A geolocation dimension point j corresponds to the data dimension point
+    offset + increment * j.
+
+    Parameters
+    ----------
+    swath_id : int
+        Swath identifier.
+    geodim, datadim : str
+        Geolocation and data dimension names.
+
+    Returns
+    -------
+    offset, increment : int
+        Dimension map parameters.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails, e.g. there is no such map.
+    """
+    offset = ffi.new("int32 *")
+    increment = ffi.new("int32 *")
+    status = _lib.SWmapinfo(swath_id, geodim.encode(), datadim.encode(),
+                            offset, increment)
+    _handle_error(status)
+    return offset[0], increment[0]
+
+def readfield(swath_id, fieldname, start=None, stride=None, edge=None,
+              out=None):
+    """Read a hyperslab of a swath geolocation or data field.
+
+    Parameters
+    ----------
+    swath_id : int
+        Swath identifier.
+    fieldname : str
+        Name of the field.
+    start : array_like, optional
+        Zero-based starting location of the hyperslab in each dimension.
+        Defaults to the origin.
+    stride : array_like, optional
+        Number of values to step along each dimension.  Defaults to 1.
+    edge : array_like, optional
+        Number of values to read along each dimension.  Defaults to the shape
+        of out if given, otherwise to the rest of the field past start.
+    out : ndarray, optional
+        C-contiguous, writeable array of the field's dtype to read into.
+
+    Returns
+    -------
+    data : ndarray
+        Hyperslab of shape edge; out if it was given.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails.
+    ValueError
+        If out has the wrong dtype or shape, or is not contiguous.
+    """
+    rank, dims, numbertype, _ = fieldinfo(swath_id, fieldname)
+    dtype = numpy_dtype(numbertype)
+
+    if start is None:
+        start = np.zeros(rank)
+    start, startp = int32_pointer(ffi, start)
+    stride, stridep = int32_pointer(ffi, stride)
+    if edge is None and out is not None:
+        edge = out.shape
+    elif edge is None:
+        step = np.ones(rank, dtype=np.int32) if stride is None else stride
+        edge = (dims - start + step - 1) // step
+    edge, edgep = int32_pointer(ffi, edge)
+
+    if out is None:
+        data = np.empty(edge, dtype=dtype)
+    else:
+        data = check_out(out, edge, dtype)
+    datap = ffi.cast("void *", data.ctypes.data)
+
+    status = _lib.SWreadfield(swath_id, fieldname.encode(), startp, stridep,
+                              edgep, datap)
+    _handle_error(status)
+    return data
+
+def _axis_weights(ndata, ngeo, offset, increment):
+    """Bracketing geolocation indices and weights of each data point."""
+    if increment <= 0:
+        raise NotImplementedError("Only dimension maps with a positive "
+                                  "increment are supported.")
+    position = (np.arange(ndata) - offset) / float(increment)
+    lower = np.clip(np.floor(position).astype(np.intp), 0, max(ngeo - 2, 0))
+    upper = np.minimum(lower + 1, ngeo - 1)
+    # Beyond the outermost geolocation points the weights extrapolate.
+    weight = position - lower if ngeo > 1 else np.zeros(ndata)
+    return lower, upper, weight
+
+def expand(field, offsets, increments, shape):
+    """Expand a subsampled field to the data resolution through its
+    dimension maps, by separable linear interpolation.
+
+    Parameters
+    ----------
+    field : array_like
+        Geolocation field, e.g. 5-km latitude.
+    offsets, increments : sequence
+        Dimension map of each axis, see mapinfo.  An offset of 0 and an
+        increment of 1 leave the axis as it is.
+    shape : tuple
+        Shape of the data field.
+
+    Returns
+    -------
+    ndarray
+        float64 field of the given shape.
+    """
+    out = np.asarray(field, dtype=np.float64)
+    for axis, (ndata, offset, increment) in enumerate(zip(shape, offsets,
+                                                          increments)):
+        if offset == 0 and increment == 1 and ndata == out.shape[axis]:
+            continue
+        lower, upper, weight = _axis_weights(ndata, out.shape[axis], offset,
+                                             increment)
+        below = np.take(out, lower, axis=axis)
+        above = np.take(out, upper, axis=axis)
+        weight = weight.reshape([-1 if j == axis else 1
+                                 for j in range(out.ndim)])
+        above -= below
+        above *= weight
+        below += above
+        out = below
+    return out
+
+def expand_lonlat(longitude, latitude, offsets, increments, shape):
+    """Expand subsampled longitude and latitude to the data resolution.
+
+    The interpolation is done on Cartesian unit vectors so that it is not
+    upset by the dateline or the poles.
+
+    Parameters
+    ----------
+    longitude, latitude : array_like
+        Geolocation fields in decimal degrees.
+    offsets, increments, shape
+        See expand.
+
+    Returns
+    -------
+    longitude, latitude : ndarray
+        float64 arrays of the given shape.
+    """
+    lon = np.radians(longitude)
+    lat = np.radians(latitude)
+    coslat = np.cos(lat)
+    x = expand(coslat * np.cos(lon), offsets, increments, shape)
+    y = expand(coslat * np.sin(lon), offsets, increments, shape)
+    z = expand(np.sin(lat), offsets, increments, shape)
+    return (np.degrees(np.arctan2(y, x)),
+            np.degrees(np.arctan2(z, np.hypot(x, y))))
+
+def readgeolocation(swath_id, fieldname, lonname='Longitude',
+                    latname='Latitude'):
+    """Read longitude and latitude at the resolution of a data field.
+
+    The geolocation dimensions are paired with the trailing dimensions of
+    the data field and expanded through the swath's dimension maps.
+
+    Parameters
+    ----------
+    swath_id : int
+        Swath identifier.
+    fieldname : str
+        Name of the data field.
+    lonname, latname : str, optional
+        Names of the geolocation fields.
+
+    Returns
+    -------
+    longitude, latitude : ndarray
+        float64 arrays shaped like the trailing dimensions of the field.
+
+    Raises
+    ------
+    IOError
+        If associated library routine fails, e.g. a dimension has no map.
+    """
+    _, ddims, _, ddimlist = fieldinfo(swath_id, fieldname)
+    _, gdims, _, gdimlist = fieldinfo(swath_id, lonname)
+    ddims = ddims[len(ddims) - len(gdims):]
+    ddimlist = ddimlist[len(ddimlist) - len(gdimlist):]
+
+    offsets, increments = [], []
+    for geodim, datadim in zip(gdimlist, ddimlist):
+        if geodim == datadim:
+            offset, increment = 0, 1
+        else:
+            offset, increment = mapinfo(swath_id, geodim, datadim)
+        offsets.append(offset)
+        increments.append(increment)
+
+    longitude = readfield(swath_id, lonname)
+    latitude = readfield(swath_id, latname)
+    return expand_lonlat(longitude, latitude, offsets, increments,
+                         tuple(int(n) for n in ddims))
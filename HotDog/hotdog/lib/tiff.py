@@ -1,55 +1,82 @@
+import collections
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+import os
+import zlib
+
 import numpy as np
-from cffi import FFI
-
-ffi = FFI()
-ffi.cdef("""
-    typedef ... uint32;                                                     
-    typedef ... tmsize_t;                                                     
-    typedef ... toff_t;          /* file offset */                                  
-    typedef ... ttag_t;          /* directory tag */                                
-    typedef ... tdir_t;          /* directory index */                              
-    typedef uint16_t tsample_t;  /* sample number */                                
-    typedef ... tstrile_t;       /* strip or tile number */                         
-    typedef uint32_t tstrip_t;   /* strip number */                                 
-    typedef ... ttile_t;         /* tile number */                                  
-    typedef int32_t tsize_t;     /* i/o size in bytes */                            
-    typedef void * tdata_t;      /* image data ref */ 
-
-    typedef ... TIFF;
-    void TIFFClose(TIFF *tif);
-    extern TIFF* TIFFOpen(const char*, const char*);
-    extern int TIFFSetField(TIFF*, uint32_t, ...);
-    tsize_t TIFFWriteEncodedTile(TIFF *tif, ttile_t tile, tdata_t buf,
-                                 tsize_t size);
-    tsize_t TIFFWriteEncodedStrip(TIFF *tif, tstrip_t strip, tdata_t buf,
-                                  tsize_t size);
-    tsize_t TIFFWriteTile(TIFF *tif, tdata_t buf, uint32_t x, uint32_t y,
-                          uint32_t z, tsample_t sample);
-        """)
-_lib = ffi.verify("""
-                  #include "tiffio.h"
-                  """,
-                  libraries=['tiff', 'jpeg', 'z'],
-                  include_dirs=['/opt/local/include'],
-                  library_dirs=['/opt/local/lib'])
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from . import _cffi
+from ._util import hyperslab
+
+ffi, _lib = _cffi.load('hotdog.lib._tiff')
 
 tags_bytes = ['XMLPacket']
-tags_int16 = ['PhotometricInterpretation', 'PlanarConfiguration',
-              'SampleFormat']
-tags_int32 = ['BitsPerSample', 'ImageWidth', 'ImageLength', 'RowsPerStrip',
-              'SamplesPerPixel', 'TileWidth', 'TileLength']
-tagnumber = {'ImageWidth': 256,
+tags_int16 = ['Compression', 'PhotometricInterpretation',
+              'PlanarConfiguration', 'Predictor', 'SampleFormat']
+tags_int32 = ['BitsPerSample', 'ImageWidth', 'ImageLength', 'NewSubfileType',
+              'RowsPerStrip', 'SamplesPerPixel', 'TileWidth', 'TileLength']
+tags_double_array = ['ModelPixelScale', 'ModelTiepoint', 'ModelTransformation',
+                     'GeoDoubleParams']
+tags_uint16_array = ['GeoKeyDirectory']
+tags_ascii = ['GeoAsciiParams', 'GDAL_NODATA']
+# libtiff hands these back as uint16, whatever they were set with.
+tags_get_uint16 = tags_int16 + ['BitsPerSample', 'SamplesPerPixel']
+tagnumber = {'NewSubfileType': 254,
+             'ImageWidth': 256,
              'ImageLength': 257,
              'BitsPerSample': 258,
+             'Compression': 259,
              'PhotometricInterpretation': 262,
              'SamplesPerPixel': 277,
              'RowsPerStrip': 278,
              'PlanarConfiguration': 284,
+             'Predictor': 317,
              'TileWidth': 322,
              'TileLength': 323,
              'SampleFormat': 339,
-             'XMLPacket': 700}
+             'XMLPacket': 700,
+             'ModelPixelScale': 33550,
+             'ModelTiepoint': 33922,
+             'ModelTransformation': 34264,
+             'GeoKeyDirectory': 34735,
+             'GeoDoubleParams': 34736,
+             'GeoAsciiParams': 34737,
+             'GDAL_NODATA': 42113}
+
+# Classic TIFF offsets are 32-bit.  Leave room for the directories and the
+# tile/strip offset tables, which are not counted by estimate_nbytes.
+BIGTIFF_THRESHOLD = 2 ** 32 - 2 ** 26
+
+# Tags libtiff does not know about and which have to be registered on each
+# handle before they can be set (libgeotiff and GDAL do the same).
+_FIELD_CUSTOM = 65
+_TIFF_VARIABLE = -1
+_custom_fields = [('ModelPixelScale', 'TIFF_DOUBLE', True),
+                  ('ModelTiepoint', 'TIFF_DOUBLE', True),
+                  ('ModelTransformation', 'TIFF_DOUBLE', True),
+                  ('GeoKeyDirectory', 'TIFF_SHORT', True),
+                  ('GeoDoubleParams', 'TIFF_DOUBLE', True),
+                  ('GeoAsciiParams', 'TIFF_ASCII', False),
+                  ('GDAL_NODATA', 'TIFF_ASCII', False)]
+# libtiff keeps pointers into the field info, so it must live forever.
+_custom_fieldinfo = []
+
+FILETYPE_REDUCEDIMAGE = 1
+
+COMPRESSION_NONE = 1
+COMPRESSION_LZW = 5
+COMPRESSION_ADOBE_DEFLATE = 8
+COMPRESSION_ZSTD = 50000
+
+PREDICTOR_NONE = 1
+PREDICTOR_HORIZONTAL = 2
+PREDICTOR_FLOATINGPOINT = 3
 
 PLANARCONFIG_CONTIG = 1
 PLANARCONFIG_SEPARATE = 2
@@ -73,11 +100,86 @@ def _handle_error(status):
     if status < 0:
         raise IOError("Library routine failed.")
 
+def _handle_failure(status):
+    # For the routines returning 1 on success and 0 on failure.
+    if not status:
+        raise IOError("Library routine failed.")
+
+def _register_custom_fields(tiffp):
+    """Make the GeoTIFF and GDAL tags known to a TIFF handle."""
+    if not _custom_fieldinfo:
+        names = [ffi.new("char[]", name.encode())
+                 for name, _, _ in _custom_fields]
+        info = ffi.new("TIFFFieldInfo[]", len(_custom_fields))
+        for j, (name, datatype, passcount) in enumerate(_custom_fields):
+            info[j].field_tag = tagnumber[name]
+            info[j].field_readcount = _TIFF_VARIABLE
+            info[j].field_writecount = _TIFF_VARIABLE
+            info[j].field_type = getattr(_lib, datatype)
+            info[j].field_bit = _FIELD_CUSTOM
+            info[j].field_oktochange = 1
+            info[j].field_passcount = 1 if passcount else 0
+            info[j].field_name = names[j]
+        _custom_fieldinfo.extend([info, names])
+    info = _custom_fieldinfo[0]
+    status = _lib.TIFFMergeFieldInfo(tiffp, info, len(info))
+    _handle_error(status)
+
+def estimate_nbytes(shape, dtype, tile=None):
+    """Estimate the uncompressed size of an image on disk, counting the
+    padding of edge tiles.
+
+    Parameters
+    ----------
+    shape : tuple
+        (rows, cols) or (rows, cols, samples).
+    dtype : dtype
+        Sample type.
+    tile : tuple, optional
+        Tile length and width, if tiled.
+    """
+    nrow, ncol = shape[:2]
+    if tile is not None:
+        nrow = -(-nrow // tile[0]) * tile[0]
+        ncol = -(-ncol // tile[1]) * tile[1]
+    samples = int(np.prod(shape[2:]))
+    return nrow * ncol * samples * np.dtype(dtype).itemsize
+
 @contextmanager
-def open(filename, mode='r'):
+def open(filename, mode='r', bigtiff=None, nbytes=None):
+    """Corresponds to TIFFOpen.
+
+    Parameters
+    ----------
+    filename : str
+        TIFF file.
+    mode : str, optional
+        libtiff mode string.
+    bigtiff : bool, optional
+        Write BigTIFF, with 64-bit offsets, rather than classic TIFF.  By
+        default this is decided from nbytes.  Ignored unless writing.
+    nbytes : int, optional
+        Estimated size of the image data, see estimate_nbytes.  BigTIFF is
+        chosen when classic TIFF's 4 GB of offsets might not suffice.
+
+    Raises
+    ------
+    IOError
+        If the file cannot be opened.
+    """
+    if bigtiff is None:
+        bigtiff = nbytes is not None and nbytes > BIGTIFF_THRESHOLD
+    if bigtiff and mode[0] == 'w' and not set('48') & set(mode):
+        mode += '8'
     tiffp = _lib.TIFFOpen(filename.encode(), mode.encode())
-    yield tiffp
-    _lib.TIFFClose(tiffp)
+    if tiffp == ffi.NULL:
+        raise IOError("Unable to open {0}.".format(filename))
+    try:
+        if mode[0] in 'wa':
+            _register_custom_fields(tiffp)
+        yield tiffp
+    finally:
+        _lib.TIFFClose(tiffp)
 
 def setfield(tifp, tagname, *args):
     """Corresponds to TIFFSetField.
@@ -105,33 +207,635 @@ def setfield(tifp, tagname, *args):
     elif tagname in tags_int32:
         value = ffi.cast("int", args[0])
         status = _lib.TIFFSetField(tifp, tagnumber[tagname], value);
+    elif tagname in tags_double_array:
+        values = np.ascontiguousarray(args[0], dtype=np.float64).ravel()
+        valuep = ffi.cast("double *", values.ctypes.data)
+        status = _lib.TIFFSetField(tifp, tagnumber[tagname],
+                                   ffi.cast("int", values.size), valuep)
+    elif tagname in tags_uint16_array:
+        values = np.ascontiguousarray(args[0], dtype=np.uint16).ravel()
+        valuep = ffi.cast("uint16_t *", values.ctypes.data)
+        status = _lib.TIFFSetField(tifp, tagnumber[tagname],
+                                   ffi.cast("int", values.size), valuep)
+    elif tagname in tags_ascii:
+        value = ffi.new("char []", str(args[0]).encode('ascii'))
+        status = _lib.TIFFSetField(tifp, tagnumber[tagname], value)
     else:
         raise NotImplementedError("Unrecognized tag.")
 
     _handle_error(status)
 
+def getfield(tifp, tagname):
+    """Corresponds to TIFFGetFieldDefaulted, for the scalar tags describing
+    the image layout.
+
+    Parameters
+    ----------
+    tifp : object
+        File pointer returned by TIFFOpen.
+    tagname : str
+        String specifying a tag.
+
+    Returns
+    -------
+    int
+        Tag value, or the libtiff default if the tag is not set.
+
+    Raises
+    ------
+    IOError
+        If the tag is not set and has no default.
+    """
+    if tagname in tags_get_uint16:
+        value = ffi.new("uint16_t *")
+    elif tagname in tags_int32:
+        value = ffi.new("uint32_t *")
+    else:
+        raise NotImplementedError("Unrecognized tag.")
+    status = _lib.TIFFGetFieldDefaulted(tifp, tagnumber[tagname], value)
+    if status == 0:
+        raise IOError("Tag {0} is not set.".format(tagname))
+    return value[0]
+
+def writecheck(tifp, tiled=True):
+    """Corresponds to TIFFWriteCheck."""
+    _handle_failure(_lib.TIFFWriteCheck(tifp, int(tiled), b"writecheck"))
+
+def writedirectory(tifp):
+    """Corresponds to TIFFWriteDirectory."""
+    _handle_failure(_lib.TIFFWriteDirectory(tifp))
+
+def setdirectory(tifp, dirnum):
+    """Corresponds to TIFFSetDirectory."""
+    _handle_failure(_lib.TIFFSetDirectory(tifp, dirnum))
+
+def deferstrilearraywriting(tifp):
+    """Corresponds to TIFFDeferStrileArrayWriting (libtiff 4.1).  The tile or
+    strip offsets of the current directory are then only written by
+    forcestrilearraywriting, so directories can precede the image data."""
+    _handle_failure(_lib.TIFFDeferStrileArrayWriting(tifp))
+
+def forcestrilearraywriting(tifp):
+    """Corresponds to TIFFForceStrileArrayWriting (libtiff 4.1)."""
+    _handle_failure(_lib.TIFFForceStrileArrayWriting(tifp))
+
+def istiled(tifp):
+    return bool(_lib.TIFFIsTiled(tifp))
+
+def isbigtiff(tifp):
+    return bool(_lib.TIFFIsBigTIFF(tifp))
+
+def tilesize(tifp):
+    return _lib.TIFFTileSize(tifp)
+
+def stripsize(tifp):
+    return _lib.TIFFStripSize(tifp)
+
+def numberoftiles(tifp):
+    return _lib.TIFFNumberOfTiles(tifp)
+
+def numberofstrips(tifp):
+    return _lib.TIFFNumberOfStrips(tifp)
+
+def computestrip(tifp, row, sample=0):
+    """Corresponds to TIFFComputeStrip.  Returns the index of the strip
+    containing the row."""
+    return _lib.TIFFComputeStrip(tifp, row, sample)
+
+def _check_buffer(buffer):
+    if not (buffer.flags.c_contiguous and buffer.flags.writeable):
+        raise ValueError("Output buffer must be C contiguous and writeable.")
+    return ffi.from_buffer(buffer), buffer.nbytes
+
+def readencodedtile(tifp, tile, buffer):
+    """Corresponds to TIFFReadEncodedTile.  Decodes the tile into buffer,
+    a contiguous array, and returns the number of bytes decoded."""
+    bufferp, nbytes = _check_buffer(buffer)
+    status = _lib.TIFFReadEncodedTile(tifp, tile, bufferp, nbytes)
+    _handle_error(status)
+    return status
+
+def readencodedstrip(tifp, strip, buffer):
+    """Corresponds to TIFFReadEncodedStrip.  Decodes the strip into buffer,
+    a contiguous array, and returns the number of bytes decoded."""
+    bufferp, nbytes = _check_buffer(buffer)
+    status = _lib.TIFFReadEncodedStrip(tifp, strip, bufferp, nbytes)
+    _handle_error(status)
+    return status
+
+def numpy_dtype(sampleformat, bitspersample):
+    """Return the NumPy dtype for a SampleFormat and BitsPerSample pair."""
+    kinds = {SAMPLEFORMAT_UINT: 'u', SAMPLEFORMAT_INT: 'i',
+             SAMPLEFORMAT_IEEEFP: 'f', SAMPLEFORMAT_COMPLEXIEEEFP: 'c'}
+    if sampleformat not in kinds or bitspersample % 8:
+        raise NotImplementedError("Unsupported sample format "
+                                  "{0}/{1}.".format(sampleformat,
+                                                    bitspersample))
+    return np.dtype(kinds[sampleformat] + str(bitspersample // 8))
+
+class TIFFArray(object):
+    """Lazy, array-like view of the current image of an open TIFF.
+
+    Indexing decodes only the tiles or strips overlapping the requested
+    window.  A tile or strip that exactly covers a contiguous part of the
+    output is decoded straight into it; the others go through one reused
+    scratch buffer.  The object is only valid while the file remains open.
+
+    The shape is (rows, cols) for single sample images and
+    (rows, cols, samples) otherwise, whatever the planar configuration.
+
+    Parameters
+    ----------
+    tifp : object
+        File pointer returned by TIFFOpen.
+
+    Examples
+    --------
+    >>> with open(filename) as tifp:
+    ...     window = TIFFArray(tifp)[1000:1256, 2000:2512]
+    """
+    def __init__(self, tifp):
+        self.tifp = tifp
+        nrow = getfield(tifp, 'ImageLength')
+        ncol = getfield(tifp, 'ImageWidth')
+        self.samples = getfield(tifp, 'SamplesPerPixel')
+        self.planarconfig = getfield(tifp, 'PlanarConfiguration')
+        self.dtype = numpy_dtype(getfield(tifp, 'SampleFormat'),
+                                 getfield(tifp, 'BitsPerSample'))
+        self.shape = (nrow, ncol) + ((self.samples,) if self.samples > 1
+                                     else ())
+        self.tiled = istiled(tifp)
+        if self.tiled:
+            self.block = (getfield(tifp, 'TileLength'),
+                          getfield(tifp, 'TileWidth'))
+        else:
+            self.block = (min(getfield(tifp, 'RowsPerStrip'), nrow), ncol)
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return "TIFFArray(shape={0}, dtype={1})".format(self.shape,
+                                                        self.dtype)
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[...]
+        return data if dtype is None else data.astype(dtype)
+
+    def __getitem__(self, key):
+        start, stride, edge, squeeze, flip = hyperslab(key, self.shape)
+        if 0 in edge:
+            data = np.zeros(edge, dtype=self.dtype)
+        else:
+            stop = [s + (n - 1) * k + 1 for s, n, k in zip(start, edge, stride)]
+            data = self.read_window(start[0], stop[0], start[1], stop[1])
+            index = tuple(slice(None, None, k) for k in stride[:2])
+            if self.ndim == 3:
+                index += (slice(start[2], stop[2], stride[2]),)
+            data = data[index]
+        if flip:
+            index = [slice(None)] * len(edge)
+            for axis in flip:
+                index[axis] = slice(None, None, -1)
+            data = data[tuple(index)]
+        if squeeze:
+            data = data.reshape([n for j, n in enumerate(data.shape)
+                                 if j not in squeeze])
+        return data
+
+    def read_window(self, row0, row1, col0, col1, out=None):
+        """Decode the rows row0:row1 and columns col0:col1.
+
+        Parameters
+        ----------
+        row0, row1, col0, col1 : int
+            Window bounds, as for slicing.
+        out : ndarray, optional
+            Preallocated output of the window's shape and the image dtype.
+
+        Returns
+        -------
+        ndarray
+            The window, including all samples.
+        """
+        shape = (row1 - row0, col1 - col0) + self.shape[2:]
+        if out is None:
+            out = np.empty(shape, dtype=self.dtype)
+        elif out.shape != shape or out.dtype != self.dtype:
+            raise ValueError("Output must be {0} {1}.".format(shape,
+                                                              self.dtype))
+
+        separate = (self.planarconfig == PLANARCONFIG_SEPARATE and
+                    self.samples > 1)
+        block_length, block_width = self.block
+        if separate:
+            scratch = np.empty(self.block, dtype=self.dtype)
+            samples = range(self.samples)
+        else:
+            scratch = np.empty(self.block + self.shape[2:], dtype=self.dtype)
+            samples = [0]
+        target = out if self.ndim == 3 else out[..., np.newaxis]
+
+        for sample in samples:
+            for y in range(row0 - row0 % block_length, row1, block_length):
+                for x in range(col0 - col0 % block_width, col1, block_width):
+                    rows = slice(max(y, row0), min(y + block_length, row1))
+                    cols = slice(max(x, col0), min(x + block_width, col1))
+                    dest = target[rows.start - row0:rows.stop - row0,
+                                  cols.start - col0:cols.stop - col0]
+                    if separate:
+                        dest = dest[..., sample]
+                    elif self.ndim == 2:
+                        dest = dest[..., 0]
+                    if self.tiled:
+                        block = scratch
+                    else:
+                        # The last strip may be short.
+                        nrows = min(block_length, self.shape[0] - y)
+                        block = scratch[:nrows]
+                    covers = (dest.shape == block.shape and
+                              dest.flags.c_contiguous)
+                    buffer = dest if covers else block
+                    if self.tiled:
+                        tile = computetile(self.tifp, x, y, 0, sample)
+                        readencodedtile(self.tifp, tile, buffer)
+                    else:
+                        strip = computestrip(self.tifp, y, sample)
+                        readencodedstrip(self.tifp, strip, buffer)
+                    if not covers:
+                        dest[...] = block[rows.start - y:rows.stop - y,
+                                          cols.start - x:cols.stop - x]
+        return out
+
 def close(tiffp):
     _lib.TIFFClose(tiffp)
 
-def writeencodedstrip(tiffp, stripnum, imagedata): 
-    if imagedata.dtype == np.float32:
-        datap = ffi.cast("float *", imagedata.ctypes.data)
-        nbytes = imagedata.size * 4
-    elif imagedata.dtype == np.uint8:
-        datap = ffi.cast("uint8_t *", imagedata.ctypes.data)
-        nbytes = imagedata.size * 1
-    else:
-        raise NotImplementedError("untested datatype")
-    status = _lib.TIFFWriteEncodedStrip(tiffp, stripnum, datap, nbytes)
+def _contiguous(imagedata, copy=True):
+    """View imagedata as a C contiguous, native byte order array, copying
+    only if it is not one already.
+
+    Raises
+    ------
+    ValueError
+        If a copy is needed but copy is False.
+    NotImplementedError
+        If the dtype has no TIFF SampleFormat.
+    """
+    array = np.asarray(imagedata)
+    sampleformat(array.dtype)
+    if not (array.flags.c_contiguous and array.dtype.isnative):
+        if not copy:
+            raise ValueError("Image data is not C contiguous in native byte "
+                             "order and copy is False.")
+        array = np.ascontiguousarray(array,
+                                     dtype=array.dtype.newbyteorder('='))
+    return array
+
+def writeencodedstrip(tiffp, stripnum, imagedata, copy=True):
+    """Corresponds to TIFFWriteEncodedStrip.
+
+    Parameters
+    ----------
+    tiffp : object
+        File pointer returned by TIFFOpen.
+    stripnum : int
+        Strip index.
+    imagedata : array_like
+        Strip data of any dtype with a TIFF SampleFormat; anything
+        supporting the buffer protocol is accepted.
+    copy : bool, optional
+        If False, raise ValueError rather than copy data that is not C
+        contiguous in native byte order.
+
+    Raises
+    ------
+    IOError
+        If the library routine fails.
+    """
+    array = _contiguous(imagedata, copy)
+    status = _lib.TIFFWriteEncodedStrip(tiffp, stripnum, ffi.from_buffer(array),
+                                        array.nbytes)
     _handle_error(status)
 
-def writetile(tiffp, imagedata, x, y, z=0, sample=0):
-    if imagedata.dtype == np.float32:
-        datap = ffi.cast("float *", imagedata.ctypes.data)
+def writetile(tiffp, imagedata, x, y, z=0, sample=0, copy=True):
+    """Corresponds to TIFFWriteTile.
+
+    Parameters
+    ----------
+    tiffp : object
+        File pointer returned by TIFFOpen.
+    imagedata : array_like
+        Full-sized tile of any dtype with a TIFF SampleFormat; anything
+        supporting the buffer protocol is accepted.
+    x, y, z, sample : int
+        Pixel coordinates and sample of the tile.
+    copy : bool, optional
+        If False, raise ValueError rather than copy data that is not C
+        contiguous in native byte order.
+
+    Raises
+    ------
+    IOError
+        If the library routine fails.
+    """
+    _writetile(tiffp, _contiguous(imagedata, copy), x, y, z, sample)
+
+def sampleformat(dtype):
+    """Return the TIFF SampleFormat for a NumPy dtype."""
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'f':
+        return SAMPLEFORMAT_IEEEFP
+    elif dtype.kind == 'i':
+        return SAMPLEFORMAT_INT
+    elif dtype.kind == 'u':
+        return SAMPLEFORMAT_UINT
+    elif dtype.kind == 'c':
+        return SAMPLEFORMAT_COMPLEXIEEEFP
+    raise NotImplementedError("Unsupported dtype {0}.".format(dtype))
+
+def _writetile(tiffp, buffer, x, y, z=0, sample=0):
+    status = _lib.TIFFWriteTile(tiffp, ffi.from_buffer(buffer), x, y, z, sample)
+    _handle_error(status)
+
+def write_tiled(tiffp, array, tile=(512, 512),
+                planarconfig=PLANARCONFIG_CONTIG,
+                photometric=PHOTOMETRIC_MINISBLACK, fill=0):
+    """Write a whole array as a tiled image.
+
+    The image tags are derived from the array, then the array is walked in
+    tile order.  Each tile is a strided view; it goes to libtiff as is when
+    it happens to be contiguous and is otherwise gathered into a single
+    scratch buffer that is reused for every tile and padded with fill along
+    the right and bottom edges.
+
+    Parameters
+    ----------
+    tiffp : object
+        File pointer returned by TIFFOpen.
+    array : ndarray
+        Image data, (rows, cols) or (rows, cols, bands) for
+        PLANARCONFIG_CONTIG and (bands, rows, cols) for
+        PLANARCONFIG_SEPARATE.
+    tile : tuple, optional
+        Tile length and width; both must be multiples of 16.
+    planarconfig : int, optional
+        PLANARCONFIG_CONTIG or PLANARCONFIG_SEPARATE.
+    photometric : int, optional
+        PhotometricInterpretation tag value.
+    fill : scalar, optional
+        Value used to pad the edge tiles.
+
+    Raises
+    ------
+    IOError
+        If a library routine fails.
+    """
+    array = np.asarray(array)
+    tile_length, tile_width = tile
+    if tile_length % 16 or tile_width % 16:
+        raise ValueError("Tile dimensions must be multiples of 16.")
+    if planarconfig == PLANARCONFIG_SEPARATE:
+        if array.ndim != 3:
+            raise ValueError("Band separate images must be (bands, rows, cols).")
+        bands = array
+        scratch = np.empty((tile_length, tile_width), dtype=array.dtype)
+    elif array.ndim in (2, 3):
+        # A single pixel interleaved "band".
+        bands = array[np.newaxis]
+        scratch = np.empty((tile_length, tile_width) + array.shape[2:],
+                           dtype=array.dtype)
+    else:
+        raise ValueError("Images must be (rows, cols) or (rows, cols, bands).")
+    nrow, ncol = bands.shape[1:3]
+    if planarconfig == PLANARCONFIG_SEPARATE:
+        spp = bands.shape[0]
     else:
-        raise NotImplementedError("untested datatype")
-    status = _lib.TIFFWriteTile(tiffp, datap, x, y, z, sample)
+        spp = array.shape[2] if array.ndim == 3 else 1
+
+    setfield(tiffp, 'ImageWidth', ncol)
+    setfield(tiffp, 'ImageLength', nrow)
+    setfield(tiffp, 'SamplesPerPixel', spp)
+    setfield(tiffp, 'BitsPerSample', array.dtype.itemsize * 8)
+    setfield(tiffp, 'SampleFormat', sampleformat(array.dtype))
+    setfield(tiffp, 'PlanarConfiguration', planarconfig)
+    setfield(tiffp, 'PhotometricInterpretation', photometric)
+    setfield(tiffp, 'TileWidth', tile_width)
+    setfield(tiffp, 'TileLength', tile_length)
+
+    if not array.dtype.isnative:
+        scratch = scratch.astype(scratch.dtype.newbyteorder('='))
+    for sample, band in enumerate(bands):
+        for y in range(0, nrow, tile_length):
+            for x in range(0, ncol, tile_width):
+                view = band[y:y + tile_length, x:x + tile_width]
+                if (view.shape == scratch.shape and view.flags.c_contiguous
+                        and view.dtype.isnative):
+                    _writetile(tiffp, view, x, y, 0, sample)
+                    continue
+                length, width = view.shape[:2]
+                scratch[:length, :width] = view
+                if length < tile_length:
+                    scratch[length:] = fill
+                if width < tile_width:
+                    scratch[:length, width:] = fill
+                _writetile(tiffp, scratch, x, y, 0, sample)
+
+def computetile(tiffp, x, y, z=0, sample=0):
+    """Corresponds to TIFFComputeTile.  Returns the index of the tile
+    containing pixel (x, y)."""
+    return _lib.TIFFComputeTile(tiffp, x, y, z, sample)
+
+def writerawtile(tiffp, tile, data):
+    """Corresponds to TIFFWriteRawTile.
+
+    Parameters
+    ----------
+    tiffp : object
+        File pointer returned by TIFFOpen.
+    tile : int
+        Tile index, see computetile.
+    data : buffer
+        Tile data, already predicted and compressed as the Compression and
+        Predictor tags say.
+
+    Raises
+    ------
+    IOError
+        If the library routine fails.
+    """
+    nbytes = memoryview(data).nbytes
+    status = _lib.TIFFWriteRawTile(tiffp, tile, ffi.from_buffer(data), nbytes)
     _handle_error(status)
 
+def _predict(tile, predictor, byteswap=False):
+    """Apply a TIFF predictor to a tile the way libtiff would on write.
+
+    The tile is (rows, cols) or, pixel interleaved, (rows, cols, samples).
+    Returns a contiguous array holding the bytes to compress.
+    """
+    tile = np.ascontiguousarray(tile)
+    stride = tile.shape[2] if tile.ndim == 3 else 1
+    rows = tile.reshape(tile.shape[0], -1)
+    if predictor == PREDICTOR_HORIZONTAL:
+        if tile.dtype.kind not in 'iu':
+            raise ValueError("The horizontal predictor needs integer data.")
+        out = rows.copy()
+        out[:, stride:] -= rows[:, :-stride]
+    elif predictor == PREDICTOR_FLOATINGPOINT:
+        if tile.dtype.kind != 'f':
+            raise ValueError("The floating point predictor needs float data.")
+        # Split each row into byte planes, most significant byte first, then
+        # difference neighbouring bytes.  The result is byte order neutral.
+        nrows, count = rows.shape
+        itemsize = rows.dtype.itemsize
+        bigendian = rows.astype(rows.dtype.newbyteorder('>'))
+        planes = bigendian.view(np.uint8).reshape(nrows, count, itemsize)
+        planes = planes.transpose(0, 2, 1).reshape(nrows, count * itemsize)
+        out = planes.copy()
+        out[:, stride:] -= planes[:, :-stride]
+        return out
+    elif predictor == PREDICTOR_NONE:
+        out = rows
+    else:
+        raise NotImplementedError("Unsupported predictor {0}.".format(predictor))
+    if byteswap:
+        out = out.byteswap()
+    return out
+
+def _compress(data, compression, level):
+    if compression == COMPRESSION_NONE:
+        return data
+    elif compression == COMPRESSION_ADOBE_DEFLATE:
+        return zlib.compress(data, level)
+    elif compression == COMPRESSION_ZSTD:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise NotImplementedError("Unsupported compression {0}.".format(compression))
+
+def encodetile(tile, compression=COMPRESSION_ADOBE_DEFLATE,
+               predictor=PREDICTOR_NONE, level=6, byteswap=False):
+    """Predict and compress a tile, ready for writerawtile.
+
+    Parameters
+    ----------
+    tile : ndarray
+        Full-sized tile, (rows, cols) or (rows, cols, samples).
+    compression : int, optional
+        COMPRESSION_NONE, COMPRESSION_ADOBE_DEFLATE or COMPRESSION_ZSTD.
+    predictor : int, optional
+        PREDICTOR_NONE, PREDICTOR_HORIZONTAL or PREDICTOR_FLOATINGPOINT.
+    level : int, optional
+        Compression level.
+    byteswap : bool, optional
+        True if the file byte order differs from the native one.
+
+    Returns
+    -------
+    buffer
+        Encoded tile.
+    """
+    return _compress(_predict(tile, predictor, byteswap), compression, level)
+
+class ParallelTileWriter(object):
+    """Compress tiles on a thread pool and write them in submission order
+    with TIFFWriteRawTile.
+
+    zlib and zstandard release the GIL while compressing, so the tiles are
+    encoded concurrently while libtiff itself is only ever called from the
+    thread that owns the writer.  LZW is not offered as there is no encoder
+    available that releases the GIL; set the Compression tag and use
+    writetile for it instead.
+
+    Set the image and tile tags before creating the writer.  As with
+    writetile, edge tiles must be padded to the full tile size.
+
+    Parameters
+    ----------
+    tiffp : object
+        File pointer returned by TIFFOpen.
+    compression : int, optional
+        COMPRESSION_NONE, COMPRESSION_ADOBE_DEFLATE or COMPRESSION_ZSTD (needs
+        the zstandard package and a libtiff built with ZSTD support).
+    predictor : int, optional
+        PREDICTOR_NONE, PREDICTOR_HORIZONTAL (integer data) or
+        PREDICTOR_FLOATINGPOINT (float data).
+    level : int, optional
+        Compression level.
+    threads : int, optional
+        Number of compression threads, defaults to the number of CPUs.
+    maxpending : int, optional
+        Number of tiles that may be in flight before write blocks, defaults
+        to twice the number of threads.
+    settags : bool, optional
+        Set the Compression and Predictor tags.  Pass False when the
+        directory has already been written with them.
+    """
+    def __init__(self, tiffp, compression=COMPRESSION_ADOBE_DEFLATE,
+                 predictor=PREDICTOR_NONE, level=6, threads=None,
+                 maxpending=None, settags=True):
+        if compression == COMPRESSION_ZSTD and zstandard is None:
+            raise NotImplementedError("ZSTD compression requires the "
+                                      "zstandard package.")
+        if compression not in (COMPRESSION_NONE, COMPRESSION_ADOBE_DEFLATE,
+                               COMPRESSION_ZSTD):
+            raise NotImplementedError("Unsupported compression "
+                                      "{0}.".format(compression))
+        if compression == COMPRESSION_NONE and predictor != PREDICTOR_NONE:
+            raise ValueError("A predictor needs compression.")
+        if settags:
+            setfield(tiffp, 'Compression', compression)
+            if predictor != PREDICTOR_NONE:
+                setfield(tiffp, 'Predictor', predictor)
+
+        self._tiffp = tiffp
+        self._encoding = dict(compression=compression, predictor=predictor,
+                              level=level,
+                              byteswap=bool(_lib.TIFFIsByteSwapped(tiffp)))
+        threads = threads or os.cpu_count() or 1
+        self._maxpending = maxpending or 2 * threads
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._pending = collections.deque()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            for _, future in self._pending:
+                future.cancel()
+            self._pending.clear()
+            self._executor.shutdown()
+
+    def write(self, tile, x, y, z=0, sample=0):
+        """Queue the tile containing pixel (x, y) for compression."""
+        index = computetile(self._tiffp, x, y, z, sample)
+        future = self._executor.submit(encodetile, tile, **self._encoding)
+        self._pending.append((index, future))
+        self._flush(self._maxpending)
+
+    def _flush(self, limit):
+        """Write finished tiles in order, waiting until at most limit remain
+        pending."""
+        while self._pending and (len(self._pending) > limit or
+                                 self._pending[0][1].done()):
+            index, future = self._pending.popleft()
+            writerawtile(self._tiffp, index, future.result())
+
+    def close(self):
+        """Write the remaining tiles and stop the threads."""
+        try:
+            self._flush(0)
+        finally:
+            self._executor.shutdown()
+
 if __name__ == "__main__":
     pass
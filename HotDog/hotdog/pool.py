@@ -0,0 +1,194 @@
+"""Bounded LRU pool of open HDF file and grid handles.
+
+A service that touches the same granules over and over would otherwise pay
+for SDstart, GDopen and GDattach on every request.  The pool keeps the most
+recently used identifiers open and closes the coldest ones once it grows
+past its size limit.
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import os
+import threading
+
+from .core import DFACC_READ
+from .lib import gd as GD
+from .lib import sd as SD
+
+
+class HandlePool(object):
+    """Least-recently-used cache of SD file, GD file and grid identifiers.
+
+    Identifiers are borrowed through the sd, gd and grid context managers and
+    stay open after the with-block exits so they can be reused.  Handles that
+    are currently borrowed are never evicted, so the pool may temporarily
+    hold more than maxsize handles.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of idle handles kept open.
+
+    Examples
+    --------
+    >>> with HandlePool(maxsize=64) as pool:
+    ...     with pool.grid(filename, 'TOMS Level 3') as gridid:
+    ...         gridsize, upleft, lowright = GD.gridinfo(gridid)
+    """
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._handles = OrderedDict()
+        self._inuse = {}
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._handles)
+
+    def __contains__(self, key):
+        return key in self._handles
+
+    def _release(self, key, handle):
+        """Close a single handle."""
+        kind = key[0]
+        if kind == 'sd':
+            SD.end(handle)
+        elif kind == 'gd':
+            GD.close(handle)
+        else:
+            GD.detach(handle)
+
+    def _discard(self, key):
+        """Close a handle and anything that depends on it.  Grids must be
+        detached before their file is closed."""
+        if key[0] == 'gd':
+            for dependent in [k for k in self._handles
+                              if k[0] == 'grid' and k[1] == key[1]]:
+                self._discard(dependent)
+        handle = self._handles.pop(key)
+        self._inuse.pop(key, None)
+        self._release(key, handle)
+
+    def _evict(self):
+        """Close least recently used idle handles until within maxsize."""
+        for key in list(self._handles):
+            if len(self._handles) <= self.maxsize:
+                break
+            if key not in self._handles or self._inuse.get(key, 0) > 0:
+                continue
+            if key[0] == 'gd' and any(k[0] == 'grid' and k[1] == key[1] and
+                                      self._inuse.get(k, 0) > 0
+                                      for k in self._handles):
+                continue
+            self._discard(key)
+
+    @contextmanager
+    def _borrow(self, key, opener):
+        with self._lock:
+            if key in self._handles:
+                self._handles.move_to_end(key)
+            else:
+                self._handles[key] = opener()
+            self._inuse[key] = self._inuse.get(key, 0) + 1
+            handle = self._handles[key]
+        try:
+            yield handle
+        finally:
+            with self._lock:
+                self._inuse[key] -= 1
+                self._evict()
+
+    def sd(self, filename, access=DFACC_READ):
+        """Borrow an SD interface file identifier (see sd.start).
+
+        Parameters
+        ----------
+        filename : str
+            HDF file.
+        access : int, optional
+            Access mode.
+
+        Raises
+        ------
+        IOError
+            If associated library routine fails.
+        """
+        filename = os.path.realpath(filename)
+        return self._borrow(('sd', filename, access),
+                            lambda: SD.startfile(filename, access))
+
+    def gd(self, filename, access=DFACC_READ):
+        """Borrow a grid file identifier (see gd.open).
+
+        Parameters
+        ----------
+        filename : str
+            HDF-EOS file.
+        access : int, optional
+            Access mode.
+
+        Raises
+        ------
+        IOError
+            If associated library routine fails.
+        """
+        filename = os.path.realpath(filename)
+        return self._borrow(('gd', filename, access),
+                            lambda: GD.openfile(filename, access))
+
+    @contextmanager
+    def grid(self, filename, gridname, access=DFACC_READ):
+        """Borrow a grid identifier (see gd.attach).
+
+        The grid file is opened through the pool as well and is kept open at
+        least as long as the grid is attached.
+
+        Parameters
+        ----------
+        filename : str
+            HDF-EOS file.
+        gridname : str
+            Name of grid to be attached.
+        access : int, optional
+            Access mode.
+
+        Raises
+        ------
+        IOError
+            If associated library routine fails.
+        """
+        filename = os.path.realpath(filename)
+        with self.gd(filename, access) as gdfid:
+            key = ('grid', filename, gridname, access)
+            opener = lambda: GD.attachgrid(gdfid, gridname)
+            with self._borrow(key, opener) as gridid:
+                yield gridid
+
+    def evict(self, filename):
+        """Close every idle handle on a file, e.g. after it has changed.
+
+        Parameters
+        ----------
+        filename : str
+            File whose handles are to be closed.
+        """
+        filename = os.path.realpath(filename)
+        with self._lock:
+            keys = [k for k in self._handles if k[1] == filename]
+            if any(self._inuse.get(k, 0) > 0 for k in keys):
+                raise RuntimeError("{0} is in use.".format(filename))
+            for key in keys:
+                if key in self._handles:
+                    self._discard(key)
+
+    def close(self):
+        """Close every handle in the pool."""
+        with self._lock:
+            for key in [k for k in self._handles if k[0] == 'grid']:
+                self._discard(key)
+            for key in list(self._handles):
+                self._discard(key)
@@ -0,0 +1,127 @@
+"""Stack one dataset from many granules into a (time, ...) cube.
+
+The HDF library is not thread-safe, so granules are read in worker
+processes.  The cube is an .npy file that every worker memory-maps, and
+each reads its granule with SDreaddata straight into its own time slice, so
+no array data is pickled between processes.
+"""
+import multiprocessing
+import re
+
+import numpy as np
+
+from .lib import sd as SD
+
+# Dates embedded in granule names: TOMS/OMI level 3 "2000m0101" and MODIS
+# "A2000001".
+_date_patterns = [(re.compile(r'(\d{4})m(\d{2})(\d{2})'), 'ymd'),
+                  (re.compile(r'\.A(\d{4})(\d{3})'), 'yj')]
+
+
+def granule_time(filename):
+    """Parse the date out of a granule's file name.
+
+    Parameters
+    ----------
+    filename : str
+        Granule file name, e.g. TOMS-EP_L3-TOMSEPL3_2000m0101_v8.HDF.
+
+    Returns
+    -------
+    numpy.datetime64
+        Day of the granule.
+
+    Raises
+    ------
+    ValueError
+        If the file name has no recognized date.
+    """
+    for pattern, kind in _date_patterns:
+        match = pattern.search(filename)
+        if match is None:
+            continue
+        if kind == 'ymd':
+            return np.datetime64('-'.join(match.groups()), 'D')
+        year, doy = match.groups()
+        return (np.datetime64(year + '-01-01', 'D') +
+                np.timedelta64(int(doy) - 1, 'D'))
+    raise ValueError("No date in {0}.".format(filename))
+
+
+def _read_granule(task):
+    """Read one granule into its slice of the cube; runs in a worker."""
+    outfile, index, filename, dataset, start, stride, edge, decode = task
+    cube = np.load(outfile, mmap_mode='r+')
+    with SD.start(filename) as sdid:
+        with SD.select(sdid, SD.nametoindex(sdid, dataset)) as sds_id:
+            SD.readdata(sds_id, start=start, stride=stride, edge=edge,
+                        out=cube[index], decode=decode)
+    cube.flush()
+
+
+def stack(filenames, dataset, outfile, start=None, stride=None, edge=None,
+          decode=False, times=None, processes=None):
+    """Stack a dataset from many granules into a memory-mapped cube.
+
+    Parameters
+    ----------
+    filenames : list
+        HDF files, all with the dataset at the same shape.
+    dataset : str
+        SD dataset name, e.g. 'Ozone'.
+    outfile : str
+        .npy file to hold the cube; overwritten.
+    start, stride, edge : array_like, optional
+        Hyperslab to read from each granule, see sd.readdata.
+    decode : bool, optional
+        Decode fill values, valid range and scaling, see sd.readdata.
+    times : array_like, optional
+        Time of each granule.  Parsed from the file names by default.
+    processes : int, optional
+        Number of worker processes, defaults to the number of CPUs.
+
+    Returns
+    -------
+    cube : numpy.memmap
+        (time, ...) array, sorted by time.
+    times : ndarray
+        Time coordinate.
+
+    Raises
+    ------
+    IOError
+        If a granule cannot be read.
+    """
+    filenames = list(filenames)
+    if times is None:
+        times = [granule_time(filename) for filename in filenames]
+    times = np.asarray(times)
+    order = np.argsort(times, kind='stable')
+    filenames = [filenames[j] for j in order]
+    times = times[order]
+
+    info = SD.catalog(filenames[0])['datasets'][dataset]
+    dimsizes = np.array(info['shape'])
+    if edge is None:
+        first = np.zeros(len(dimsizes), dtype=int) if start is None else start
+        step = np.ones(len(dimsizes), dtype=int) if stride is None else stride
+        edge = (dimsizes - np.asarray(first) + step - 1) // step
+    edge = tuple(int(n) for n in edge)
+    dtype = SD.numpy_dtype(info['datatype'])
+    if decode:
+        dtype = np.float64 if dtype == np.float64 else np.float32
+
+    cube = np.lib.format.open_memmap(outfile, mode='w+', dtype=dtype,
+                                     shape=(len(filenames),) + edge)
+    del cube
+
+    tasks = [(outfile, j, filename, dataset, start, stride, edge, decode)
+             for j, filename in enumerate(filenames)]
+    pool = multiprocessing.Pool(processes)
+    try:
+        for _ in pool.imap_unordered(_read_granule, tasks):
+            pass
+    finally:
+        pool.close()
+        pool.join()
+    return np.load(outfile, mmap_mode='r+'), times
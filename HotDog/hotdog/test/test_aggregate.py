@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+import pkg_resources
+
+from hotdog import aggregate
+from hotdog import cache
+from hotdog.lib import sd as SD
+import hotdog
+
+
+class TestAggregate(unittest.TestCase):
+
+    def setUp(self):
+        relpath = "data/TOMS-EP_L3-TOMSEPL3_2000m0101_v8.HDF"
+        self.sdfile = pkg_resources.resource_filename(hotdog.__name__,
+                                                       relpath)
+
+    def tearDown(self):
+        pass
+
+    def test_accumulator(self):
+        fields = np.random.rand(10, 4, 5)
+        fields[np.random.rand(10, 4, 5) < 0.3] = np.nan
+        fields[:, 0, 0] = np.nan
+        fields[3, 1, 1] = -999.0
+
+        first = aggregate.Accumulator((4, 5))
+        second = aggregate.Accumulator((4, 5))
+        for field in fields[:4]:
+            first.add(field, fill_value=-999.0)
+        for field in fields[4:]:
+            second.add(field, fill_value=-999.0)
+        acc = first.merge(second)
+
+        fields[3, 1, 1] = np.nan
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            np.testing.assert_allclose(acc.mean, np.nanmean(fields, axis=0))
+            np.testing.assert_allclose(acc.variance(ddof=1),
+                                       np.nanvar(fields, axis=0, ddof=1))
+            np.testing.assert_allclose(acc.minimum, np.nanmin(fields, axis=0))
+            np.testing.assert_allclose(acc.maximum, np.nanmax(fields, axis=0))
+        np.testing.assert_array_equal(acc.count,
+                                      np.sum(~np.isnan(fields), axis=0))
+        self.assertTrue(np.isnan(acc.mean[0, 0]))
+
+    def test_aggregate(self):
+        with SD.start(self.sdfile) as sdid:
+            with SD.select(sdid, SD.nametoindex(sdid, 'Ozone')) as sds_id:
+                ozone = SD.readdata(sds_id, decode=True)
+
+        times = np.array(['2000-01-01', '2000-01-02', '2000-02-01'],
+                         dtype='datetime64[D]')
+        monthly = aggregate.aggregate([self.sdfile] * 3, 'Ozone',
+                                      by=aggregate.calendar_month,
+                                      times=times, processes=2)
+        self.assertEqual(sorted(monthly), [1, 2])
+        np.testing.assert_array_equal(monthly[1].count, 2 * ~np.isnan(ozone))
+        np.testing.assert_allclose(monthly[1].mean, ozone, rtol=1e-6)
+        np.testing.assert_array_equal(monthly[2].std()[~np.isnan(ozone)], 0)
+
+    def test_aggregate_cached(self):
+        # Rerunning under a field cache serves every granule from it.
+        cache_dir = tempfile.mkdtemp()
+        cache.install(cache.FieldCache(cache_dir, mmap=True))
+        try:
+            first = aggregate.aggregate([self.sdfile] * 2, 'Ozone',
+                                        times=['2000-01-01', '2000-01-02'],
+                                        processes=1)
+            second = aggregate.aggregate([self.sdfile] * 2, 'Ozone',
+                                         times=['2000-01-01', '2000-01-02'],
+                                         processes=1)
+        finally:
+            cache.install(None)
+            shutil.rmtree(cache_dir)
+        np.testing.assert_array_equal(second.count, first.count)
+        np.testing.assert_array_equal(second.sum, first.sum)
+
+
+if __name__ == "__main__":
+    unittest.main()
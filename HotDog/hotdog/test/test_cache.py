@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pkg_resources
+
+from hotdog.cache import FieldCache, install
+from hotdog.lib import gd as GD
+from hotdog.lib import sd as SD
+import hotdog
+
+
+class TestFieldCache(unittest.TestCase):
+
+    def setUp(self):
+        relpath = "data/TOMS-EP_L3-TOMSEPL3_2000m0101_v8.HDF"
+        self.sdfile = pkg_resources.resource_filename(hotdog.__name__,
+                                                       relpath)
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_read(self):
+        with SD.start(self.sdfile) as sdid:
+            with SD.select(sdid, SD.nametoindex(sdid, 'Ozone')) as sds_id:
+                ozone = SD.readdata(sds_id, decode=True)
+
+        cache = FieldCache(self.cache_dir, chunks=(64, 64))
+        data = cache.read(self.sdfile, 'Ozone')
+        np.testing.assert_array_equal(data, ozone)
+        self.assertEqual(len(cache.entries()), 1)
+
+        # Served from the cache, which differs for a different hyperslab.
+        np.testing.assert_array_equal(cache.read(self.sdfile, 'Ozone'), ozone)
+        self.assertEqual(len(cache.entries()), 1)
+        window = cache.read(self.sdfile, 'Ozone', start=[40, 44],
+                            edge=[26, 47])
+        np.testing.assert_array_equal(window, ozone[40:66, 44:91])
+        self.assertEqual(len(cache.entries()), 2)
+
+    def test_install(self):
+        cache = FieldCache(self.cache_dir)
+        install(cache)
+        try:
+            with SD.start(self.sdfile) as sdid:
+                with SD.select(sdid, SD.nametoindex(sdid, 'Ozone')) as sds_id:
+                    ozone = SD.readdata(sds_id, decode=True)
+                    cached = SD.readdata(sds_id, decode=True)
+                    SD.readdata(sds_id)
+            with GD.open(self.sdfile) as gdfid:
+                with GD.attach(gdfid, 'TOMS Level 3') as gridid:
+                    raw = GD.readfield(gridid, 'Ozone')
+                    raw_cached = GD.readfield(gridid, 'Ozone')
+        finally:
+            install(None)
+
+        # Only the decoded SD read and the grid read were stored, and hits
+        # are writeable like misses.
+        self.assertEqual(len(cache.entries()), 2)
+        self.assertNotIsInstance(cached, np.memmap)
+        self.assertTrue(cached.flags.writeable)
+        np.testing.assert_array_equal(cached, ozone)
+        np.testing.assert_array_equal(raw_cached, raw)
+
+        # Unless memory maps were asked for.
+        mapped = FieldCache(self.cache_dir, mmap=True)
+        data = mapped.read(self.sdfile, 'Ozone')
+        self.assertIsInstance(data, np.memmap)
+        self.assertFalse(data.flags.writeable)
+        np.testing.assert_array_equal(data, ozone)
+
+    def test_eviction(self):
+        cache = FieldCache(self.cache_dir, maxbytes=180 * 288 * 4 + 4096)
+        cache.read(self.sdfile, 'Ozone')
+        cache.read(self.sdfile, 'Reflectivity')
+        cache.read(self.sdfile, 'Ozone', start=[0, 0], edge=[10, 10])
+        keys = [os.path.basename(entry) for _, _, entry in cache.entries()]
+        self.assertEqual(len(keys), 2)
+        self.assertNotIn(cache.key(self.sdfile, 'Ozone'), keys)
+        self.assertTrue(cache.nbytes <= cache.maxbytes)
+
+        compressed = FieldCache(self.cache_dir, compress=True)
+        np.testing.assert_array_equal(compressed.read(self.sdfile, 'Aerosol'),
+                                      compressed.read(self.sdfile, 'Aerosol'))
+        cache.clear()
+        self.assertEqual(cache.entries(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import io
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+from hotdog import cog
+from hotdog.lib import tiff as TIFF
+
+
+class TestCOG(unittest.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_reduce(self):
+        data = np.arange(15, dtype=np.float32).reshape(3, 5)
+        np.testing.assert_array_equal(cog.reduce(data),
+                                      [[3.0, 5.0, 6.5], [10.5, 12.5, 14.0]])
+        np.testing.assert_array_equal(cog.reduce(data, method='nearest'),
+                                      data[::2, ::2])
+
+        data[0, 1] = -999.0
+        data[1, 0] = np.nan
+        data[2, 4] = -999.0
+        out = cog.reduce(data, method='nanmean', fill_value=-999.0)
+        self.assertEqual(out[0, 0], 3.0)
+        self.assertEqual(out[1, 2], -999.0)
+        self.assertTrue(np.isnan(cog.reduce(data)[0, 0]))
+
+        counts = np.array([[1, 2], [4, 4]], dtype=np.uint8)
+        out = cog.reduce(counts)
+        self.assertEqual(out.dtype, np.uint8)
+        self.assertEqual(out[0, 0], 3)
+
+    def test_pyramid(self):
+        shapes = [image.shape
+                  for image in cog.pyramid(np.zeros((3000, 1100)),
+                                           tile=(512, 512))]
+        self.assertEqual(shapes, [(3000, 1100), (1500, 550), (750, 275),
+                                  (375, 138)])
+
+    def test_write_cog(self):
+        data = np.random.rand(1000, 1200).astype(np.float32)
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            cog.write_cog(tfile.name, data, tile=(256, 256),
+                          predictor=TIFF.PREDICTOR_FLOATINGPOINT,
+                          tags=[('GDAL_NODATA', -999.0)])
+
+            # The first directory directly follows the header.
+            with io.open(tfile.name, 'rb') as f:
+                header = f.read(8)
+            order = '<' if header[:2] == b'II' else '>'
+            self.assertEqual(struct.unpack(order + 'I', header[4:])[0], 8)
+
+            with TIFF.open(tfile.name) as tifp:
+                np.testing.assert_array_equal(np.asarray(TIFF.TIFFArray(tifp)),
+                                              data)
+                TIFF.setdirectory(tifp, 2)
+                image = TIFF.TIFFArray(tifp)
+                self.assertEqual(image.shape, (250, 300))
+                np.testing.assert_allclose(np.asarray(image),
+                                           cog.pyramid(data, levels=2)[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -55,7 +55,59 @@ class TestGD(unittest.TestCase):
                 np.testing.assert_array_equal(lat, 
                                               np.array([[89.5, 89.5],
                                                         [-89.5, -89.5]]))
-                    
+
+    def test_ij2ll_analytic(self):
+        # The vectorized geographic path agrees with GCTP over the full grid.
+        with GD.open(self.gridfile, GD.DFACC_READ) as gdfid:
+            with GD.attach(gdfid, 'TOMS Level 3') as gridid:
+                projcode, zonecode, spherecode, projparms = GD.projinfo(gridid)
+                (nrow, ncol), upleft, lowright = GD.gridinfo(gridid)
+                pixcen = GD.pixreginfo(gridid)
+                pixcnr = GD.origininfo(gridid)
+
+        row, col = np.mgrid[0:nrow, 0:ncol].astype(np.int32)
+        args = (projcode, zonecode, projparms, spherecode, ncol, nrow,
+                upleft, lowright, row, col, pixcen, pixcnr)
+        lon, lat = GD.ij2ll(*args)
+        lon2, lat2 = GD.ij2ll(*args, analytic=False)
+        np.testing.assert_allclose(lon, lon2, atol=1e-9)
+        np.testing.assert_allclose(lat, lat2, atol=1e-9)
+
+        for pixcnr in [core.HDFE_GD_UR, core.HDFE_GD_LL, core.HDFE_GD_LR]:
+            for pixcen in [core.HDFE_CENTER, core.HDFE_CORNER]:
+                args = (projcode, zonecode, projparms, spherecode, ncol, nrow,
+                        upleft, lowright, row, col, pixcen, pixcnr)
+                lon, lat = GD.ij2ll(*args)
+                lon2, lat2 = GD.ij2ll(*args, analytic=False)
+                np.testing.assert_allclose(lon, lon2, atol=1e-9)
+                np.testing.assert_allclose(lat, lat2, atol=1e-9)
+
+    def test_ll2ij(self):
+        with GD.open(self.gridfile, GD.DFACC_READ) as gdfid:
+            with GD.attach(gdfid, 'TOMS Level 3') as gridid:
+                projcode, zonecode, spherecode, projparms = GD.projinfo(gridid)
+                (nrow, ncol), upleft, lowright = GD.gridinfo(gridid)
+
+        lon = np.array([-179.375, 179.375, 0.1, -75.5])
+        lat = np.array([89.5, -89.5, 0.1, 40.2])
+        args = (projcode, zonecode, projparms, spherecode, ncol, nrow,
+                upleft, lowright, lon, lat)
+        row, col, xval, yval = GD.ll2ij(*args)
+        np.testing.assert_array_equal(row, [0, 179, 89, 49])
+        np.testing.assert_array_equal(col, [0, 287, 144, 83])
+        np.testing.assert_allclose(xval[:2], [0.5, 287.5])
+        np.testing.assert_allclose(yval[:2], [0.5, 179.5])
+
+        row2, col2, xval2, yval2 = GD.ll2ij(*args, analytic=False)
+        np.testing.assert_array_equal(row, row2)
+        np.testing.assert_array_equal(col, col2)
+        np.testing.assert_allclose(xval, xval2, atol=1e-9)
+        np.testing.assert_allclose(yval, yval2, atol=1e-9)
+
+    def test_dms2deg(self):
+        np.testing.assert_array_equal(GD.dms2deg([-180000000.0, 90000000.0,
+                                                  1030000.0]),
+                                      np.array([-180.0, 90.0, 1.5]))
 
     def test_origininfo(self):
         # Verify GDorigininfo
@@ -92,6 +144,48 @@ class TestGD(unittest.TestCase):
                 self.assertEqual(ranks, [2, 2, 2, 2])
                 self.assertEqual(numbertypes, [core.DFNT_FLOAT] * 4)
 
+    def test_fieldinfo(self):
+        with GD.open(self.gridfile, GD.DFACC_READ) as gdfid:
+            with GD.attach(gdfid, 'TOMS Level 3') as gridid:
+                rank, dims, numbertype, dimlist = GD.fieldinfo(gridid,
+                                                               'Ozone')
+                self.assertEqual(rank, 2)
+                np.testing.assert_array_equal(dims, [180, 288])
+                self.assertEqual(numbertype, core.DFNT_FLOAT)
+                self.assertEqual(len(dimlist), 2)
+
+    def test_readfield(self):
+        with GD.open(self.gridfile, GD.DFACC_READ) as gdfid:
+            with GD.attach(gdfid, 'TOMS Level 3') as gridid:
+                data = GD.readfield(gridid, 'Reflectivity')
+                self.assertEqual(data.shape, (180, 288))
+                self.assertEqual(data[0, 0], 999.0)
+                self.assertEqual(data[179, 287], 98.0)
+
+                window = GD.readfield(gridid, 'Reflectivity',
+                                      start=[170, 280], edge=[10, 8])
+                np.testing.assert_array_equal(window, data[170:, 280:])
+                strided = GD.readfield(gridid, 'Reflectivity',
+                                       start=[1, 0], stride=[2, 3])
+                np.testing.assert_array_equal(strided, data[1::2, ::3])
+
+    def test_itertiles(self):
+        with GD.open(self.gridfile, GD.DFACC_READ) as gdfid:
+            with GD.attach(gdfid, 'TOMS Level 3') as gridid:
+                tilecode, tiledims = GD.tileinfo(gridid, 'Ozone')
+                self.assertEqual(tilecode, core.HDFE_NOTILE)
+                self.assertEqual(len(tiledims), 0)
+
+                full = GD.readfield(gridid, 'Ozone')
+                data = np.zeros_like(full)
+                nwindows = 0
+                for window, tile in GD.itertiles(gridid, 'Ozone',
+                                                 tileshape=(50, 100)):
+                    data[window] = tile
+                    nwindows += 1
+                self.assertEqual(nwindows, 12)
+                np.testing.assert_array_equal(data, full)
+
     def test_nentries(self):
         with GD.open(self.gridfile, GD.DFACC_READ) as gdfid:
             with GD.attach(gdfid, 'TOMS Level 3') as gridid:
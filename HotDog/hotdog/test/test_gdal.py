@@ -11,6 +11,7 @@ except ImportError:
     pass
 
 from hotdog.lib import sd as SD
+from hotdog import convert
 import hotdog
 
 @unittest.skipIf('gdal' not in sys.modules, "gdal-python is not installed")
@@ -41,6 +42,19 @@ class TestGdal(unittest.TestCase):
             dst_ds.GetRasterBand(1).WriteArray(data)
             dst_ds = None
 
+    def test_geotiff_tags(self):
+        # GDAL can read the georeferencing written natively by hotdog.
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            convert.grid2tiff(self.sdfile, 'TOMS Level 3', 'Reflectivity',
+                              tfile.name, tileshape=(64, 64), nodata=999.0)
+            ds = gdal.Open(tfile.name)
+            self.assertEqual(ds.GetGeoTransform(),
+                             (-180.0, 1.25, 0.0, 90.0, 0.0, -1.0))
+            self.assertIn('GEOGCS', ds.GetProjection())
+            band = ds.GetRasterBand(1)
+            self.assertEqual(band.GetNoDataValue(), 999.0)
+            self.assertEqual(band.ReadAsArray()[179, 287], 98.0)
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,171 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pkg_resources
+
+from hotdog import core
+from hotdog import grid
+from hotdog.lib import sd as SD
+import hotdog
+
+
+class TestGridDefinition(unittest.TestCase):
+
+    def setUp(self):
+        relpath = "data/TOMS-EP_L3-TOMSEPL3_2000m0101_v8.HDF"
+        self.gridfile = pkg_resources.resource_filename(hotdog.__name__,
+                                                        relpath)
+        self.cache_dir = tempfile.mkdtemp()
+        grid._geolocation.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+        grid._geolocation.clear()
+
+    def test_from_file(self):
+        gdef = grid.GridDefinition.from_file(self.gridfile, 'TOMS Level 3')
+        self.assertEqual(gdef.name, 'TOMS Level 3')
+        self.assertEqual(gdef.shape, (180, 288))
+        self.assertEqual(gdef.projcode, 0)
+        self.assertEqual(gdef.pixcen, core.HDFE_CENTER)
+        self.assertEqual(gdef.pixcnr, core.HDFE_GD_UL)
+        np.testing.assert_array_equal(gdef.upleft,
+                                      np.array([-180000000.0, 90000000.0]))
+
+    def test_ll2ij_origins(self):
+        # ll2ij inverts ij2ll whatever the registration and origin.
+        row, col = np.mgrid[0:180:7, 0:288:11]
+        for pixcnr in [core.HDFE_GD_UL, core.HDFE_GD_UR, core.HDFE_GD_LL,
+                       core.HDFE_GD_LR]:
+            for pixcen in [core.HDFE_CENTER, core.HDFE_CORNER]:
+                gdef = grid.GridDefinition((180, 288),
+                                           np.array([-180e6, 90e6]),
+                                           np.array([180e6, -90e6]),
+                                           core.GCTP_GEO, -1, 0,
+                                           np.zeros(13), pixcen, pixcnr)
+                lon, lat = gdef.ij2ll(row, col)
+                row2, col2 = gdef.ll2ij(lon, lat)
+                np.testing.assert_allclose(row2, row, atol=1e-9)
+                np.testing.assert_allclose(col2, col, atol=1e-9)
+
+    def test_geotiff_tags_origins(self):
+        # The georeference puts pixel centers on the ij2ll locations.
+        row, col = np.mgrid[0:180:7, 0:288:11]
+        for pixcnr in [core.HDFE_GD_UL, core.HDFE_GD_UR, core.HDFE_GD_LL,
+                       core.HDFE_GD_LR]:
+            for pixcen in [core.HDFE_CENTER, core.HDFE_CORNER]:
+                gdef = grid.GridDefinition((180, 288),
+                                           np.array([-180e6, 90e6]),
+                                           np.array([180e6, -90e6]),
+                                           core.GCTP_GEO, -1, 12,
+                                           np.zeros(13), pixcen, pixcnr)
+                tags = dict(gdef.geotiff_tags())
+                self.assertNotIn('ModelTransformation', tags)
+                xscale, yscale, _ = tags['ModelPixelScale']
+                _, _, _, x0, y0, _ = tags['ModelTiepoint']
+                lon, lat = gdef.ij2ll(row, col)
+                np.testing.assert_allclose(x0 + (col + 0.5) * xscale, lon)
+                np.testing.assert_allclose(y0 - (row + 0.5) * yscale, lat)
+                if pixcen == core.HDFE_CENTER:
+                    self.assertEqual((x0, y0), (-180.0, 90.0))
+
+    def test_key(self):
+        gdef1 = grid.GridDefinition.from_file(self.gridfile, 'TOMS Level 3')
+        gdef2 = grid.GridDefinition.from_file(self.gridfile, 'TOMS Level 3')
+        self.assertEqual(gdef1.key, gdef2.key)
+        self.assertEqual(gdef1, gdef2)
+        gdef3 = grid.GridDefinition((90, 144), gdef1.upleft, gdef1.lowright,
+                                    0, -1, 0, gdef1.projparm)
+        self.assertNotEqual(gdef1.key, gdef3.key)
+
+    def test_lonlat(self):
+        gdef = grid.GridDefinition.from_file(self.gridfile, 'TOMS Level 3')
+        lon, lat = gdef.lonlat(cache_dir=self.cache_dir)
+        self.assertEqual(lon.shape, (180, 288))
+        self.assertEqual(lon[0, 0], -179.375)
+        self.assertEqual(lon[179, 287], 179.375)
+        self.assertEqual(lat[0, 0], 89.5)
+        self.assertEqual(lat[179, 287], -89.5)
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir,
+                                                    gdef.key + '.npy')))
+
+        # Memoized, and shared by every definition of the same grid.
+        other = grid.GridDefinition.from_file(self.gridfile, 'TOMS Level 3')
+        lon2, lat2 = other.lonlat(cache_dir=self.cache_dir)
+        self.assertIs(lon2, lon)
+
+        # A fresh process would memory-map the on-disk copy.
+        grid._geolocation.clear()
+        lon3, _ = gdef.lonlat(cache_dir=self.cache_dir)
+        self.assertIsInstance(lon3, np.memmap)
+        np.testing.assert_array_equal(lon3, lon)
+
+        # An unwritable cache falls back to memory.
+        grid._geolocation.clear()
+        blocker = os.path.join(self.cache_dir, 'file')
+        open(blocker, 'w').close()
+        lon4, _ = gdef.lonlat(cache_dir=os.path.join(blocker, 'cache'))
+        self.assertNotIsInstance(lon4, np.memmap)
+        np.testing.assert_array_equal(lon4, lon)
+
+    def test_resample_index(self):
+        source = grid.GridDefinition.from_file(self.gridfile, 'TOMS Level 3')
+        target = grid.GridDefinition((90, 144), source.upleft,
+                                     source.lowright, source.projcode,
+                                     source.zonecode, source.spherecode,
+                                     source.projparm)
+        lon, lat = source.lonlat(cache_dir=self.cache_dir)
+        tlon, tlat = target.lonlat(cache_dir=self.cache_dir)
+
+        index = grid.resample_index(source, target, method='bilinear',
+                                    cache_dir=self.cache_dir)
+        np.testing.assert_allclose(index.apply(lat), tlat, atol=1e-9)
+        self.assertIs(grid.resample_index(source, target, method='bilinear',
+                                          cache_dir=self.cache_dir), index)
+
+        # Reloaded from disk in a new process.
+        grid._resample_indexes.clear()
+        index2 = grid.resample_index(source, target, method='bilinear',
+                                     cache_dir=self.cache_dir)
+        self.assertIsNot(index2, index)
+        np.testing.assert_array_equal(index2.apply(lon), index.apply(lon))
+
+        nearest = grid.resample_index(source, target, method='nearest',
+                                      cache_dir=self.cache_dir)
+        self.assertTrue(np.all(np.abs(nearest.apply(lat) - tlat) <= 0.5))
+
+    def test_resample_points(self):
+        source = grid.GridDefinition.from_file(self.gridfile, 'TOMS Level 3')
+        field = np.arange(180 * 288, dtype=np.float32).reshape(180, 288)
+        stations = (np.array([-179.375, 0.1, 400.0]),
+                    np.array([89.5, 0.1, 0.0]))
+        index = grid.resample_index(source, stations)
+        values = index.apply(field)
+        self.assertEqual(values[0], field[0, 0])
+        self.assertEqual(values[1], field[89, 144])
+        self.assertTrue(np.isnan(values[2]))
+
+    def test_subset(self):
+        data, lon, lat = grid.subset(self.gridfile, 'TOMS Level 3', 'Ozone',
+                                     -125.0, -66.0, 24.0, 50.0)
+        self.assertEqual(data.shape, (26, 47))
+        self.assertEqual(lon.shape, (47,))
+        self.assertEqual(lat.shape, (26,))
+        self.assertTrue(lon.min() >= -125.0 and lon.max() <= -66.0)
+        self.assertTrue(lat.min() >= 24.0 and lat.max() <= 50.0)
+
+        gdef = grid.GridDefinition.from_file(self.gridfile, 'TOMS Level 3')
+        rows, cols = gdef.window(-125.0, -66.0, 24.0, 50.0)
+        self.assertEqual((rows, cols), (slice(40, 66), slice(44, 91)))
+
+        with SD.start(self.gridfile) as sdid:
+            with SD.select(sdid, SD.nametoindex(sdid, 'Ozone')) as sds_id:
+                full = SD.readdata(sds_id)
+        np.testing.assert_array_equal(data, full[rows, cols])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,7 @@ import pkg_resources
 
 from hotdog.lib import sd as SD
 from hotdog.lib import tiff as TIFF
+from hotdog import convert
 import hotdog
 
 class TestGdal(unittest.TestCase):
@@ -41,6 +42,24 @@ class TestGdal(unittest.TestCase):
             shutil.copyfile(tfile.name,
                             os.path.join(os.environ['HOME'], 'b.tif'))
 
+    def test_grid2tiff(self):
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            convert.grid2tiff(self.sdfile, 'TOMS Level 3', 'Reflectivity',
+                              tfile.name, tileshape=(64, 128))
+            # 3 x 3 tiles of 64 x 128 float32 values, uncompressed.
+            self.assertTrue(os.path.getsize(tfile.name) >= 9 * 64 * 128 * 4)
+
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            convert.grid2tiff(self.sdfile, 'TOMS Level 3', 'Reflectivity',
+                              tfile.name, tileshape=(64, 128),
+                              compression=TIFF.COMPRESSION_ADOBE_DEFLATE,
+                              predictor=TIFF.PREDICTOR_FLOATINGPOINT,
+                              threads=2)
+            self.assertTrue(os.path.getsize(tfile.name) < 9 * 64 * 128 * 4)
+
+        with self.assertRaises(ValueError):
+            convert.grid2tiff(self.sdfile, 'TOMS Level 3', 'Reflectivity',
+                              'unused.tif', tileshape=(100, 100))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pkg_resources
+
+from hotdog import index
+import hotdog
+
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        relpath = "data/TOMS-EP_L3-TOMSEPL3_2000m0101_v8.HDF"
+        self.gridfile = pkg_resources.resource_filename(hotdog.__name__,
+                                                        relpath)
+        self.tempdir = tempfile.mkdtemp()
+        self.archive = os.path.join(self.tempdir, 'archive')
+        os.makedirs(os.path.join(self.archive, '2000'))
+        self.granule = os.path.join(self.archive, '2000',
+                                    os.path.basename(self.gridfile))
+        shutil.copyfile(self.gridfile, self.granule)
+        self.dbfile = os.path.join(self.tempdir, 'index.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_scan(self):
+        metadata = index.scan(self.granule)
+        grid = metadata['grids'][0]
+        self.assertEqual(grid['name'], 'TOMS Level 3')
+        self.assertEqual((grid['nrow'], grid['ncol']), (180, 288))
+        self.assertEqual([f[0] for f in grid['fields']],
+                         ['Ozone', 'Reflectivity', 'Aerosol', 'Erythemal'])
+        lon_min, lon_max, lat_min, lat_max = grid['bounds']
+        self.assertEqual((lon_min, lon_max), (-179.375, 179.375))
+        self.assertEqual((lat_min, lat_max), (-89.5, 89.5))
+
+    def test_scan_vanished(self):
+        metadata = index.scan(os.path.join(self.archive, 'gone.hdf'))
+        self.assertIsNotNone(metadata['error'])
+        self.assertEqual((metadata['grids'], metadata['datasets']), ([], []))
+
+    def test_update_query(self):
+        with index.Index(self.dbfile) as idx:
+            self.assertEqual(idx.update(self.archive, processes=1), 1)
+            # Unchanged files are not rescanned.
+            self.assertEqual(idx.update(self.archive, processes=1), 0)
+
+            conus = (-125.0, -66.0, 24.0, 50.0)
+            self.assertEqual(idx.query(field='Ozone', bbox=conus),
+                             [self.granule])
+            self.assertEqual(idx.query(grid='TOMS Level 3'), [self.granule])
+            self.assertEqual(idx.query(field='Temperature'), [])
+
+            os.remove(self.granule)
+            self.assertEqual(idx.update(self.archive, processes=1), 0)
+            self.assertEqual(idx.query(field='Ozone'), [])
+
+    def test_update_unreadable(self):
+        with open(os.path.join(self.archive, 'garbage.hdf'), 'wb') as f:
+            f.write(b'not an hdf file')
+        with index.Index(self.dbfile) as idx:
+            self.assertEqual(idx.update(self.archive, processes=1), 2)
+            # Failures are recorded and not rescanned until they change.
+            self.assertEqual(idx.update(self.archive, processes=1), 0)
+            failures = idx.failures()
+            self.assertEqual([path for path, _ in failures],
+                             [os.path.join(self.archive, 'garbage.hdf')])
+            self.assertEqual(idx.query(), [self.granule])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+import pkg_resources
+
+from hotdog.lib import gd as GD
+from hotdog.lib import sd as SD
+from hotdog.pool import HandlePool
+import hotdog
+
+
+class TestHandlePool(unittest.TestCase):
+
+    def setUp(self):
+        relpath = "data/TOMS-EP_L3-TOMSEPL3_2000m0101_v8.HDF"
+        self.gridfile = pkg_resources.resource_filename(hotdog.__name__,
+                                                        relpath)
+
+    def tearDown(self):
+        pass
+
+    def test_reuse(self):
+        with HandlePool(maxsize=4) as pool:
+            with pool.grid(self.gridfile, 'TOMS Level 3') as gridid:
+                gridsize, _, _ = GD.gridinfo(gridid)
+                self.assertEqual(gridsize, (180, 288))
+            with pool.grid(self.gridfile, 'TOMS Level 3') as gridid2:
+                self.assertEqual(gridid, gridid2)
+            self.assertEqual(len(pool), 2)
+        self.assertEqual(len(pool), 0)
+
+    def test_eviction(self):
+        with HandlePool(maxsize=1) as pool:
+            with pool.grid(self.gridfile, 'TOMS Level 3') as gridid:
+                # Borrowed handles are not evicted.
+                self.assertEqual(len(pool), 2)
+            self.assertEqual(len(pool), 1)
+            with pool.sd(self.gridfile) as sdid:
+                idx = SD.nametoindex(sdid, 'Reflectivity')
+                with SD.select(sdid, idx) as sds_id:
+                    data = SD.readdata(sds_id)
+            self.assertEqual(data[179, 287], 98.0)
+            self.assertEqual(len(pool), 1)
+
+    def test_error_in_body(self):
+        with HandlePool() as pool:
+            with self.assertRaises(ValueError):
+                with pool.sd(self.gridfile) as sdid:
+                    raise ValueError
+            with pool.sd(self.gridfile) as sdid2:
+                self.assertEqual(sdid, sdid2)
+                nvars, _ = SD.fileinfo(sdid2)
+                self.assertEqual(nvars, 4)
+
+    def test_contextmanager_cleanup(self):
+        # The plain context managers release their handles on error, too.
+        with self.assertRaises(ValueError):
+            with GD.open(self.gridfile) as gdfid:
+                with GD.attach(gdfid, 'TOMS Level 3') as gridid:
+                    raise ValueError
+        with self.assertRaises(IOError):
+            GD.detach(gridid)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,6 +6,7 @@ import numpy as np
 import pkg_resources
 
 from hotdog.lib import sd as SD
+from hotdog import core
 import hotdog
 
 
@@ -43,6 +44,103 @@ class TestSD(unittest.TestCase):
                 self.assertEqual(data[0, 0], 999.0)
                 self.assertEqual(data[179, 287], 98.0)
 
+    def test_readdata_hyperslab(self):
+        with SD.start(self.sdfile, SD.DFACC_READ) as sdid:
+            idx = SD.nametoindex(sdid, 'Reflectivity')
+            with SD.select(sdid, idx) as sds_id:
+                full = SD.readdata(sds_id)
+                data = SD.readdata(sds_id, start=[170, 280], edge=[10, 8])
+                np.testing.assert_array_equal(data, full[170:180, 280:288])
+                data = SD.readdata(sds_id, start=[1, 2], stride=[3, 5])
+                np.testing.assert_array_equal(data, full[1::3, 2::5])
+
+    def test_readdata_out(self):
+        cube = np.zeros((2, 180, 288), dtype=np.float32)
+        with SD.start(self.sdfile, SD.DFACC_READ) as sdid:
+            idx = SD.nametoindex(sdid, 'Reflectivity')
+            with SD.select(sdid, idx) as sds_id:
+                data = SD.readdata(sds_id, out=cube[1])
+                self.assertIs(data.base, cube)
+                self.assertEqual(cube[1, 179, 287], 98.0)
+                with self.assertRaises(ValueError):
+                    SD.readdata(sds_id, out=np.zeros((180, 288)))
+                with self.assertRaises(ValueError):
+                    SD.readdata(sds_id, out=cube[:, :, 0])
+
+    def test_readdata_decode(self):
+        with SD.start(self.sdfile, SD.DFACC_READ) as sdid:
+            idx = SD.nametoindex(sdid, 'Reflectivity')
+            with SD.select(sdid, idx) as sds_id:
+                raw = SD.readdata(sds_id)
+                data = SD.readdata(sds_id, decode=True)
+                self.assertEqual(data.dtype, np.float32)
+                self.assertTrue(np.isnan(data[0, 0]))
+                self.assertEqual(data[179, 287], 98.0)
+                invalid = (raw == 999.0) | (raw < -5.0) | (raw > 105.0)
+                np.testing.assert_array_equal(np.isnan(data), invalid)
+
+                params = SD.decoding(sds_id)
+                self.assertEqual(params['fill_value'], 999.0)
+                self.assertEqual(params['valid_min'], -5.0)
+                self.assertEqual(params['valid_max'], 105.0)
+                masked = SD.readdata(sds_id, start=[170, 280], edge=[10, 8],
+                                     decode=params, masked=True)
+                np.testing.assert_array_equal(masked.mask,
+                                              invalid[170:, 280:])
+
+                window = SD.SDSArray(sds_id, decode=True)[170:, 280]
+                np.testing.assert_array_equal(window, data[170:, 280])
+
+    def test_memmap(self):
+        with SD.start(self.sdfile, SD.DFACC_READ) as sdid:
+            idx = SD.nametoindex(sdid, 'Reflectivity')
+            with SD.select(sdid, idx) as sds_id:
+                data = SD.readdata(sds_id)
+                offsets, lengths = SD.getdatainfo(sds_id)
+                self.assertIsNone(SD.getexternalinfo(sds_id))
+                self.assertFalse(SD.isrecord(sds_id))
+                mm = SD.memmap(self.sdfile, sds_id)
+                if SD.getcompinfo(sds_id) == core.COMP_CODE_NONE:
+                    self.assertEqual(len(offsets), 1)
+                    self.assertEqual(lengths[0], data.nbytes)
+                    np.testing.assert_array_equal(mm, data)
+                else:
+                    self.assertIsNone(mm)
+
+    def test_catalog(self):
+        cat = SD.catalog(self.sdfile)
+        self.assertEqual(set(cat['datasets']),
+                         set(['Ozone', 'Reflectivity', 'Aerosol',
+                              'Erythemal']))
+        info = cat['datasets']['Reflectivity']
+        self.assertEqual(info['shape'], (180, 288))
+        self.assertEqual(info['dtype'], np.float32)
+        self.assertEqual(info['attributes']['long_name'],
+                         'Effective Surface Reflectivity')
+        self.assertEqual(info['attributes']['_FillValue'], 999.0)
+        self.assertIs(SD.catalog(self.sdfile), cat)
+
+    def test_numpy_dtype(self):
+        self.assertEqual(SD.numpy_dtype(core.DFNT_FLOAT64), np.float64)
+        self.assertEqual(SD.numpy_dtype(core.DFNT_INT16), np.int16)
+        self.assertEqual(SD.numpy_dtype(core.DFNT_UINT32), np.uint32)
+        with self.assertRaises(NotImplementedError):
+            SD.numpy_dtype(-1)
+
+    def test_sdsarray(self):
+        with SD.start(self.sdfile, SD.DFACC_READ) as sdid:
+            idx = SD.nametoindex(sdid, 'Reflectivity')
+            with SD.select(sdid, idx) as sds_id:
+                full = SD.readdata(sds_id)
+                arr = SD.SDSArray(sds_id)
+                self.assertEqual(arr.shape, (180, 288))
+                self.assertEqual(arr.dtype, np.float32)
+                for key in [(slice(40, 50), slice(100, 110)),
+                            (slice(None, None, 4), slice(7, None, 9)),
+                            (slice(None, None, -3), -1),
+                            (179, Ellipsis)]:
+                    np.testing.assert_array_equal(arr[key], full[key])
+
 
 if __name__ == "__main__":
     unittest.main()
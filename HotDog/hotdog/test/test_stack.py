@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pkg_resources
+
+from hotdog import stack
+from hotdog.lib import sd as SD
+import hotdog
+
+
+class TestStack(unittest.TestCase):
+
+    def setUp(self):
+        relpath = "data/TOMS-EP_L3-TOMSEPL3_2000m0101_v8.HDF"
+        self.sdfile = pkg_resources.resource_filename(hotdog.__name__,
+                                                       relpath)
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_granule_time(self):
+        self.assertEqual(stack.granule_time(self.sdfile),
+                         np.datetime64('2000-01-01'))
+        self.assertEqual(stack.granule_time('MOD08_D3.A2004060.005.hdf'),
+                         np.datetime64('2004-02-29'))
+        with self.assertRaises(ValueError):
+            stack.granule_time('undated.hdf')
+
+    def test_stack(self):
+        with SD.start(self.sdfile) as sdid:
+            with SD.select(sdid, SD.nametoindex(sdid, 'Ozone')) as sds_id:
+                full = SD.readdata(sds_id)
+
+        outfile = os.path.join(self.tempdir, 'ozone.npy')
+        times = np.array(['2000-01-02', '2000-01-01'], dtype='datetime64[D]')
+        cube, t = stack.stack([self.sdfile, self.sdfile], 'Ozone', outfile,
+                              times=times, processes=2)
+        self.assertEqual(cube.shape, (2, 180, 288))
+        np.testing.assert_array_equal(t, times[::-1])
+        np.testing.assert_array_equal(cube[0], full)
+        np.testing.assert_array_equal(cube[1], full)
+
+        cube, _ = stack.stack([self.sdfile], 'Ozone', outfile, start=[40, 44],
+                              edge=[26, 47], decode=True)
+        self.assertEqual(cube.shape, (1, 26, 47))
+        self.assertEqual(cube.dtype, np.float32)
+        self.assertIsInstance(np.load(outfile, mmap_mode='r'), np.memmap)
+
+
+if __name__ == "__main__":
+    unittest.main()
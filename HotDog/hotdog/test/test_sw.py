@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+
+from hotdog.lib import sw as SW
+
+
+class TestSW(unittest.TestCase):
+
+    def test_expand(self):
+        # MODIS 5-km geolocation: every 5th point starting at 2.
+        row, col = np.mgrid[0:406, 0:271].astype(np.float64)
+        plane = 3 * row - 2 * col + 1
+        geo = plane[2::5, 2::5]
+        actual = SW.expand(geo, [2, 2], [5, 5], (406, 271))
+        np.testing.assert_allclose(actual, plane, atol=1e-9)
+
+        # An identity map leaves the axis alone.
+        actual = SW.expand(geo, [2, 0], [5, 1], (406, geo.shape[1]))
+        np.testing.assert_allclose(actual, plane[:, 2::5], atol=1e-9)
+
+    def test_expand_negative_increment(self):
+        with self.assertRaises(NotImplementedError):
+            SW.expand(np.zeros((3, 3)), [0, 0], [-2, 1], (6, 3))
+
+    def test_expand_lonlat_dateline(self):
+        lon = np.array([[170.0, -170.0], [170.0, -170.0]])
+        lat = np.array([[10.0, 10.0], [20.0, 20.0]])
+        lon, lat = SW.expand_lonlat(lon, lat, [0, 0], [4, 4], (5, 5))
+        self.assertEqual(lon.shape, (5, 5))
+        np.testing.assert_allclose(lon[0, [0, 2, 4]], [170, 180, -170])
+        self.assertTrue(np.all(np.abs(lon) >= 170))
+        np.testing.assert_allclose(lat[[0, 2, 4], 0], [10, 15, 20])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import os
 import tempfile
 import unittest
@@ -35,6 +36,156 @@ class TestTiff(unittest.TestCase):
             shutil.copyfile(tfile.name,
                             os.path.join(os.environ['HOME'], 'b.tif'))
 
+    def test_geotiff_tags(self):
+        data = np.zeros((16, 16), dtype=np.float32)
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            with TIFF.open(tfile.name, 'w') as tifp:
+                TIFF.setfield(tifp, 'ImageWidth', 16)
+                TIFF.setfield(tifp, 'ImageLength', 16)
+                TIFF.setfield(tifp, 'SamplesPerPixel', 1)
+                TIFF.setfield(tifp, 'BitsPerSample', 32)
+                TIFF.setfield(tifp, 'SampleFormat', TIFF.SAMPLEFORMAT_IEEEFP)
+                TIFF.setfield(tifp, 'RowsPerStrip', 16)
+                TIFF.setfield(tifp, 'ModelPixelScale', [1.25, 1.0, 0.0])
+                TIFF.setfield(tifp, 'ModelTiepoint',
+                              [0, 0, 0, -180.0, 90.0, 0])
+                TIFF.setfield(tifp, 'GeoKeyDirectory',
+                              [1, 1, 0, 2, 1024, 0, 1, 2, 2048, 0, 1, 4326])
+                TIFF.setfield(tifp, 'GeoAsciiParams', 'WGS 84|')
+                TIFF.setfield(tifp, 'GDAL_NODATA', 999.0)
+                TIFF.writeencodedstrip(tifp, 0, data)
+            with io.open(tfile.name, 'rb') as f:
+                contents = f.read()
+            self.assertIn(b'WGS 84|', contents)
+            self.assertIn(b'999.0', contents)
+
+    def test_predictors(self):
+        # Undoing the horizontal predictor is a cumulative sum along rows.
+        data = np.arange(3 * 16 * 2, dtype=np.uint16).reshape(3, 16, 2) ** 2
+        diff = TIFF._predict(data, TIFF.PREDICTOR_HORIZONTAL).reshape(data.shape)
+        np.testing.assert_array_equal(np.cumsum(diff, axis=1, dtype=np.uint16),
+                                      data)
+
+        # The floating point predictor shuffles bytes, most significant first.
+        data = np.array([[1.0, 2.0]], dtype=np.float32)
+        out = TIFF._predict(data, TIFF.PREDICTOR_FLOATINGPOINT)
+        np.testing.assert_array_equal(out, [[0x3f, 0x01, 0x40, 0x80,
+                                             0x00, 0x00, 0x00, 0x00]])
+
+        with self.assertRaises(ValueError):
+            TIFF._predict(data, TIFF.PREDICTOR_HORIZONTAL)
+
+    def test_parallel_tile_writer(self):
+        data = np.zeros((512, 512), dtype=np.float32)
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            with TIFF.open(tfile.name, 'w') as tifp:
+                TIFF.setfield(tifp, 'ImageWidth', 1024)
+                TIFF.setfield(tifp, 'ImageLength', 1024)
+                TIFF.setfield(tifp, 'SamplesPerPixel', 1)
+                TIFF.setfield(tifp, 'BitsPerSample', 32)
+                TIFF.setfield(tifp, 'PlanarConfiguration', TIFF.PLANARCONFIG_CONTIG)
+                TIFF.setfield(tifp, 'PhotometricInterpretation',
+                              TIFF.PHOTOMETRIC_MINISBLACK)
+                TIFF.setfield(tifp, 'SampleFormat', TIFF.SAMPLEFORMAT_IEEEFP)
+                TIFF.setfield(tifp, 'TileWidth', 512)
+                TIFF.setfield(tifp, 'TileLength', 512)
+                with TIFF.ParallelTileWriter(tifp, threads=2) as writer:
+                    for y in (0, 512):
+                        for x in (0, 512):
+                            writer.write(data, x, y)
+            self.assertTrue(os.path.getsize(tfile.name) < 512 * 512 * 4)
+
+    def test_write_tiled(self):
+        data = np.arange(600 * 700, dtype=np.uint16).reshape(600, 700)
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            with TIFF.open(tfile.name, 'w') as tifp:
+                TIFF.write_tiled(tifp, data, tile=(512, 512))
+            # 2 x 2 padded tiles.
+            self.assertTrue(os.path.getsize(tfile.name) >= 4 * 512 * 512 * 2)
+
+        rgb = np.zeros((3, 100, 100), dtype=np.uint8)
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            with TIFF.open(tfile.name, 'w') as tifp:
+                TIFF.write_tiled(tifp, rgb, tile=(64, 64),
+                                 planarconfig=TIFF.PLANARCONFIG_SEPARATE,
+                                 photometric=TIFF.PHOTOMETRIC_RGB)
+            self.assertTrue(os.path.getsize(tfile.name) >= 3 * 4 * 64 * 64)
+
+    def test_read(self):
+        data = np.random.rand(600, 700).astype(np.float32)
+        rgb = np.random.randint(0, 256, (3, 100, 90)).astype(np.uint8)
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            with TIFF.open(tfile.name, 'w') as tifp:
+                TIFF.write_tiled(tifp, data, tile=(256, 256))
+            with TIFF.open(tfile.name) as tifp:
+                image = TIFF.TIFFArray(tifp)
+                self.assertEqual(image.shape, (600, 700))
+                self.assertEqual(image.dtype, np.float32)
+                np.testing.assert_array_equal(image[250:520, 10:600:3],
+                                              data[250:520, 10:600:3])
+                np.testing.assert_array_equal(np.asarray(image), data)
+
+                out = np.empty((256, 256), dtype=np.float32)
+                image.read_window(256, 512, 512, 700, out=out[:, :188])
+                np.testing.assert_array_equal(out[:, :188], data[256:512, 512:])
+
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            with TIFF.open(tfile.name, 'w') as tifp:
+                TIFF.write_tiled(tifp, rgb, tile=(64, 64),
+                                 planarconfig=TIFF.PLANARCONFIG_SEPARATE,
+                                 photometric=TIFF.PHOTOMETRIC_RGB)
+            with TIFF.open(tfile.name) as tifp:
+                image = TIFF.TIFFArray(tifp)
+                self.assertEqual(image.shape, (100, 90, 3))
+                np.testing.assert_array_equal(image[70:, 20:30, 1],
+                                              rgb[1, 70:, 20:30])
+
+    def test_bigtiff(self):
+        data = np.random.rand(100, 100).astype(np.float32)
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            with TIFF.open(tfile.name, 'w', bigtiff=True) as tifp:
+                self.assertTrue(TIFF.isbigtiff(tifp))
+                TIFF.write_tiled(tifp, data, tile=(64, 64))
+            with io.open(tfile.name, 'rb') as f:
+                self.assertIn(f.read(4), [b'II\x2b\x00', b'MM\x00\x2b'])
+            with TIFF.open(tfile.name) as tifp:
+                self.assertTrue(TIFF.isbigtiff(tifp))
+                np.testing.assert_array_equal(np.asarray(TIFF.TIFFArray(tifp)),
+                                              data)
+
+        # Chosen from the estimated size.
+        nbytes = TIFF.estimate_nbytes((40000, 40000), np.float32, (512, 512))
+        self.assertEqual(nbytes, 40448 * 40448 * 4)
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            with TIFF.open(tfile.name, 'w', nbytes=nbytes) as tifp:
+                self.assertTrue(TIFF.isbigtiff(tifp))
+            with TIFF.open(tfile.name, 'w', nbytes=2 ** 20) as tifp:
+                self.assertFalse(TIFF.isbigtiff(tifp))
+
+    def test_writetile_views(self):
+        data = np.arange(32 * 64, dtype='>i2').reshape(64, 32)
+        with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
+            with TIFF.open(tfile.name, 'w') as tifp:
+                TIFF.setfield(tifp, 'ImageWidth', 64)
+                TIFF.setfield(tifp, 'ImageLength', 32)
+                TIFF.setfield(tifp, 'SamplesPerPixel', 1)
+                TIFF.setfield(tifp, 'BitsPerSample', 16)
+                TIFF.setfield(tifp, 'SampleFormat', TIFF.SAMPLEFORMAT_INT)
+                TIFF.setfield(tifp, 'TileWidth', 32)
+                TIFF.setfield(tifp, 'TileLength', 32)
+                # A transposed, byte swapped view has to be copied.
+                with self.assertRaises(ValueError):
+                    TIFF.writetile(tifp, data.T[:, :32], 0, 0, copy=False)
+                TIFF.writetile(tifp, data.T[:, :32], 0, 0)
+                right = data.T[:, 32:].astype(np.int16, order='C')
+                TIFF.writetile(tifp, memoryview(right), 32, 0, copy=False)
+            with TIFF.open(tfile.name) as tifp:
+                np.testing.assert_array_equal(np.asarray(TIFF.TIFFArray(tifp)),
+                                              data.T)
+
+        with self.assertRaises(NotImplementedError):
+            TIFF._contiguous(np.zeros(4, dtype=bool))
+
     def test_basic(self):
         with tempfile.NamedTemporaryFile(suffix=".tif") as tfile:
             with TIFF.open(tfile.name, 'w') as tifp:
@@ -1,4 +1,4 @@
-from distutils.core import setup
+from setuptools import setup
 setup(name='HotDog',
       version='0.0.1',
       description='HDF-EOS to GEOTIFF',
@@ -6,7 +6,13 @@ setup(name='HotDog',
       author='John Evans',
       author_email='john.g.evans.ne@gmail.com',
       url='https://github.com/quintusdias/allerlei',
-      packages=['hotdog', 'hotdog.tests'],
+      packages=['hotdog', 'hotdog.lib', 'hotdog.test'],
+      setup_requires=['cffi>=1.0.0'],
+      install_requires=['cffi>=1.0.0', 'numpy'],
+      cffi_modules=['hotdog/lib/_sd_build.py:ffibuilder',
+                    'hotdog/lib/_gd_build.py:ffibuilder',
+                    'hotdog/lib/_sw_build.py:ffibuilder',
+                    'hotdog/lib/_tiff_build.py:ffibuilder'],
       package_data={'hotdog': ['data/*.HDF']},
       license='MIT',
       platforms=['darwin'],